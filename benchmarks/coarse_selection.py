@@ -0,0 +1,59 @@
+''' Per-selection cost of the columnar coarse stage against the original list-comprehension + full sort.
+
+    python benchmarks/coarse_selection.py [--sizes 2000 8000 10000] [--repeat 20]
+'''
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'trading-algorithms', 'Dividend-Growth'))
+from coarse import CoarseBatch, CoarseSelectionStage
+
+
+def make_coarse(n, time, seed=0):
+    rng = np.random.default_rng(seed)
+    price = rng.lognormal(3, 1.2, n)
+    dollarVolume = price*rng.lognormal(12, 2.5, n)
+    hasFundamentalData = rng.random(n) < .8
+    age = rng.integers(0, 30*365, n)
+    return [SimpleNamespace(Price=float(price[i]),
+                            DollarVolume=float(dollarVolume[i]),
+                            HasFundamentalData=bool(hasFundamentalData[i]),
+                            Symbol=SimpleNamespace(Value=f'S{i}', ID=SimpleNamespace(Date=time - timedelta(int(age[i])))))
+            for i in range(n)]
+
+
+def select_coarse_reference(time, coarse):
+    coarseFiltered = [c for c in coarse if (c.HasFundamentalData and c.Price > 1 and c.DollarVolume > 1e6 and (time - c.Symbol.ID.Date) > timedelta(365))]
+    sortedByDollarVolume = sorted(coarseFiltered, key=lambda c: c.DollarVolume, reverse=True)
+    return [c.Symbol for c in sortedByDollarVolume[:1000]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 2000, 5000, 8000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    time = datetime(2020, 1, 2)
+    stage = CoarseSelectionStage()
+    print(f"{'coarse':>8} {'reference ms':>14} {'columnar ms':>13} {'batch copy ms':>15} {'select on batch ms':>20} {'speedup':>9}")
+    for n in args.sizes:
+        coarse = make_coarse(n, time)
+        expected = select_coarse_reference(time, coarse)
+        assert set(s.Value for s in stage.Select(time, coarse)) == set(s.Value for s in expected)
+        reference = min(timeit.repeat(lambda: select_coarse_reference(time, coarse), number=1, repeat=args.repeat))
+        columnar = min(timeit.repeat(lambda: stage.Select(time, coarse), number=1, repeat=args.repeat))
+        copy = min(timeit.repeat(lambda: CoarseBatch(coarse), number=1, repeat=args.repeat))
+        batch = CoarseBatch(coarse)
+        select = min(timeit.repeat(lambda: stage.Select(time, batch), number=1, repeat=args.repeat))
+        print(f'{n:>8} {reference*1e3:>14.2f} {columnar*1e3:>13.2f} {copy*1e3:>15.2f} {select*1e3:>20.2f} {reference/columnar:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+''' How far the EMA crossover signal drifts when its EMAs run on consolidated bars instead of minute bars.
+
+    python benchmarks/ema_consolidation.py [--start 2015-01-01] [--end 2016-12-31] [--evaluate-on-bar]
+
+    Runs the futures strategy on the same synthetic market once per indicator resolution and compares
+    each run with the minute-fed one: EMA steps and time spent stepping them, agreement of the daily
+    insight directions, the gap between fast/slow spreads at evaluation time, and the backtest outcome.
+'''
+import argparse
+import os
+import sys
+import time as timer
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness import Resolution, SyntheticMarket, load_project, run
+
+
+PROJECT = 'EMA-Crossover-with-Futures'
+
+
+def instrument(alpha, stats):
+    ''' Count and time EMA steps, and snapshot the fast/slow spread of every symbol at each evaluation. '''
+    stats.update(steps=0, seconds=0., spreads={})
+    ema, update, alphaUpdate = alpha.ema, alpha.ema.Update, alpha.Update
+
+    def Update(closes):
+        started = timer.perf_counter()
+        update(closes)
+        stats['seconds'] += timer.perf_counter() - started
+        stats['steps'] += sum(close is not None for close in closes)
+
+    def AlphaUpdate(algorithm, data):
+        insights = alphaUpdate(algorithm, data)
+        for insight in insights:
+            fast, slow = ema.Values(insight.Symbol)
+            stats['spreads'][(algorithm.Time.date(), insight.Symbol.Value)] = (fast/slow - 1, int(insight.Direction))
+        return insights
+
+    ema.Update, alpha.Update = Update, AlphaUpdate
+
+
+def backtest(project, market, resolution, evaluateOnBar):
+    stats = {}
+
+    def configure(algorithm):
+        alpha = project.alpha.EmaCrossoverAlphaModel(resolution, evaluateOnBar)
+        algorithm.Alphas[:] = [alpha]
+        algorithm.alphaModel = alpha
+        instrument(alpha, stats)
+    result = run(project, market, configure=configure)
+    return result, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--start', type=datetime.fromisoformat, default=datetime(2015, 1, 1))
+    parser.add_argument('--end', type=datetime.fromisoformat, default=datetime(2016, 12, 31))
+    parser.add_argument('--evaluate-on-bar', action='store_true', help='evaluate whenever the EMAs step instead of once a day')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    project = load_project(PROJECT)
+    market = SyntheticMarket(args.start, args.end, nEquities=0, seed=args.seed)
+    runs = {resolution: backtest(project, market, resolution, args.evaluate_on_bar)
+            for resolution in (Resolution.Minute, Resolution.Hour, Resolution.Daily)}
+    _, reference = runs[Resolution.Minute]
+
+    print(f"{'EMAs on':>8} {'EMA steps':>10} {'EMA ms':>8} {'direction agreement':>20} {'spread gap bp':>14} "
+          f"{'return':>8} {'sharpe':>7} {'orders':>7} {'backtest s':>11}")
+    for resolution, (result, stats) in runs.items():
+        common = sorted(set(stats['spreads']) & set(reference['spreads']))
+        if common:
+            spreads = np.array([stats['spreads'][key] for key in common])
+            referenceSpreads = np.array([reference['spreads'][key] for key in common])
+            agreement = f"{np.mean(spreads[:, 1] == referenceSpreads[:, 1]):>19.1%}"
+            gap = f'{np.mean(np.abs(spreads[:, 0] - referenceSpreads[:, 0]))*1e4:>14.1f}'
+        else:
+            agreement, gap = f"{'-':>19}", f"{'-':>14}"
+        print(f'{resolution.name:>8} {stats["steps"]:>10} {stats["seconds"]*1e3:>8.1f} {agreement} {gap} '
+              f'{result.totalReturn:>8.2%} {result.sharpe:>7.2f} {result.orders:>7} {result.seconds:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
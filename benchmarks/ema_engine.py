@@ -0,0 +1,77 @@
+''' Warm-up and per-slice cost of the batched EMA engine against one indicator object per EMA.
+
+    python benchmarks/ema_engine.py [--sizes 4 16 64 256] [--bars-per-day 1380] [--repeat 5]
+
+    The reference replays the warm-up history bar by bar into a fast and a slow ExponentialMovingAverage
+    per symbol (what automatic indicator warm-up does) and updates every indicator on each slice.
+'''
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness import load_project
+from harness.lean import ExponentialMovingAverage
+
+
+def reference_warm_up(histories, periodFast, periodSlow):
+    indicators = []
+    for closes in histories:
+        fast = ExponentialMovingAverage('fast', periodFast)
+        slow = ExponentialMovingAverage('slow', periodSlow)
+        for indicator in (fast, slow):
+            for close in closes[-indicator.WarmUpPeriod:].tolist():
+                indicator.Update(None, close)
+        indicators.append((fast, slow))
+    return indicators
+
+
+def engine_warm_up(MultiSymbolEma, histories, periodFast, periodSlow):
+    ema = MultiSymbolEma(lanes=2)
+    for i, closes in enumerate(histories):
+        ema.Add(i, periodFast, periodSlow)
+        ema.WarmUp(i, closes)
+    return ema
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 16, 64, 256])
+    parser.add_argument('--bars-per-day', type=int, default=1380, help='minute bars in a futures session (23h)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    MultiSymbolEma = load_project('EMA-Crossover-with-Futures').ema.MultiSymbolEma
+    periodFast, periodSlow = 10*args.bars_per_day, 50*args.bars_per_day
+    rng = np.random.default_rng(0)
+    print(f"{'futures':>8} {'warm-up ref ms':>15} {'warm-up ms':>11} {'speedup':>8} {'slice ref us':>13} {'slice us':>9} {'speedup':>8} {'max rel err':>12}")
+    for n in args.sizes:
+        histories = [100*np.exp(np.cumsum(rng.normal(0, 5e-4, periodSlow))) for _ in range(n)]
+        sliceCloses = (100*rng.lognormal(0, .01, n)).tolist()
+
+        indicators = reference_warm_up(histories, periodFast, periodSlow)
+        ema = engine_warm_up(MultiSymbolEma, histories, periodFast, periodSlow)
+        expected = np.array([[fast.Current.Value, slow.Current.Value] for fast, slow in indicators])
+        error = np.max(np.abs(ema.values[:n]/expected - 1))
+        assert error < 1e-9 and all(ema.IsReady(i) for i in range(n))
+
+        warmUpReference = min(timeit.repeat(lambda: reference_warm_up(histories, periodFast, periodSlow), number=1, repeat=args.repeat))
+        warmUp = min(timeit.repeat(lambda: engine_warm_up(MultiSymbolEma, histories, periodFast, periodSlow), number=1, repeat=args.repeat))
+
+        def update_reference():
+            for (fast, slow), close in zip(indicators, sliceCloses):
+                fast.Update(None, close)
+                slow.Update(None, close)
+
+        number = 2000
+        sliceReference = min(timeit.repeat(update_reference, number=number, repeat=args.repeat))/number
+        engineSlice = min(timeit.repeat(lambda: ema.Update(sliceCloses), number=number, repeat=args.repeat))/number
+        print(f'{n:>8} {warmUpReference*1e3:>15.1f} {warmUp*1e3:>11.1f} {warmUpReference/warmUp:>7.0f}x '
+              f'{sliceReference*1e6:>13.1f} {engineSlice*1e6:>9.1f} {sliceReference/engineSlice:>7.1f}x {error:>12.1e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+''' Cold, warm and partially covered research queries through QuantBookCache.
+
+    python benchmarks/quantbook_cache.py [--symbols 200] [--directory /tmp/quantbook_cache]
+
+    Runs the BacktestAnalyzer queries (two fundamental fields and daily history) against the research
+    stand-in QuantBook, first with an empty cache, then again from a fresh cache object on the same
+    directory (a new session), then over a range extended by six months on both ends.
+'''
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time as timer
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness import Resolution, SyntheticMarket, load_project
+from harness.research import QuantBook
+
+
+def session(QuantBookCache, qb, directory, symbols, start, end):
+    qb.calls.clear()
+    started = timer.perf_counter()
+    cache = QuantBookCache(qb, directory)
+    for field in ('ValuationRatios.FCFYield', 'OperationRatios.RevenueGrowth.Value'):
+        cache.GetFundamental(symbols, field, start, end)
+    cache.History(symbols, start, end, Resolution.Daily)
+    return timer.perf_counter() - started, qb.calls['GetFundamental symbols'] + qb.calls['History symbols']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--directory', default=None, help='defaults to a temporary directory')
+    args = parser.parse_args(argv)
+
+    QuantBookCache = load_project('Rule-of-40-with-SaaS').qbcache.QuantBookCache
+    qb = QuantBook(SyntheticMarket(datetime(2014, 1, 1), datetime(2019, 12, 31), nEquities=args.symbols, futures=(), indices=()))
+    symbols = qb.market.symbols
+    directory = args.directory or tempfile.mkdtemp()
+    try:
+        print(f"{'session':>8} {'seconds':>8} {'symbol fetches':>15}")
+        for name, start, end in (('cold', datetime(2016, 1, 1), datetime(2018, 1, 1)),
+                                 ('warm', datetime(2016, 1, 1), datetime(2018, 1, 1)),
+                                 ('partial', datetime(2015, 7, 1), datetime(2018, 7, 1))):
+            seconds, fetches = session(QuantBookCache, qb, directory, symbols, start, end)
+            print(f'{name:>8} {seconds:>8.3f} {fetches:>15}')
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+''' Scaling benchmarks for the model hot paths of all three strategies.
+
+    python benchmarks/suite.py [--sizes 250 1000 4000 10000] [--depths 1 4] [--only CreateTargets]
+                               [--output results.json] [--plot curves.png]
+                               [--baseline previous.json --threshold .25]
+
+    Every case is timed at each universe size (and, for insight-driven cases, each number of
+    active insights per symbol). Results are written as JSON, an empirical scaling exponent
+    (slope of log time vs log size) is reported per case, and with --baseline the run exits
+    with status 1 when any case's throughput dropped by more than --threshold.
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time as timer
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness import Engine, SyntheticMarket, load_project
+from harness.lean import (Insight, InsightDirection, MarketHours, ObjectStore, QCAlgorithm, Resolution, Security, SecurityChanges,
+                          SecurityType, Slice, Bar, Symbol, SymbolProperties)
+
+
+START = datetime(2015, 1, 2)
+# selection model class and a factory for its keyword arguments, so every case gets its own ObjectStore
+EQUITY_PROJECTS = {'Dividend-Growth': ('DividendGrowthSelectionModel', dict),
+                   'Rule-of-40-with-SaaS': ('RuleOfFortySaasSelectionModel', lambda: dict(algorithm=None, objectStore=ObjectStore()))}
+FUTURES_PROJECT = 'EMA-Crossover-with-Futures'
+CASES = []
+
+_projects = {}
+_markets = {}
+
+
+def project(name):
+    if name not in _projects:
+        _projects[name] = load_project(name)
+    return _projects[name]
+
+
+def market(size):
+    if size not in _markets:
+        _markets[size] = SyntheticMarket(START, START + timedelta(10), nEquities=size, warmUpDays=5, saasShare=.1)
+    return _markets[size]
+
+
+def case(name, strategies, depths=False):
+    ''' Register setup(strategy, size, depth) -> zero-argument callable to time. '''
+    def register(setup):
+        CASES.append({'name': name, 'strategies': strategies, 'depths': depths, 'setup': setup})
+        return setup
+    return register
+
+
+# ------------------------------------------------------------------------------ fixtures
+
+def equity_algorithm(size):
+    algorithm = QCAlgorithm()
+    algorithm.SetCash(1_000_000)
+    synthetic = market(size)
+    engine = Engine(algorithm, synthetic, resolution=Resolution.Daily)
+    engine.dayIndex = synthetic.firstDayIndex
+    algorithm.SetTime(START)
+    securities = [engine.AddSecurity(symbol.Value, SecurityType.Equity, Resolution.Daily, symbol=symbol) for symbol in synthetic.symbols]
+    return algorithm, securities
+
+
+def futures_algorithm(size):
+    algorithm = QCAlgorithm()
+    algorithm.SetCash(1_000_000)
+    algorithm.SetTime(START + timedelta(hours=12))
+    rng = np.random.default_rng(size)
+    securities = []
+    for i in range(size):
+        symbol = Symbol(f'/F{i}', SecurityType.Future, datetime(1997, 9, 9), idTicker=f'F{i}')
+        security = Security(symbol, SymbolProperties(int(rng.choice([5, 50, 100, 1000]))), MarketHours())
+        security.SetMarketPrice(algorithm.Time, float(rng.uniform(20, 3000)))
+        algorithm.Securities[symbol] = security
+        securities.append(security)
+    return algorithm, securities
+
+
+def insights_for(algorithm, securities, depth, period=timedelta(30), directions=(InsightDirection.Up,)):
+    insights = []
+    for i, security in enumerate(securities):
+        for j in range(depth):
+            insight = Insight.Price(security.Symbol, period, directions[(i + j) % len(directions)])
+            insight.SourceModel = 'Benchmark'
+            insight.SetPeriodAndCloseTime(algorithm.UtcTime - timedelta(minutes=depth - j))
+            insights.append(insight)
+    return insights
+
+
+def portfolio_model(strategy, algorithm, securities, depth):
+    if strategy == FUTURES_PROJECT:
+        model = project(strategy).portfolio.NaiveFuturesPortfolioConstructionModel()
+        directions = (InsightDirection.Up, InsightDirection.Down, InsightDirection.Flat)
+    else:
+        model = project(strategy).portfolio.MarketCapWeightedPortfolioConstructionModel()
+        directions = (InsightDirection.Up,)
+    model.OnSecuritiesChanged(algorithm, SecurityChanges(securities))
+    insights = insights_for(algorithm, securities, depth, directions=directions)
+    model.CreateTargets(algorithm, insights)
+    return model
+
+
+def force_rebalance(model):
+    model.scheduler.wakeTime = datetime.min.replace(tzinfo=pytz.utc)
+
+
+# ------------------------------------------------------------------------------ cases
+
+@case('SelectCoarse', list(EQUITY_PROJECTS))
+def select_coarse(strategy, size, depth):
+    className, arguments = EQUITY_PROJECTS[strategy]
+    model = getattr(project(strategy).selection, className)(**arguments())
+    algorithm = QCAlgorithm()
+    algorithm.SetTime(START)
+    synthetic = market(size)
+    coarse = list(synthetic.Coarse(synthetic.firstDayIndex))
+    return lambda: model.SelectCoarse(algorithm, coarse)
+
+
+@case('SelectFine', list(EQUITY_PROJECTS))
+def select_fine(strategy, size, depth):
+    className, arguments = EQUITY_PROJECTS[strategy]
+    model = getattr(project(strategy).selection, className)(**arguments())
+    algorithm = QCAlgorithm()
+    algorithm.SetTime(START)
+    synthetic = market(size)
+    fine = synthetic.Fine(synthetic.firstDayIndex, synthetic.symbols)
+    return lambda: model.SelectFine(algorithm, fine)
+
+
+@case('CreateTargets', list(EQUITY_PROJECTS) + [FUTURES_PROJECT], depths=True)
+def create_targets(strategy, size, depth):
+    algorithm, securities = futures_algorithm(size) if strategy == FUTURES_PROJECT else equity_algorithm(size)
+    model = portfolio_model(strategy, algorithm, securities, depth)
+
+    def run():
+        force_rebalance(model)
+        return model.CreateTargets(algorithm, [])
+    return run
+
+
+@case('GetLastActiveInsights', list(EQUITY_PROJECTS) + [FUTURES_PROJECT], depths=True)
+def get_last_active_insights(strategy, size, depth):
+    algorithm, securities = futures_algorithm(size) if strategy == FUTURES_PROJECT else equity_algorithm(size)
+    model = portfolio_model(strategy, algorithm, securities, depth)
+    return lambda: model.GetLastActiveInsights(algorithm)
+
+
+@case('DetermineTargets', list(EQUITY_PROJECTS) + [FUTURES_PROJECT])
+def determine_targets(strategy, size, depth):
+    algorithm, securities = futures_algorithm(size) if strategy == FUTURES_PROJECT else equity_algorithm(size)
+    model = portfolio_model(strategy, algorithm, securities, 1)
+    lastActiveInsights = model.GetLastActiveInsights(algorithm)
+    if strategy == FUTURES_PROJECT:
+        return lambda: model.DeterminePortfolioTargets(algorithm, lastActiveInsights)
+    return lambda: model.DetermineTargetPercent(algorithm, lastActiveInsights)
+
+
+def alpha_fixture(size):
+    algorithm, securities = futures_algorithm(size)
+    alpha = project(FUTURES_PROJECT).alpha.EmaCrossoverAlphaModel()
+    alpha.OnSecuritiesChanged(algorithm, SecurityChanges(securities))
+    period = timedelta(minutes=1)
+    bars = {security.Symbol: Bar(security.Symbol, algorithm.Time - period, period, security.Price, security.Price, security.Price, security.Price)
+            for security in securities}
+    return algorithm, alpha, Slice(algorithm.Time, dict(bars), bars)
+
+
+@case('AlphaUpdate(daily evaluation)', [FUTURES_PROJECT])
+def alpha_update_evaluation(strategy, size, depth):
+    algorithm, alpha, data = alpha_fixture(size)
+
+    def run():
+        for hours in alpha.symbolsByHours:
+            alpha.OnMarketOpen(hours)
+        return alpha.Update(algorithm, data)
+    return run
+
+
+@case('AlphaUpdate(intraday slice)', [FUTURES_PROJECT])
+def alpha_update_intraday(strategy, size, depth):
+    algorithm, alpha, data = alpha_fixture(size)
+    alpha.Update(algorithm, data)
+    return lambda: alpha.Update(algorithm, data)
+
+
+# ------------------------------------------------------------------------------ runner
+
+def measure(function, repeat, budget):
+    function()
+    samples = []
+    deadline = timer.perf_counter() + budget
+    while len(samples) < repeat and (len(samples) < 3 or timer.perf_counter() < deadline):
+        started = timer.perf_counter()
+        function()
+        samples.append(timer.perf_counter() - started)
+    return samples
+
+
+def scaling_exponent(rows):
+    sizes = np.array([row['size'] for row in rows], dtype=float)
+    seconds = np.array([row['median'] for row in rows], dtype=float)
+    if len(rows) < 2 or np.any(seconds <= 0):
+        return None
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+
+def key(row):
+    return f"{row['case']}|{row['strategy']}|{row['size']}|{row['depth']}"
+
+
+def compare(results, baseline, threshold):
+    previous = {key(row): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        before = previous.get(key(row))
+        if before is None:
+            continue
+        change = row['opsPerSecond']/before['opsPerSecond'] - 1
+        row['throughputChange'] = change
+        if change < -threshold:
+            regressions.append((key(row), change))
+    return regressions
+
+
+def plot(results, path):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib is not installed, skipping scaling curves')
+        return
+    names = sorted({row['case'] for row in results})
+    fig, axes = plt.subplots(nrows=len(names), figsize=(10, 4*len(names)), squeeze=False)
+    for ax, name in zip(axes[:, 0], names):
+        series = sorted({(row['strategy'], row['depth']) for row in results if row['case'] == name})
+        for strategy, depth in series:
+            rows = sorted((row for row in results if row['case'] == name and row['strategy'] == strategy and row['depth'] == depth), key=lambda row: row['size'])
+            label = strategy if depth is None else f'{strategy}, {depth} insights/symbol'
+            ax.loglog([row['size'] for row in rows], [row['median']*1e3 for row in rows], marker='o', label=label)
+        ax.set_title(name)
+        ax.set_xlabel('universe size')
+        ax.set_ylabel('ms per call')
+        ax.grid(which='both', alpha=.3)
+        ax.legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f'scaling curves written to {path}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250, 1000, 4000, 10000])
+    parser.add_argument('--futures-sizes', type=int, nargs='+', default=[4, 16, 64, 256])
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--only', nargs='+', default=None, help='case names (prefix match)')
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--budget', type=float, default=2., help='max seconds spent per measurement')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--plot', default=None, help='write scaling curves to this PNG')
+    parser.add_argument('--baseline', default=None, help='previous --output file to compare against')
+    parser.add_argument('--threshold', type=float, default=.25, help='max tolerated relative throughput drop')
+    args = parser.parse_args(argv)
+
+    results = []
+    for spec in CASES:
+        if args.only and not any(spec['name'].startswith(prefix) for prefix in args.only):
+            continue
+        for strategy in spec['strategies']:
+            sizes = args.futures_sizes if strategy == FUTURES_PROJECT else args.sizes
+            for depth in (args.depths if spec['depths'] else [None]):
+                rows = []
+                for size in sizes:
+                    samples = measure(spec['setup'](strategy, size, depth or 1), args.repeat, args.budget)
+                    median = statistics.median(samples)
+                    row = {'case': spec['name'], 'strategy': strategy, 'size': size, 'depth': depth,
+                           'median': median, 'min': min(samples), 'samples': len(samples), 'opsPerSecond': 1/median}
+                    rows.append(row)
+                    print(f"{spec['name']:<32} {strategy:<28} n={size:<6} depth={depth or '-':<3} {median*1e3:>10.3f} ms")
+                exponent = scaling_exponent(rows)
+                for row in rows:
+                    row['scalingExponent'] = exponent
+                if exponent is not None:
+                    print(f"{'':<32} {'':<28} scaling ~ n^{exponent:.2f}")
+                results.extend(rows)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, change in regressions:
+            print(f'REGRESSION {name}: throughput {change:+.1%}')
+        status = 1 if regressions else 0
+
+    with open(args.output, 'w') as f:
+        json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                   'numpy': np.__version__, 'machine': platform.machine(), 'results': results}, f, indent=1)
+    print(f'results written to {args.output}')
+    if args.plot:
+        plot(results, args.plot)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
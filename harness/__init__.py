@@ -0,0 +1,10 @@
+''' Offline LEAN stand-in harness for the strategies under trading-algorithms/.
+
+    from harness import SyntheticMarket, load_project, run
+    market = SyntheticMarket(datetime(2015, 1, 1), datetime(2016, 1, 1), nEquities=2000)
+    result = run(load_project('Dividend-Growth'), market, resolution=Resolution.Daily)
+'''
+from .engine import Engine, run
+from .lean import Resolution
+from .loader import install, load_project, Project
+from .synthetic import SyntheticMarket
@@ -0,0 +1,41 @@
+''' python -m harness <project> [--start 2015-01-01] [--end 2016-01-01] [--equities 2000] [--resolution daily] [--param name=value ...] '''
+import argparse
+from datetime import datetime
+
+from . import Resolution, SyntheticMarket, load_project, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m harness', description='Run a strategy project against synthetic data.')
+    parser.add_argument('project', help='directory name under trading-algorithms/, e.g. Dividend-Growth')
+    parser.add_argument('--start', type=datetime.fromisoformat, default=None, help='defaults to the algorithm start date')
+    parser.add_argument('--end', type=datetime.fromisoformat, default=None, help='defaults to start + 1 year')
+    parser.add_argument('--equities', type=int, default=2000, help='coarse universe size')
+    parser.add_argument('--resolution', choices=[r.name.lower() for r in Resolution], default=None,
+                        help='cap every subscription at this resolution')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--logs', action='store_true', help='print the algorithm log')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE', help='algorithm parameter read with GetParameter')
+    args = parser.parse_args(argv)
+
+    project = load_project(args.project)
+    resolution = Resolution[args.resolution.capitalize()] if args.resolution else None
+
+    def configure(algorithm):
+        if args.start:
+            algorithm.SetStartDate(args.start)
+        if args.end:
+            algorithm.SetEndDate(args.end)
+
+    result = run(project, lambda start, end: SyntheticMarket(start, end, nEquities=args.equities, seed=args.seed),
+                 resolution=resolution, configure=configure, parameters=dict(param.split('=', 1) for param in args.param))
+    print(f'{project.name}: {len(result.days)} days, {result.insights} insights, {result.orders} orders, '
+          f'return {result.totalReturn:.2%}, sharpe {result.sharpe:.2f}, max drawdown {result.maxDrawdown:.2%}, '
+          f'{result.seconds:.1f}s')
+    if args.logs:
+        for time, message in result.logs:
+            print(f'{time:%Y-%m-%d %H:%M} {message}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,409 @@
+''' Minimal framework engine: owns the clock, runs universe selection, feeds bars and indicators,
+    fires scheduled events, routes insights through the alpha and portfolio construction models and
+    fills every target immediately at the current price.
+
+    It reproduces the call pattern LEAN imposes on the models (which is what the benchmarks and
+    sweeps need), not LEAN's fill, fee or margin modelling.
+'''
+import time as timer
+from datetime import datetime, timedelta
+from functools import partial
+from types import SimpleNamespace
+
+import numpy as np
+
+from .lean import (CONTRACT_MULTIPLIERS, Bar, MarketHours, OrderEvent, OrderStatus, PortfolioTarget, Resolution, ScheduledEvent,
+                   ScheduledUniverseSelectionModel, Security, SecurityChanges, SecurityType, Slice, Symbol, SymbolProperties, Universe)
+from .synthetic import MINUTES_PER_DAY
+
+
+class Subscription:
+    __slots__ = ('symbol', 'security', 'kind', 'column', 'resolution')
+
+    def __init__(self, symbol, security, kind, column, resolution):
+        self.symbol = symbol
+        self.security = security
+        self.kind = kind
+        self.column = column
+        self.resolution = resolution
+
+
+class Engine:
+
+    def __init__(self, algorithm, market, resolution=None, endDate=None):
+        ''' market is a SyntheticMarket, or a callable (start, end) -> SyntheticMarket invoked once Initialize
+            has set the start date. resolution, when given, caps every subscription at that resolution
+            (e.g. Daily for fast equity runs).
+        '''
+        self.algorithm = algorithm
+        self.marketFactory = None if hasattr(market, 'Instrument') else market
+        self.market = None if self.marketFactory else market
+        self.resolution = resolution
+        self.endDate = endDate
+        self.subscriptions = {}
+        self.pendingAdded = []
+        self.pendingRemoved = []
+        # universe (None for the user-defined one) -> {symbol: resolution}; removed members still held stay pending
+        self.universeMembers = {}
+        self.pendingMembers = {}
+        self.scheduledUniverses = []
+        self.dayIndex = None
+        self.orders = 0
+        self.insights = 0
+        self.equity = []
+        self.timings = {}
+        algorithm.Engine = self
+
+
+    # -------------------------------------------------------------------------- subscriptions
+
+    def SubscriptionResolution(self, resolution):
+        resolution = Resolution.Minute if resolution is None else resolution
+        return max(resolution, self.resolution) if self.resolution is not None else resolution
+
+
+    def AddSecurity(self, ticker, securityType, resolution=Resolution.Minute, symbol=None):
+        ''' QCAlgorithm.AddSecurity: the symbol joins the user-defined universe, at the finest resolution it was added with. '''
+        if symbol is None:
+            if securityType == SecurityType.Future:
+                symbol = Symbol(f'/{ticker}', securityType, datetime(1997, 9, 9), idTicker=ticker)
+            else:
+                symbol = Symbol(ticker, securityType)
+        resolution = min(resolution, self.universeMembers.get(None, {}).get(symbol, resolution))
+        return self.Join(None, symbol, resolution)
+
+
+    def RemoveSecurity(self, symbol):
+        ''' QCAlgorithm.RemoveSecurity: liquidates the holding and drops the symbol from the user-defined universe. '''
+        if self.algorithm.Portfolio[symbol].Invested:
+            self.Execute([PortfolioTarget(symbol, 0)])
+        if symbol in self.universeMembers.get(None, {}):
+            self.Leave(None, symbol)
+        return True
+
+
+    def Join(self, universe, symbol, resolution):
+        ''' Like LEAN, a symbol new to this universe is reported as added, whether or not another universe holds it. '''
+        members = self.universeMembers.setdefault(universe, {})
+        isNew = symbol not in members
+        members[symbol] = resolution
+        self.pendingMembers.get(universe, {}).pop(symbol, None)
+        security = self.Subscribe(symbol)
+        if isNew:
+            self.pendingAdded.append(security)
+        return security
+
+
+    def Leave(self, universe, symbol):
+        ''' Like LEAN, leaving any universe reports the symbol as removed, even while another universe holds it. A member
+            still invested is a pending removal: the universe keeps its subscription until the holding is flat.
+        '''
+        resolution = self.universeMembers[universe].pop(symbol)
+        if self.algorithm.Portfolio[symbol].Invested:
+            self.pendingMembers.setdefault(universe, {})[symbol] = resolution
+        self.pendingRemoved.append(self.algorithm.Securities[symbol])
+        self.Subscribe(symbol)
+
+
+    def Subscribe(self, symbol):
+        ''' Bring the symbol's subscription in line with the universes holding it, pending removals included: it streams
+            at the finest resolution any of them asks for, and stops once none is left.
+        '''
+        resolutions = [members[symbol] for universes in (self.universeMembers, self.pendingMembers)
+                       for members in universes.values() if symbol in members]
+        if not resolutions:
+            self.subscriptions.pop(symbol, None)
+            return self.algorithm.Securities.get(symbol)
+        resolution = self.SubscriptionResolution(min(resolutions))
+        subscription = self.subscriptions.get(symbol)
+        if subscription is not None:
+            subscription.resolution = resolution
+            return subscription.security
+        security = self.algorithm.Securities.get(symbol)
+        if security is None:
+            hours = MarketHours(regularMarketDuration=timedelta(minutes=MINUTES_PER_DAY))
+            security = Security(symbol, SymbolProperties(CONTRACT_MULTIPLIERS.get(symbol.ID.Symbol, 1)), hours)
+            self.algorithm.Securities[symbol] = security
+        subscription = Subscription(symbol, security, None, None, resolution)
+        self.subscriptions[symbol] = subscription
+        if self.market is not None:
+            self.Attach(subscription)
+        return security
+
+
+    def Attach(self, subscription):
+        subscription.kind, subscription.column = self.market.Instrument(subscription.symbol)
+        if self.dayIndex is not None:
+            self.UpdateFundamentals([subscription.security])
+            self.SeedPrice(subscription.security, subscription.kind, subscription.column)
+
+
+    def SeedPrice(self, security, kind, column):
+        security.SetMarketPrice(self.algorithm.Time, self.market.DailyClose(kind, column, max(self.dayIndex - 1, 0)))
+
+
+    def UpdateFundamentals(self, securities):
+        equities = [security for security in securities if security.Symbol.SecurityType == SecurityType.Equity]
+        if not equities:
+            return
+        for security, fine in zip(equities, self.market.Fine(self.dayIndex, [security.Symbol for security in equities])):
+            security.Fundamentals = fine
+
+
+    # -------------------------------------------------------------------------- history
+
+    def History(self, symbol, periods, resolution=Resolution.Daily):
+        ''' (endTime, close) pairs for the `periods` bars before the current time, oldest first. '''
+        kind, column = self.market.Instrument(symbol)
+        dayIndex = self.dayIndex if self.dayIndex is not None else self.market.DayIndex(self.algorithm.Time) or self.market.firstDayIndex
+        days = self.market.days
+        if resolution == Resolution.Daily:
+            first = max(0, dayIndex - periods)
+            closes = self.market.DailyClose(kind, column, slice(first, dayIndex))
+            return [(datetime.combine(days[i].astype(datetime), datetime.min.time()) + timedelta(hours=16), float(close))
+                    for i, close in zip(range(first, dayIndex), closes)]
+        step = 60 if resolution == Resolution.Hour else 1
+        barsPerDay = MINUTES_PER_DAY//step
+        nDays = -(-periods//barsPerDay)
+        history = []
+        for i in range(max(0, dayIndex - nDays), dayIndex):
+            closes = self.market.MinuteCloses(kind, [column], i)[step - 1::step, 0]
+            endTimes = self.market.MinuteEndTimes(days[i].astype(datetime))[step - 1::step]
+            history.extend(zip(endTimes, closes.tolist()))
+        return history[-periods:]
+
+
+    # -------------------------------------------------------------------------- run loop
+
+    def Run(self):
+        for day in self.Start():
+            self.RunDay(day)
+        return self.Finish()
+
+
+    def Start(self):
+        ''' Initialize the algorithm and return its trading days. Run steps through them one RunDay at
+            a time; a host running several engines side by side interleaves their days.
+        '''
+        algorithm = self.algorithm
+        started = timer.perf_counter()
+        algorithm.Initialize()
+        if self.market is None:
+            end = self.endDate or algorithm.EndDate or algorithm.StartDate.replace(year=algorithm.StartDate.year + 1)
+            self.market = self.marketFactory(algorithm.StartDate, end)
+            for subscription in self.subscriptions.values():
+                self.Attach(subscription)
+        self.scheduledUniverses = [ScheduledEvent('universe', model.dateRule, model.timeRule, partial(self.RunScheduledUniverse, model))
+                                   for model in algorithm.UniverseSelection if isinstance(model, ScheduledUniverseSelectionModel)]
+        end = self.endDate or algorithm.EndDate or self.market.end
+        self.timings['total'] = timer.perf_counter() - started
+        return self.market.TradingDays(algorithm.StartDate, end)
+
+
+    def RunDay(self, day):
+        algorithm = self.algorithm
+        started = timer.perf_counter()
+        self.dayIndex = self.market.DayIndex(day)
+        algorithm.SetTime(day)
+        self.ReleaseRemovedSecurities()
+        selected = {symbol for universe, members in self.universeMembers.items() if universe is not None for symbol in members}
+        self.UpdateFundamentals([security for security in algorithm.Securities.values() if security.Symbol in selected])
+        self.RunUniverseSelection()
+        self.RunSession(day)
+        self.equity.append((day, algorithm.Portfolio.TotalPortfolioValue))
+        self.timings['total'] += timer.perf_counter() - started
+
+
+    def Finish(self):
+        started = timer.perf_counter()
+        self.algorithm.OnEndOfAlgorithm()
+        self.timings['total'] += timer.perf_counter() - started
+        return self.Result()
+
+
+    def RunUniverseSelection(self):
+        algorithm = self.algorithm
+        for model in algorithm.UniverseSelection:
+            if isinstance(model, ScheduledUniverseSelectionModel):
+                continue
+            selected = model.SelectCoarse(algorithm, self.market.Coarse(self.dayIndex))
+            if selected is Universe.Unchanged:
+                continue
+            selected = list(selected)
+            if getattr(model, 'filterFineData', True):
+                selected = model.SelectFine(algorithm, self.market.Fine(self.dayIndex, selected))
+                if selected is Universe.Unchanged:
+                    continue
+            self.ApplyUniverse(model, selected)
+
+
+    def RunScheduledUniverse(self, model):
+        self.ApplyUniverse(model, model.selector(self.algorithm.Time))
+
+
+    def ApplyUniverse(self, model, selected):
+        settings = getattr(model, 'universeSettings', None) or self.algorithm.UniverseSettings
+        previous = self.universeMembers.get(model, {})
+        selected = dict.fromkeys(selected)
+        for symbol in [symbol for symbol in previous if symbol not in selected]:
+            self.Leave(model, symbol)
+        for symbol in selected:
+            self.Join(model, symbol, settings.Resolution)
+
+
+    def ReleaseRemovedSecurities(self):
+        # pending removals are released once the holding is flat, like LEAN's PendingRemovalsManager
+        for members in self.pendingMembers.values():
+            for symbol in [symbol for symbol in members if not self.algorithm.Portfolio[symbol].Invested]:
+                del members[symbol]
+                self.Subscribe(symbol)
+
+
+    def FlushSecurityChanges(self):
+        if not self.pendingAdded and not self.pendingRemoved:
+            return
+        changes = SecurityChanges(self.pendingAdded, self.pendingRemoved)
+        self.pendingAdded, self.pendingRemoved = [], []
+        algorithm = self.algorithm
+        for alpha in algorithm.Alphas:
+            alpha.OnSecuritiesChanged(algorithm, changes)
+        algorithm.PortfolioConstruction.OnSecuritiesChanged(algorithm, changes)
+        if hasattr(algorithm, 'OnSecuritiesChanged'):
+            algorithm.OnSecuritiesChanged(changes)
+
+
+    def SliceTimes(self, day):
+        ''' minute indexes (0-based) at which each resolution produces a bar. '''
+        resolutions = {subscription.resolution for subscription in self.subscriptions.values()}
+        steps = set()
+        if Resolution.Minute in resolutions or Resolution.Second in resolutions or Resolution.Tick in resolutions:
+            steps.update(range(MINUTES_PER_DAY))
+        if Resolution.Hour in resolutions:
+            steps.update(range(29, MINUTES_PER_DAY, 60))
+        steps.add(MINUTES_PER_DAY - 1)
+        return sorted(steps)
+
+
+    def RunSession(self, day):
+        algorithm = self.algorithm
+        market = self.market
+        self.FlushSecurityChanges()
+        endTimes = market.MinuteEndTimes(day)
+        events = sorted(((event.TimeOn(day), i, event) for i, event in enumerate(algorithm.Schedule.events + self.scheduledUniverses)
+                         if event.Enabled and event.TimeOn(day) is not None), key=lambda item: item[:2])
+        # events before the open run first, so subscription changes they make apply to this session
+        nextEvent = 0
+        while nextEvent < len(events) and events[nextEvent][0] < endTimes[0] - timedelta(minutes=1):
+            events[nextEvent][2].callback()
+            nextEvent += 1
+        self.FlushSecurityChanges()
+        closesByKind = {}
+        groups = {}
+        for subscription in self.subscriptions.values():
+            groups.setdefault(subscription.kind, []).append(subscription)
+        for kind, subscriptions in groups.items():
+            intraday = [s for s in subscriptions if s.resolution < Resolution.Daily]
+            if intraday:
+                closesByKind[kind] = (intraday, market.MinuteCloses(kind, [s.column for s in intraday], self.dayIndex))
+        dailyCloses = {kind: market.DailyClose(kind, [s.column for s in subscriptions], self.dayIndex).tolist() for kind, subscriptions in groups.items()}
+        minute = timedelta(minutes=1)
+        for m in self.SliceTimes(day):
+            now = endTimes[m]
+            algorithm.SetTime(now)
+            bars, quoteBars = {}, {}
+            for kind, subscriptions in groups.items():
+                intraday, closes = closesByKind.get(kind, ((), None))
+                if intraday:
+                    row = closes[m].tolist()
+                    for subscription, close in zip(intraday, row):
+                        if subscription.resolution == Resolution.Hour and (m + 1) % 60 != 30 and m != MINUTES_PER_DAY - 1:
+                            continue
+                        self.OnBar(subscription, now, minute, close, bars, quoteBars)
+                if m == MINUTES_PER_DAY - 1:
+                    for subscription, close in zip(subscriptions, dailyCloses[kind]):
+                        if subscription.resolution == Resolution.Daily:
+                            self.OnBar(subscription, now, timedelta(hours=6, minutes=30), close, bars, quoteBars)
+            while nextEvent < len(events) and events[nextEvent][0] <= now:
+                events[nextEvent][2].callback()
+                nextEvent += 1
+            self.FlushSecurityChanges()
+            data = Slice(now, bars, quoteBars)
+            if hasattr(algorithm, 'OnData'):
+                algorithm.OnData(data)
+            self.Step(data)
+
+
+    def OnBar(self, subscription, endTime, period, close, bars, quoteBars):
+        security = subscription.security
+        security.SetMarketPrice(endTime, close)
+        bar = Bar(subscription.symbol, endTime - period, period, close, close, close, close)
+        bars[subscription.symbol] = bar
+        if subscription.kind == 'future':
+            quoteBars[subscription.symbol] = bar
+        for indicator in self.algorithm.Indicators.get(subscription.symbol, ()):
+            indicator.Update(endTime, close)
+        for consolidator in self.algorithm.SubscriptionManager.consolidators.get(subscription.symbol, ()):
+            consolidator.Update(bar)
+
+
+    def Step(self, data):
+        algorithm = self.algorithm
+        insights = []
+        for alpha in algorithm.Alphas:
+            for insight in alpha.Update(algorithm, data) or ():
+                if insight.SourceModel is None:
+                    insight.SourceModel = alpha.Name
+                insights.append(insight)
+        if algorithm.EmittedInsights:
+            insights.extend(algorithm.EmittedInsights)
+            algorithm.EmittedInsights = []
+        for insight in insights:
+            insight.SetPeriodAndCloseTime(algorithm.UtcTime)
+        self.insights += len(insights)
+        targets = algorithm.PortfolioConstruction.CreateTargets(algorithm, insights)
+        self.Execute(targets)
+
+
+    def Execute(self, targets):
+        algorithm = self.algorithm
+        for target in targets:
+            if target is None:
+                continue
+            security = algorithm.Securities[target.Symbol]
+            quantity = int(target.Quantity) - algorithm.Portfolio[target.Symbol].Quantity
+            if quantity == 0 or not security.HasData:
+                continue
+            algorithm.Portfolio.Fill(target.Symbol, quantity, security.Price)
+            self.orders += 1
+            algorithm.OnOrderEvent(OrderEvent(target.Symbol, quantity, security.Price, OrderStatus.Filled, algorithm.UtcTime))
+
+
+    def Result(self):
+        days = np.array([day for day, _ in self.equity], dtype='datetime64[D]')
+        equity = np.array([value for _, value in self.equity], dtype=float)
+        returns = np.diff(equity)/equity[:-1] if len(equity) > 1 else np.zeros(0)
+        sharpe = float(np.sqrt(252)*returns.mean()/returns.std()) if len(returns) > 1 and returns.std() > 0 else 0.
+        drawdown = float((1 - equity/np.maximum.accumulate(equity)).max()) if len(equity) else 0.
+        return SimpleNamespace(days=days, equity=equity, orders=self.orders, insights=self.insights,
+                               totalReturn=float(equity[-1]/equity[0] - 1) if len(equity) else 0.,
+                               sharpe=sharpe, maxDrawdown=drawdown, seconds=self.timings['total'], logs=self.algorithm.Logs)
+
+
+def run(project, market, resolution=None, endDate=None, configure=None, parameters=None):
+    ''' Instantiate the project's algorithm with the given GetParameter values, optionally tweak it after Initialize, and run it. '''
+    return prepare(project, market, resolution, endDate, configure, parameters).Run()
+
+
+def prepare(project, market, resolution=None, endDate=None, configure=None, parameters=None):
+    ''' The engine run() uses, before it has started. '''
+    algorithm = project.Algorithm()
+    algorithm.Parameters = {name: str(value) for name, value in (parameters or {}).items()}
+    engine = Engine(algorithm, market, resolution, endDate)
+    if configure is not None:
+        initialize = algorithm.Initialize
+
+        def Initialize():
+            initialize()
+            configure(algorithm)
+        algorithm.Initialize = Initialize
+    return engine
@@ -0,0 +1,73 @@
+''' Several strategy projects in one process, stepped through the same SyntheticMarket day by day.
+
+    python -m harness.host Dividend-Growth Rule-of-40-with-SaaS [--start 2015-01-01] [--end 2016-01-01]
+                           [--equities 2000] [--resolution daily] [--param name=value ...]
+
+    Every selection model with a CoarseSelectionStage (its coarseSelection) is registered with one
+    CoarseFilterCache, so on a day several strategies select, the coarse pass runs once and the other
+    models get its result; the cached result is released once every model has taken it.
+'''
+import argparse
+from datetime import datetime
+
+from .engine import prepare
+from .lean import Resolution
+from .loader import load_project
+from .synthetic import SyntheticMarket
+
+
+def share_coarse_filter(engines, projects):
+    caches = [project.coarse.CoarseFilterCache for project in projects if 'coarse' in project.modules]
+    if not caches:
+        return None
+    cache = caches[0]()
+    for engine in engines:
+        for model in engine.algorithm.UniverseSelection:
+            if hasattr(model, 'coarseSelection'):
+                cache.Register(model.coarseSelection)
+    return cache
+
+
+def run_together(projects, market, resolution=None, configure=None, parameters=None):
+    ''' Run the projects side by side on market; returns their results, in order, and the shared coarse filter cache. '''
+    engines = [prepare(project, market, resolution, configure=configure, parameters=parameters) for project in projects]
+    daysByEngine = [set(engine.Start()) for engine in engines]
+    cache = share_coarse_filter(engines, projects)
+    for day in sorted(set().union(*daysByEngine)):
+        for engine, days in zip(engines, daysByEngine):
+            if day in days:
+                engine.RunDay(day)
+    return [engine.Finish() for engine in engines], cache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m harness.host', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('projects', nargs='+', help='directory names under trading-algorithms/')
+    parser.add_argument('--start', type=datetime.fromisoformat, default=datetime(2015, 1, 1))
+    parser.add_argument('--end', type=datetime.fromisoformat, default=datetime(2016, 1, 1))
+    parser.add_argument('--equities', type=int, default=2000, help='coarse universe size')
+    parser.add_argument('--resolution', choices=[r.name.lower() for r in Resolution], default=None,
+                        help='cap every subscription at this resolution')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE', help='algorithm parameter read with GetParameter, for every project')
+    args = parser.parse_args(argv)
+
+    projects = [load_project(name) for name in args.projects]
+    resolution = Resolution[args.resolution.capitalize()] if args.resolution else None
+    market = SyntheticMarket(args.start, args.end, nEquities=args.equities, seed=args.seed)
+
+    def configure(algorithm):
+        algorithm.SetStartDate(args.start)
+        algorithm.SetEndDate(args.end)
+
+    results, cache = run_together(projects, market, resolution, configure, dict(param.split('=', 1) for param in args.param))
+    for project, result in zip(projects, results):
+        print(f'{project.name}: {len(result.days)} days, {result.insights} insights, {result.orders} orders, '
+              f'return {result.totalReturn:.2%}, sharpe {result.sharpe:.2f}, max drawdown {result.maxDrawdown:.2%}, '
+              f'{result.seconds:.1f}s')
+    if cache is not None:
+        print(f'coarse filter: {cache.misses} passes, {cache.hits} served from the shared cache, {len(cache.results)} results held')
+
+
+if __name__ == '__main__':
+    main()
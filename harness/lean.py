@@ -0,0 +1,918 @@
+''' Pure-Python stand-ins for the LEAN types the strategies under trading-algorithms/ rely on.
+
+    Only the members the strategies actually touch are implemented, with LEAN's naming so the
+    strategy modules run unchanged once these names are installed as globals (see harness.loader).
+'''
+import hashlib
+import math
+from collections import defaultdict
+from datetime import datetime, time as dtime, timedelta
+from enum import IntEnum
+from types import SimpleNamespace
+import itertools
+import uuid
+
+import pytz
+
+
+NEW_YORK = pytz.timezone('America/New_York')
+
+
+def to_utc(time):
+    return NEW_YORK.localize(time).astimezone(pytz.utc)
+
+
+# ----------------------------------------------------------------------------- enums and helpers
+
+class Resolution(IntEnum):
+    Tick = 0
+    Second = 1
+    Minute = 2
+    Hour = 3
+    Daily = 4
+
+
+class Extensions:
+
+    @staticmethod
+    def ToTimeSpan(resolution):
+        return {Resolution.Tick: timedelta(0), Resolution.Second: timedelta(seconds=1), Resolution.Minute: timedelta(minutes=1),
+                Resolution.Hour: timedelta(hours=1), Resolution.Daily: timedelta(days=1)}[resolution]
+
+
+class InsightDirection(IntEnum):
+    Down = -1
+    Flat = 0
+    Up = 1
+
+
+class InsightType(IntEnum):
+    Price = 0
+    Volatility = 1
+
+
+class SecurityType(IntEnum):
+    Equity = 1
+    Index = 2
+    Future = 3
+
+
+class OrderStatus(IntEnum):
+    Submitted = 1
+    PartiallyFilled = 2
+    Filled = 3
+
+
+class SeriesType(IntEnum):
+    Line = 0
+    Scatter = 1
+
+
+class DataNormalizationMode(IntEnum):
+    Raw = 0
+    Adjusted = 1
+    BackwardsRatio = 4
+
+
+class DataMappingMode(IntEnum):
+    LastTradingDay = 0
+    FirstDayMonth = 1
+    OpenInterest = 2
+
+
+class Futures:
+    Metals = SimpleNamespace(Gold='GC')
+    Energies = SimpleNamespace(CrudeOilWTI='CL')
+    Indices = SimpleNamespace(SP500EMini='ES')
+    Currencies = SimpleNamespace(BTC='BTC')
+
+
+CONTRACT_MULTIPLIERS = {'GC': 100, 'CL': 1000, 'ES': 50, 'BTC': 5}
+FUTURE_MARKETS = {'GC': 'comex', 'CL': 'nymex', 'ES': 'cme', 'BTC': 'cme'}
+
+
+class Expiry:
+
+    @staticmethod
+    def EndOfMonth(time):
+        return datetime(time.year + time.month//12, time.month % 12 + 1, 1)
+
+    @staticmethod
+    def EndOfDay(time):
+        return datetime(time.year, time.month, time.day) + timedelta(1)
+
+
+class Universe:
+    Unchanged = object()
+
+
+# ----------------------------------------------------------------------------- symbols and securities
+
+class SecurityIdentifier:
+    __slots__ = ('Symbol', 'SecurityType', 'Date', 'Market', '_string')
+
+    def __init__(self, ticker, securityType, listingDate, market=None):
+        self.Symbol = ticker
+        self.SecurityType = securityType
+        self.Date = listingDate
+        self.Market = market or (FUTURE_MARKETS.get(ticker, 'cme') if securityType == SecurityType.Future else 'usa')
+        code = hashlib.blake2b(f'{ticker}|{int(securityType)}|{listingDate:%Y%m%d}'.encode(), digest_size=6).hexdigest().upper()
+        self._string = f'{ticker} {code}'
+
+    def ToString(self):
+        return self._string
+
+    __str__ = ToString
+
+    def __repr__(self):
+        return self._string
+
+
+class Symbol:
+    __slots__ = ('Value', 'ID', 'SecurityType', '_hash')
+
+    def __init__(self, ticker, securityType=SecurityType.Equity, listingDate=datetime(1998, 1, 2), idTicker=None):
+        self.Value = ticker
+        self.ID = SecurityIdentifier(idTicker or ticker, securityType, listingDate)
+        self.SecurityType = securityType
+        self._hash = hash(self.ID.ToString())
+        SymbolCache.Set(self)
+
+    @staticmethod
+    def Create(ticker, securityType=SecurityType.Equity, listingDate=datetime(1998, 1, 2), idTicker=None):
+        return Symbol(ticker, securityType, listingDate, idTicker)
+
+    # the harness trades futures on their continuous symbol, it has no contract symbols
+    @property
+    def Canonical(self):
+        return self
+
+    def IsCanonical(self):
+        return self.SecurityType == SecurityType.Future
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, Symbol) and other.ID.ToString() == self.ID.ToString()
+
+    def __lt__(self, other):
+        return self.ID.ToString() < other.ID.ToString()
+
+    def __str__(self):
+        return self.Value
+
+    def __repr__(self):
+        return self.Value
+
+
+class SymbolCache:
+    symbols = {}
+
+    @classmethod
+    def Set(cls, symbol):
+        cls.symbols[symbol.ID.ToString()] = symbol
+        cls.symbols.setdefault(symbol.Value, symbol)
+
+    @classmethod
+    def GetSymbol(cls, key):
+        return cls.symbols[key]
+
+
+class MarketHours:
+
+    def __init__(self, regularMarketDuration=timedelta(hours=6, minutes=30), open=dtime(9, 30), close=dtime(16, 0)):
+        self.RegularMarketDuration = regularMarketDuration
+        self.MarketOpen = open
+        self.MarketClose = close
+
+    def GetNextMarketOpen(self, localDateTime, extendedMarketHours=False):
+        day = localDateTime.date()
+        while day.weekday() >= 5 or datetime.combine(day, self.MarketOpen) < localDateTime:
+            day += timedelta(1)
+        return datetime.combine(day, self.MarketOpen)
+
+    def GetNextMarketClose(self, localDateTime, extendedMarketHours=False):
+        day = localDateTime.date()
+        while day.weekday() >= 5 or datetime.combine(day, self.MarketClose) <= localDateTime:
+            day += timedelta(1)
+        return datetime.combine(day, self.MarketClose)
+
+
+class SymbolProperties:
+
+    def __init__(self, contractMultiplier=1):
+        self.ContractMultiplier = contractMultiplier
+
+
+class Security:
+
+    def __init__(self, symbol, symbolProperties=None, hours=None, fundamentals=None):
+        self.Symbol = symbol
+        self.SymbolProperties = symbolProperties or SymbolProperties()
+        self.Exchange = SimpleNamespace(Hours=hours or MarketHours())
+        self.Fundamentals = fundamentals
+        self.Price = 0.
+        self.Close = 0.
+        self.HasData = False
+        self.LocalTime = None
+        self.Holdings = None
+
+    def SetMarketPrice(self, time, price):
+        self.LocalTime = time
+        self.Price = self.Close = float(price)
+        self.HasData = True
+
+
+class SecurityChanges:
+
+    def __init__(self, added=(), removed=()):
+        self.AddedSecurities = list(added)
+        self.RemovedSecurities = list(removed)
+
+    @property
+    def Count(self):
+        return len(self.AddedSecurities) + len(self.RemovedSecurities)
+
+
+class SecurityHolding:
+
+    def __init__(self, security):
+        self.Security = security
+        self.Symbol = security.Symbol
+        self.Quantity = 0
+        self.AveragePrice = 0.
+
+    @property
+    def Invested(self):
+        return self.Quantity != 0
+
+    @property
+    def IsLong(self):
+        return self.Quantity > 0
+
+    @property
+    def IsShort(self):
+        return self.Quantity < 0
+
+    @property
+    def HoldingsValue(self):
+        return self.Quantity*self.Security.Price*self.Security.SymbolProperties.ContractMultiplier
+
+    @property
+    def AbsoluteHoldingsValue(self):
+        return abs(self.HoldingsValue)
+
+
+class SecurityManager(dict):
+
+    def __missing__(self, symbol):
+        raise KeyError(f'{symbol} was not added to the algorithm')
+
+
+class SecurityPortfolioManager(dict):
+    ''' symbol -> SecurityHolding, plus cash bookkeeping for immediate fills. '''
+
+    def __init__(self, securities):
+        super().__init__()
+        self.securities = securities
+        self.Cash = 0.
+
+    def __missing__(self, symbol):
+        holding = SecurityHolding(self.securities[symbol])
+        self[symbol] = holding
+        return holding
+
+    @property
+    def TotalPortfolioValue(self):
+        return self.Cash + sum(holding.HoldingsValue for holding in self.values())
+
+    @property
+    def TotalHoldingsValue(self):
+        return sum(holding.AbsoluteHoldingsValue for holding in self.values())
+
+    @property
+    def Invested(self):
+        return any(holding.Invested for holding in self.values())
+
+    def Fill(self, symbol, quantity, price):
+        holding = self[symbol]
+        multiplier = holding.Security.SymbolProperties.ContractMultiplier
+        self.Cash -= quantity*price*multiplier
+        newQuantity = holding.Quantity + quantity
+        if newQuantity == 0:
+            holding.AveragePrice = 0.
+        elif holding.Quantity == 0 or (holding.Quantity > 0) == (quantity > 0):
+            holding.AveragePrice = (holding.AveragePrice*holding.Quantity + price*quantity)/newQuantity
+        holding.Quantity = newQuantity
+
+
+# ----------------------------------------------------------------------------- fundamentals
+
+class CoarseFundamental:
+    __slots__ = ('Symbol', 'Price', 'Volume', 'DollarVolume', 'HasFundamentalData')
+
+    def __init__(self, symbol, price, volume, hasFundamentalData):
+        self.Symbol = symbol
+        self.Price = price
+        self.Volume = volume
+        self.DollarVolume = price*volume
+        self.HasFundamentalData = hasFundamentalData
+
+
+class FineFundamental:
+
+    def __init__(self, symbol, marketCap, expectedDividendGrowthRate, fcfYield, revenueGrowth, industryCode, companyName=''):
+        self.Symbol = symbol
+        self.MarketCap = marketCap
+        self.ValuationRatios = SimpleNamespace(ExpectedDividendGrowthRate=expectedDividendGrowthRate, FCFYield=fcfYield)
+        self.OperationRatios = SimpleNamespace(RevenueGrowth=SimpleNamespace(Value=revenueGrowth))
+        self.AssetClassification = SimpleNamespace(MorningstarIndustryCode=industryCode)
+        self.CompanyReference = SimpleNamespace(StandardName=companyName)
+
+
+# ----------------------------------------------------------------------------- data
+
+class Bar:
+    __slots__ = ('Symbol', 'Time', 'EndTime', 'Open', 'High', 'Low', 'Close', 'Volume')
+
+    def __init__(self, symbol, time, period, open, high, low, close, volume=0):
+        self.Symbol = symbol
+        self.Time = time
+        self.EndTime = time + period
+        self.Open, self.High, self.Low, self.Close, self.Volume = open, high, low, close, volume
+
+    @property
+    def Value(self):
+        return self.Close
+
+    @property
+    def Period(self):
+        return self.EndTime - self.Time
+
+
+TradeBar = QuoteBar = Bar
+
+
+class DataConsolidatedHandler:
+    ''' C# event stand-in: handlers attach with += and detach with -=. '''
+
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+        return self
+
+    def __call__(self, sender, bar):
+        for handler in list(self.handlers):
+            handler(sender, bar)
+
+
+class BarConsolidator:
+    ''' Period consolidator: bars are bucketed by their start time rounded down to the period and a
+        bucket is emitted as soon as a bar reaches its end (LEAN emits on its end-of-period scan). '''
+
+    def __init__(self, period):
+        self.Period = period
+        self.DataConsolidated = DataConsolidatedHandler()
+        self.Consolidated = None
+        self.workingBar = None
+
+    def Update(self, bar):
+        working = self.workingBar
+        if working is not None and bar.Time >= working.EndTime:
+            self.Emit()
+            working = None
+        if working is None:
+            start = datetime.min + (bar.Time - datetime.min)//self.Period*self.Period
+            self.workingBar = working = Bar(bar.Symbol, start, self.Period, bar.Open, bar.High, bar.Low, bar.Close, bar.Volume)
+        else:
+            working.High = max(working.High, bar.High)
+            working.Low = min(working.Low, bar.Low)
+            working.Close = bar.Close
+            working.Volume += bar.Volume
+        if bar.EndTime >= working.EndTime:
+            self.Emit()
+
+    def Emit(self):
+        self.Consolidated, self.workingBar = self.workingBar, None
+        self.DataConsolidated(self, self.Consolidated)
+
+
+TradeBarConsolidator = QuoteBarConsolidator = BarConsolidator
+
+
+class SubscriptionManager:
+
+    def __init__(self):
+        self.consolidators = defaultdict(list)
+
+    def AddConsolidator(self, symbol, consolidator):
+        self.consolidators[symbol].append(consolidator)
+
+    def RemoveConsolidator(self, symbol, consolidator):
+        if consolidator in self.consolidators.get(symbol, ()):
+            self.consolidators[symbol].remove(consolidator)
+
+
+class Slice:
+
+    def __init__(self, time, bars=None, quoteBars=None):
+        self.Time = time
+        self.Bars = bars or {}
+        self.QuoteBars = quoteBars or {}
+
+    def ContainsKey(self, symbol):
+        return symbol in self.Bars or symbol in self.QuoteBars
+
+    def __contains__(self, symbol):
+        return self.ContainsKey(symbol)
+
+    def __getitem__(self, symbol):
+        return self.Bars.get(symbol) or self.QuoteBars[symbol]
+
+
+# ----------------------------------------------------------------------------- indicators
+
+class IndicatorDataPoint:
+    __slots__ = ('Time', 'Value')
+
+    def __init__(self, time=None, value=0.):
+        self.Time = time
+        self.Value = value
+
+
+class ExponentialMovingAverage:
+
+    def __init__(self, name, period, smoothingFactor=None):
+        self.Name = name
+        self.Period = period
+        self.WarmUpPeriod = period
+        self.k = smoothingFactor if smoothingFactor is not None else 2/(period + 1)
+        self.Samples = 0
+        self.Current = IndicatorDataPoint()
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.Period
+
+    def Update(self, time, value):
+        self.Samples += 1
+        if self.Samples == 1:
+            self.Current = IndicatorDataPoint(time, value)
+        else:
+            self.Current = IndicatorDataPoint(time, value*self.k + self.Current.Value*(1 - self.k))
+        return self.IsReady
+
+    def Reset(self):
+        self.Samples = 0
+        self.Current = IndicatorDataPoint()
+
+
+# ----------------------------------------------------------------------------- insights and targets
+
+class Insight:
+    _sequence = itertools.count()
+
+    def __init__(self, symbol, period, type, direction, magnitude=None, confidence=None, sourceModel=None, weight=None):
+        self.Id = uuid.UUID(int=next(Insight._sequence))
+        self.Symbol = symbol
+        self.Period = period
+        self.Type = type
+        self.Direction = direction
+        self.Magnitude = magnitude
+        self.Confidence = confidence
+        self.Weight = weight
+        self.SourceModel = sourceModel
+        self.GeneratedTimeUtc = None
+        self.CloseTimeUtc = None
+
+    @staticmethod
+    def Price(symbol, period, direction, magnitude=None, confidence=None, sourceModel=None, weight=None):
+        return Insight(symbol, period, InsightType.Price, direction, magnitude, confidence, sourceModel, weight)
+
+    def SetPeriodAndCloseTime(self, generatedTimeUtc):
+        self.GeneratedTimeUtc = generatedTimeUtc
+        self.CloseTimeUtc = generatedTimeUtc + self.Period
+
+    def IsExpired(self, utcTime):
+        return self.CloseTimeUtc < utcTime
+
+    def IsActive(self, utcTime):
+        return not self.IsExpired(utcTime)
+
+    def __repr__(self):
+        return f'Insight({self.Symbol}, {self.Direction.name}, {self.GeneratedTimeUtc} -> {self.CloseTimeUtc})'
+
+
+class InsightCollection:
+    ''' LEAN's InsightCollection semantics, kept as the reference for the portfolio models' own insight store. '''
+
+    def __init__(self):
+        self.insights = defaultdict(list)
+
+    def __len__(self):
+        return sum(len(insights) for insights in self.insights.values())
+
+    def Add(self, insight):
+        self.insights[insight.Symbol].append(insight)
+
+    def AddRange(self, insights):
+        for insight in insights:
+            self.Add(insight)
+
+    def Clear(self, symbols):
+        for symbol in symbols:
+            self.insights.pop(symbol, None)
+
+    def RemoveExpiredInsights(self, utcTime):
+        removed = []
+        for symbol in list(self.insights):
+            insights = self.insights[symbol]
+            removed.extend(insight for insight in insights if insight.IsExpired(utcTime))
+            insights[:] = [insight for insight in insights if not insight.IsExpired(utcTime)]
+            if not insights:
+                del self.insights[symbol]
+        return removed
+
+    def HasActiveInsights(self, symbol, utcTime):
+        return any(insight.IsActive(utcTime) for insight in self.insights.get(symbol, ()))
+
+    def GetActiveInsights(self, utcTime):
+        return [insight for insights in self.insights.values() for insight in insights if insight.IsActive(utcTime)]
+
+    def GetNextExpiryTime(self):
+        closeTimes = [insight.CloseTimeUtc for insights in self.insights.values() for insight in insights]
+        return min(closeTimes) if closeTimes else None
+
+
+class PortfolioTarget:
+    __slots__ = ('Symbol', 'Quantity')
+
+    def __init__(self, symbol, quantity):
+        self.Symbol = symbol
+        self.Quantity = quantity
+
+    @staticmethod
+    def Percent(algorithm, symbol, percent):
+        security = algorithm.Securities[symbol]
+        unitValue = security.Price*security.SymbolProperties.ContractMultiplier
+        if unitValue <= 0:
+            return None
+        investable = algorithm.Portfolio.TotalPortfolioValue*(1 - algorithm.Settings.FreePortfolioValuePercentage)
+        return PortfolioTarget(symbol, math.trunc(float(percent)*investable/unitValue))
+
+    def __repr__(self):
+        return f'PortfolioTarget({self.Symbol}, {self.Quantity})'
+
+
+class OrderEvent:
+    __slots__ = ('Symbol', 'FillQuantity', 'FillPrice', 'Status', 'UtcTime')
+
+    def __init__(self, symbol, fillQuantity, fillPrice, status, utcTime):
+        self.Symbol = symbol
+        self.FillQuantity = fillQuantity
+        self.FillPrice = fillPrice
+        self.Status = status
+        self.UtcTime = utcTime
+
+
+# ----------------------------------------------------------------------------- framework models
+
+class AlphaModel:
+
+    @property
+    def Name(self):
+        return type(self).__name__
+
+    def Update(self, algorithm, data):
+        return []
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+class ConstantAlphaModel(AlphaModel):
+
+    def __init__(self, type, direction, period, magnitude=None, confidence=None):
+        self.type = type
+        self.direction = direction
+        self.period = period
+        self.securities = {}
+        self.insightsTimeBySymbol = {}
+
+    def Update(self, algorithm, data):
+        insights = []
+        for symbol, security in self.securities.items():
+            if security.HasData and self.ShouldEmitInsight(algorithm.UtcTime, symbol):
+                insights.append(Insight(symbol, self.period, self.type, self.direction))
+        return insights
+
+    def ShouldEmitInsight(self, utcTime, symbol):
+        generatedTimeUtc = self.insightsTimeBySymbol.get(symbol)
+        if generatedTimeUtc is not None and utcTime - generatedTimeUtc < self.period:
+            return False
+        self.insightsTimeBySymbol[symbol] = utcTime
+        return True
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        for security in changes.AddedSecurities:
+            self.securities[security.Symbol] = security
+        for security in changes.RemovedSecurities:
+            self.securities.pop(security.Symbol, None)
+            self.insightsTimeBySymbol.pop(security.Symbol, None)
+
+
+class PortfolioConstructionModel:
+
+    def CreateTargets(self, algorithm, insights):
+        return []
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+class FundamentalUniverseSelectionModel:
+
+    def __init__(self, filterFineData=True, universeSettings=None):
+        self.filterFineData = filterFineData
+        self.universeSettings = universeSettings
+
+    def SelectCoarse(self, algorithm, coarse):
+        return [c.Symbol for c in coarse]
+
+    def SelectFine(self, algorithm, fine):
+        return [f.Symbol for f in fine]
+
+
+class ScheduledUniverseSelectionModel:
+    ''' The engine calls selector(algorithm time) at the scheduled times; its symbols are the universe until the next call. '''
+
+    def __init__(self, dateRule, timeRule, selector, universeSettings=None):
+        self.dateRule = dateRule
+        self.timeRule = timeRule
+        self.selector = selector
+        self.universeSettings = universeSettings
+
+
+# ----------------------------------------------------------------------------- scheduling and charts
+
+class ScheduledEvent:
+
+    def __init__(self, name, dateRule, timeRule, callback):
+        self.Name = name
+        self.dateRule = dateRule
+        self.timeRule = timeRule
+        self.callback = callback
+        self.Enabled = True
+
+    def TimeOn(self, day):
+        if not self.dateRule(day):
+            return None
+        return datetime.combine(day, dtime()) + self.timeRule
+
+
+class ScheduleManager:
+
+    def __init__(self):
+        self.events = []
+
+    def On(self, dateRule, timeRule, callback):
+        event = ScheduledEvent(getattr(callback, '__name__', 'event'), dateRule, timeRule, callback)
+        self.events.append(event)
+        return event
+
+    def Remove(self, event):
+        if event in self.events:
+            self.events.remove(event)
+
+
+class DateRules:
+
+    def EveryDay(self, symbol=None):
+        return lambda day: day.weekday() < 5
+
+
+
+class TimeRules:
+
+    def At(self, hour, minute=0, second=0):
+        return timedelta(hours=hour, minutes=minute, seconds=second)
+
+    def AfterMarketOpen(self, symbol=None, minutesAfterOpen=0):
+        return timedelta(hours=9, minutes=30 + minutesAfterOpen)
+
+    def BeforeMarketClose(self, symbol=None, minutesBeforeClose=0):
+        return timedelta(hours=16, minutes=-minutesBeforeClose)
+
+    @property
+    def Midnight(self):
+        return timedelta(0)
+
+
+class Series:
+
+    def __init__(self, name, seriesType=SeriesType.Line, unit='$'):
+        self.Name = name
+        self.SeriesType = seriesType
+        self.Unit = unit
+        self.Values = []
+
+    def AddPoint(self, time, value):
+        self.Values.append((time, float(value)))
+
+
+class Chart:
+
+    def __init__(self, name):
+        self.Name = name
+        self.Series = {}
+
+    def AddSeries(self, series):
+        self.Series[series.Name] = series
+
+
+class ObjectStore(dict):
+
+    def Save(self, key, value):
+        self[key] = value
+        return True
+
+    def SaveBytes(self, key, value):
+        self[key] = bytes(value)
+        return True
+
+    def Read(self, key):
+        return self[key]
+
+    def ReadBytes(self, key):
+        return self[key]
+
+    def ContainsKey(self, key):
+        return key in self
+
+    def Delete(self, key):
+        return self.pop(key, None) is not None
+
+    def GetFilePath(self, key):
+        return key
+
+    @property
+    def Keys(self):
+        return list(self)
+
+
+# ----------------------------------------------------------------------------- algorithm
+
+class AlgorithmSettings:
+
+    def __init__(self):
+        self.RebalancePortfolioOnInsightChanges = True
+        self.RebalancePortfolioOnSecurityChanges = True
+        self.FreePortfolioValuePercentage = .0025
+        self.EnableAutomaticIndicatorWarmUp = False
+
+
+class UniverseSettings:
+
+    def __init__(self, universeSettings=None):
+        self.Resolution = universeSettings.Resolution if universeSettings is not None else Resolution.Minute
+
+
+class QCAlgorithm:
+    ''' Framework-algorithm stand-in. The harness engine owns the clock, data and fills. '''
+
+    def __init__(self):
+        self.Securities = SecurityManager()
+        self.Portfolio = SecurityPortfolioManager(self.Securities)
+        self.Settings = AlgorithmSettings()
+        self.UniverseSettings = UniverseSettings()
+        self.Schedule = ScheduleManager()
+        self.DateRules = DateRules()
+        self.TimeRules = TimeRules()
+        self.ObjectStore = ObjectStore()
+        self.StartDate = datetime(2010, 1, 1)
+        self.EndDate = None
+        self.Time = self.StartDate
+        self.UtcTime = to_utc(self.Time)
+        self.UniverseSelection = []
+        self.Alphas = []
+        self.PortfolioConstruction = PortfolioConstructionModel()
+        self.Benchmark = None
+        self.Charts = {}
+        self.Logs = []
+        self.Parameters = {}
+        self.Indicators = defaultdict(list)
+        self.SubscriptionManager = SubscriptionManager()
+        self.EmittedInsights = []
+        self.Engine = None
+
+    # -- configuration
+    def Initialize(self):
+        pass
+
+    def SetStartDate(self, year, month=None, day=None):
+        self.StartDate = year if isinstance(year, datetime) else datetime(year, month, day)
+        self.SetTime(self.StartDate)
+
+    def SetEndDate(self, year, month=None, day=None):
+        self.EndDate = year if isinstance(year, datetime) else datetime(year, month, day)
+
+    def SetCash(self, cash):
+        self.Portfolio.Cash = float(cash)
+
+    def GetParameter(self, name, defaultValue=None):
+        # parameters are strings, like LEAN's; with a default they are parsed to the default's type
+        value = self.Parameters.get(name)
+        if value is None:
+            return defaultValue
+        return value if defaultValue is None else type(defaultValue)(value)
+
+    def SetTime(self, time):
+        self.Time = time
+        self.UtcTime = to_utc(time)
+
+    def AddUniverseSelection(self, model):
+        self.UniverseSelection.append(model)
+
+    def AddAlpha(self, model):
+        self.Alphas.append(model)
+
+    def SetPortfolioConstruction(self, model):
+        self.PortfolioConstruction = model
+
+    def SetBenchmark(self, symbol):
+        self.Benchmark = SimpleNamespace(Evaluate=lambda time: self.Securities[symbol].Price)
+
+    def AddSecurity(self, symbol, resolution=Resolution.Minute):
+        return self.Engine.AddSecurity(symbol.Value, symbol.SecurityType, resolution, symbol=symbol)
+
+    def AddEquity(self, ticker, resolution=Resolution.Minute):
+        return self.Engine.AddSecurity(ticker, SecurityType.Equity, resolution)
+
+    def AddIndex(self, ticker, resolution=Resolution.Minute):
+        return self.Engine.AddSecurity(ticker, SecurityType.Index, resolution)
+
+    def AddFuture(self, ticker, resolution=Resolution.Minute, dataNormalizationMode=None, dataMappingMode=None, contractDepthOffset=0):
+        return self.Engine.AddSecurity(ticker, SecurityType.Future, resolution)
+
+    def RemoveSecurity(self, symbol):
+        return self.Engine.RemoveSecurity(symbol)
+
+    # -- indicators
+    def EMA(self, symbol, period, resolution=None):
+        indicator = ExponentialMovingAverage(f'EMA({symbol},{period})', period)
+        self.RegisterIndicator(symbol, indicator, resolution)
+        if self.Settings.EnableAutomaticIndicatorWarmUp:
+            self.WarmUpIndicator(symbol, indicator, resolution)
+        return indicator
+
+    def RegisterIndicator(self, symbol, indicator, resolution=None):
+        self.Indicators[symbol].append(indicator)
+
+    def WarmUpIndicator(self, symbol, indicator, resolution=None):
+        for endTime, close in self.Engine.History(symbol, indicator.WarmUpPeriod, resolution or Resolution.Minute):
+            indicator.Update(endTime, close)
+
+    def History(self, symbols, periods, resolution=Resolution.Daily):
+        # like LEAN: a DataFrame indexed by (symbol, time) with a close column
+        import pandas as pd
+        symbols = list(symbols) if isinstance(symbols, (list, tuple)) else [symbols]
+        index, closes = [], []
+        for symbol in symbols:
+            for endTime, close in self.Engine.History(symbol, periods, resolution):
+                index.append((symbol, endTime))
+                closes.append(close)
+        return pd.DataFrame({'close': closes}, index=pd.MultiIndex.from_tuples(index, names=['symbol', 'time']) if index else
+                            pd.MultiIndex.from_arrays([[], []], names=['symbol', 'time']))
+
+    # -- insights, charts and logs
+    def EmitInsights(self, *insights):
+        if len(insights) == 1 and isinstance(insights[0], (list, tuple)):
+            insights = insights[0]
+        self.EmittedInsights.extend(insights)
+
+    def AddChart(self, chart):
+        self.Charts.setdefault(chart.Name, chart)
+
+    def Plot(self, chart, series, value):
+        chart = self.Charts.setdefault(chart, Chart(chart))
+        chart.Series.setdefault(series, Series(series)).Values.append((self.Time, float(value)))
+
+    def Log(self, message):
+        self.Logs.append((self.Time, str(message)))
+
+    Debug = Log
+
+    # -- events
+    def OnOrderEvent(self, orderEvent):
+        pass
+
+    def OnEndOfAlgorithm(self):
+        pass
@@ -0,0 +1,102 @@
+''' Makes the strategy projects importable outside QuantConnect.
+
+    LEAN injects its API into every project module (the cloud equivalent of ``from AlgorithmImports import *``).
+    install() does the same with the stand-ins from harness.lean (and the research QuantBook from
+    harness.research when pandas is available) by publishing them as builtins, and
+    registers the AlgorithmImports and Selection.* universe selection modules.
+    load_project() then imports one project's flat modules under their own names without letting
+    them collide with another project's portfolio.py/selection.py.
+'''
+import builtins
+import importlib
+import math
+import sys
+import types
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from . import lean
+
+
+PROJECTS_DIRECTORY = Path(__file__).resolve().parent.parent / 'trading-algorithms'
+LEAN_NAMES = [name for name in dir(lean) if not name.startswith('_') and name[0].isupper()]
+
+_installed = False
+
+
+def install():
+    global _installed
+    if _installed:
+        return
+    injected = {name: getattr(lean, name) for name in LEAN_NAMES}
+    injected.update(datetime=datetime, timedelta=timedelta, math=math, np=np)
+    try:
+        import pandas as pd
+        injected['pd'] = pd
+        from .research import QuantBook
+        injected['QuantBook'] = QuantBook
+    except ImportError:
+        pass
+    for name, value in injected.items():
+        setattr(builtins, name, value)
+
+    algorithmImports = types.ModuleType('AlgorithmImports')
+    algorithmImports.__dict__.update(injected)
+    algorithmImports.__all__ = list(injected)
+    selection = types.ModuleType('Selection')
+    selection.__path__ = []
+    fundamentalSelection = types.ModuleType('Selection.FundamentalUniverseSelectionModel')
+    fundamentalSelection.FundamentalUniverseSelectionModel = lean.FundamentalUniverseSelectionModel
+    selection.FundamentalUniverseSelectionModel = fundamentalSelection
+    scheduledSelection = types.ModuleType('Selection.ScheduledUniverseSelectionModel')
+    scheduledSelection.ScheduledUniverseSelectionModel = lean.ScheduledUniverseSelectionModel
+    selection.ScheduledUniverseSelectionModel = scheduledSelection
+    sys.modules.update({'AlgorithmImports': algorithmImports,
+                        'Selection': selection,
+                        'Selection.FundamentalUniverseSelectionModel': fundamentalSelection,
+                        'Selection.ScheduledUniverseSelectionModel': scheduledSelection})
+    _installed = True
+
+
+class Project:
+
+    def __init__(self, name, directory, modules):
+        self.name = name
+        self.directory = directory
+        self.modules = modules
+
+    def __getattr__(self, name):
+        # project.selection, project.portfolio, ...
+        try:
+            return self.modules[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def Algorithm(self):
+        main = self.modules['main']
+        return next(value for value in vars(main).values()
+                    if isinstance(value, type) and issubclass(value, lean.QCAlgorithm) and value is not lean.QCAlgorithm)
+
+    def __repr__(self):
+        return f'Project({self.name}: {", ".join(self.modules)})'
+
+
+def load_project(name, exclude=('research_tools',)):
+    install()
+    directory = PROJECTS_DIRECTORY / name
+    if not directory.is_dir():
+        raise FileNotFoundError(f'no strategy project named {name!r} under {PROJECTS_DIRECTORY}')
+    names = sorted(path.stem for path in directory.glob('*.py') if path.stem not in exclude)
+    shadowed = {module: sys.modules.pop(module) for module in names if module in sys.modules}
+    sys.path.insert(0, str(directory))
+    try:
+        modules = {module: importlib.import_module(module) for module in names}
+    finally:
+        sys.path.remove(str(directory))
+        for module in names:
+            sys.modules.pop(module, None)
+        sys.modules.update(shadowed)
+    return Project(name, directory, modules)
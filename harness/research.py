@@ -0,0 +1,77 @@
+''' QuantBook stand-in for the research notebooks, answering from a SyntheticMarket.
+
+    qb = QuantBook(SyntheticMarket(datetime(2015, 1, 1), datetime(2018, 1, 1), nEquities=500))
+    qb.History(symbols, start, end, Resolution.Daily)          # (symbol, time) x open/high/low/close/volume
+    qb.GetFundamental(symbols, 'ValuationRatios.FCFYield', start, end)   # time x symbol id
+
+    calls counts the History/GetFundamental requests and the symbols they asked for, which is what
+    a cache in front of QuantBook is meant to save.
+'''
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .lean import ObjectStore, Resolution
+from .synthetic import SyntheticMarket
+
+
+FUNDAMENTAL_FIELDS = {'ValuationRatios.FCFYield': 'fcfYield',
+                      'OperationRatios.RevenueGrowth.Value': 'revenueGrowth',
+                      'ValuationRatios.ExpectedDividendGrowthRate': 'expectedDividendGrowthRate'}
+
+
+class QuantBook:
+
+    def __init__(self, market=None):
+        self.market = market if market is not None else SyntheticMarket(datetime(2015, 1, 1), datetime(2020, 12, 31), nEquities=500, futures=(), indices=())
+        self.ObjectStore = ObjectStore()
+        self.calls = Counter()
+
+
+    def DayIndices(self, start, end, offset=np.timedelta64(0, 'D')):
+        ''' Indices of the days whose data is stamped (day + offset) within [start, end]. '''
+        times = self.market.days.astype('datetime64[s]') + offset
+        first = int(np.searchsorted(times, np.datetime64(start, 's'), 'left'))
+        last = int(np.searchsorted(times, np.datetime64(end, 's'), 'right'))
+        return np.arange(first, last)
+
+
+    def History(self, symbols, start, end, resolution=Resolution.Daily):
+        if resolution != Resolution.Daily:
+            raise NotImplementedError('the research stand-in only serves daily history')
+        symbols = symbols if isinstance(symbols, list) else [symbols]
+        self.calls['History'] += 1
+        self.calls['History symbols'] += len(symbols)
+        # daily bars end at midnight after the session, like LEAN's, and are selected by that end time
+        dayIndices = self.DayIndices(start, end, offset=np.timedelta64(1, 'D'))
+        times = pd.DatetimeIndex(self.market.days[dayIndices] + np.timedelta64(1, 'D'), name='time')
+        frames = []
+        for symbol in symbols:
+            kind, column = self.market.Instrument(symbol)
+            close = self.market.DailyClose(kind, column, dayIndices).astype(float)
+            volume = self.market.volume[dayIndices, column].astype(float) if kind == 'equity' else np.zeros(len(dayIndices))
+            index = pd.MultiIndex.from_arrays([[symbol]*len(times), times], names=['symbol', 'time'])
+            frames.append(pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': volume}, index=index))
+        return pd.concat(frames) if frames else pd.DataFrame()
+
+
+    def GetFundamental(self, symbols, field, start, end):
+        symbols = symbols if isinstance(symbols, list) else [symbols]
+        self.calls['GetFundamental'] += 1
+        self.calls['GetFundamental symbols'] += len(symbols)
+        market = self.market
+        dayIndices = self.DayIndices(start, end)
+        months = np.searchsorted(market.months, market.days[dayIndices].astype('datetime64[M]'))
+        columns = [market.columnBySymbol[symbol] for symbol in symbols]
+        if field in FUNDAMENTAL_FIELDS:
+            values = getattr(market, FUNDAMENTAL_FIELDS[field])[np.ix_(months, columns)].astype(float)
+        elif field == 'MarketCap':
+            values = market.close[np.ix_(dayIndices, columns)]*market.sharesOutstanding[columns]
+        elif field == 'CompanyReference.StandardName':
+            values = np.array([[market.names[column] for column in columns]]*len(dayIndices), dtype=object).reshape(len(dayIndices), len(columns))
+        else:
+            raise KeyError(f'{field} is not part of the synthetic fundamentals')
+        times = pd.DatetimeIndex(market.days[dayIndices], name='time')
+        return pd.DataFrame(values, index=times, columns=[symbol.ID.ToString() for symbol in symbols])
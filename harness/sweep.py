@@ -0,0 +1,148 @@
+''' Grid and random parameter sweeps of a strategy project over one shared synthetic market.
+
+    python -m harness.sweep <project> [--param maxWeight=.05,.1,.2 ...] [--samples 20] [--processes 4]
+                            [--start 2015-01-01] [--end 2016-01-01] [--equities 2000] [--resolution daily] [--out sweep.csv]
+
+    Parameters reach the algorithm through GetParameter. "name=a,b,c" lists the values to try, "name=low:high"
+    is a range drawn uniformly (an integer range when both ends are integers) and needs --samples. Without
+    --samples every combination runs (grid search); with it, that many random points are drawn. --param
+    replaces the project's default space one name at a time.
+
+    The market is generated once and saved as .npy panels; every worker process memory-maps them read-only.
+'''
+import argparse
+import itertools
+import os
+import random
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from .engine import run
+from .lean import Resolution
+from .loader import load_project
+from .synthetic import SyntheticMarket
+
+
+SPACES = {
+    'Dividend-Growth': {'maxWeight': [.05, .1, .2], 'insightDays': [15, 30, 60]},
+    'Rule-of-40-with-SaaS': {'efficiencyScoreThreshold': [.3, .4, .5], 'maxWeight': [.05, .1, .2], 'minWeight': [0., .01]},
+    'EMA-Crossover-with-Futures': {'fastDays': [5, 10, 20], 'slowDays': [30, 50, 100], 'tol': [.005, .01, .02],
+                                   'maxGrossExposurePerSecurity': [5., 10.]},
+}
+METRICS = ('totalReturn', 'sharpe', 'maxDrawdown', 'orders', 'insights', 'seconds')
+
+_worker = {}
+
+
+def parse_param(text):
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f'expected name=a,b,c or name=low:high, got {text!r}')
+    if ':' in values:
+        low, high = values.split(':')
+        return name, (parse_value(low), parse_value(high))
+    return name, [parse_value(value) for value in values.split(',')]
+
+
+def parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def grid(space):
+    ranges = [name for name, values in space.items() if isinstance(values, tuple)]
+    if ranges:
+        raise ValueError(f'{", ".join(ranges)}: ranges need random search (--samples)')
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def sample(space, n, seed=0):
+    rng = random.Random(seed)
+    points = []
+    for _ in range(n):
+        point = {}
+        for name, values in space.items():
+            if isinstance(values, list):
+                point[name] = rng.choice(values)
+            elif all(isinstance(value, int) for value in values):
+                point[name] = rng.randint(*values)
+            else:
+                point[name] = rng.uniform(*values)
+        points.append(point)
+    return points
+
+
+def _initialize(projectName, marketDirectory, resolution, start, end):
+    _worker.update(project=load_project(projectName), market=SyntheticMarket.Load(marketDirectory),
+                   resolution=resolution, start=start, end=end)
+
+
+def _run(parameters):
+    start, end = _worker['start'], _worker['end']
+
+    def configure(algorithm):
+        algorithm.SetStartDate(start)
+        algorithm.SetEndDate(end)
+    result = run(_worker['project'], _worker['market'], resolution=_worker['resolution'], configure=configure, parameters=parameters)
+    return {**parameters, **{metric: getattr(result, metric) for metric in METRICS}}
+
+
+def sweep(projectName, points, market, resolution=None, processes=None):
+    ''' Run every parameter point on market (a SyntheticMarket or a directory it was saved to) and
+        return one row per point, best Sharpe ratio first.
+    '''
+    import pandas as pd
+    temporary = not isinstance(market, str)
+    if temporary:
+        marketDirectory = market.Save(tempfile.mkdtemp(prefix='market-'))
+    else:
+        marketDirectory, market = market, SyntheticMarket.Load(market)
+    try:
+        with ProcessPoolExecutor(processes, initializer=_initialize,
+                                 initargs=(projectName, marketDirectory, resolution, market.start, market.end)) as pool:
+            rows = list(pool.map(_run, points))
+    finally:
+        if temporary:
+            shutil.rmtree(marketDirectory)
+    return pd.DataFrame(rows).sort_values('sharpe', ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m harness.sweep', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('project', choices=sorted(SPACES))
+    parser.add_argument('--param', type=parse_param, action='append', default=[], help='name=a,b,c or name=low:high')
+    parser.add_argument('--samples', type=int, default=None, help='random search with this many points instead of the full grid')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes, defaults to the number of CPUs')
+    parser.add_argument('--start', type=datetime.fromisoformat, default=datetime(2015, 1, 1))
+    parser.add_argument('--end', type=datetime.fromisoformat, default=datetime(2016, 1, 1))
+    parser.add_argument('--equities', type=int, default=2000, help='coarse universe size')
+    parser.add_argument('--resolution', choices=[r.name.lower() for r in Resolution], default=None,
+                        help='cap every subscription at this resolution')
+    parser.add_argument('--market', default=None, help='directory of a saved market: reused if it exists, written otherwise')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='also write the results table to this CSV file')
+    args = parser.parse_args(argv)
+
+    space = {**SPACES[args.project], **dict(args.param)}
+    points = sample(space, args.samples, args.seed) if args.samples else grid(space)
+    resolution = Resolution[args.resolution.capitalize()] if args.resolution else None
+    if args.market and os.path.exists(os.path.join(args.market, 'market.json')):
+        market = args.market
+    else:
+        market = SyntheticMarket(args.start, args.end, nEquities=args.equities, seed=args.seed)
+        if args.market:
+            market = market.Save(args.market)
+    print(f'{args.project}: {len(points)} runs')
+    results = sweep(args.project, points, market, resolution, args.processes)
+    print(results.to_string(float_format=lambda value: f'{value:.4g}'))
+    if args.out:
+        results.to_csv(args.out, index=False)
+
+
+if __name__ == '__main__':
+    main()
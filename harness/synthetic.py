@@ -0,0 +1,226 @@
+''' Seeded synthetic market: daily panels for a coarse equity universe, monthly fundamentals,
+    index and futures closes, and minute bars bridged between daily closes on demand.
+
+    Everything is generated with NumPy up front (daily) or per day (minute), so a 10k-symbol
+    universe over a decade stays in the low hundreds of MB and minute bars never all live in memory.
+'''
+import json
+import os
+from datetime import datetime, time as dtime, timedelta
+
+import numpy as np
+
+from .lean import CoarseFundamental, FineFundamental, SecurityType, Symbol
+
+
+SAAS_INDUSTRY_CODES = (31110010, 31110020, 31110030, 30830010)
+OTHER_INDUSTRY_CODES = (10110010, 10320040, 20525010, 20635010, 30910010, 31010010, 31120030, 10280010, 20635020, 31130010)
+SESSION_OPEN = dtime(9, 30)
+MINUTES_PER_DAY = 390
+PANELS = ('days', 'listingDates', 'hasFundamentalData', 'industryCodes', 'sharesOutstanding', 'close', 'volume', 'dailyVolatility',
+          'months', 'expectedDividendGrowthRate', 'fcfYield', 'revenueGrowth', 'indexClose', 'futureClose')
+
+
+def trading_days(start, end):
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    return days[np.is_busday(days)]
+
+
+class SyntheticMarket:
+
+    def __init__(self, start, end, nEquities=2000, futures=('GC', 'CL', 'ES', 'BTC'), indices=('SPX',),
+                 warmUpDays=60, saasShare=.05, seed=0):
+        self.seed = seed
+        self.start, self.end = start, end
+        self.days = trading_days(start - timedelta(int(warmUpDays*7/5) + 1), end)
+        self.firstDayIndex = int(np.searchsorted(self.days, np.datetime64(start, 'D')))
+        rng = np.random.default_rng(seed)
+        nDays = len(self.days)
+
+        # equities: static attributes
+        self.nEquities = nEquities
+        firstListing, lastListing = np.datetime64('1985-01-01'), np.datetime64(end, 'D')
+        listingSpan = int((lastListing - firstListing).astype(int))
+        self.listingDates = firstListing + np.sort(rng.integers(0, listingSpan, nEquities))[rng.permutation(nEquities)].astype('timedelta64[D]')
+        self.hasFundamentalData = rng.random(nEquities) < .85
+        isSaas = rng.random(nEquities) < saasShare
+        self.industryCodes = np.where(isSaas, rng.choice(SAAS_INDUSTRY_CODES, nEquities), rng.choice(OTHER_INDUSTRY_CODES, nEquities))
+        self.sharesOutstanding = rng.lognormal(18.5, 1.3, nEquities)
+        self.symbols = [Symbol(f'EQ{i:05d}', SecurityType.Equity, datetime.combine(self.listingDates[i].astype(datetime), dtime())) for i in range(nEquities)]
+        self.columnBySymbol = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.names = [f'Company{i:05d} Inc' for i in range(nEquities)]
+
+        # equities: daily close and volume panels, days x symbols
+        vol = rng.uniform(.01, .04, nEquities).astype(np.float32)
+        drift = rng.normal(.0003, .0004, nEquities).astype(np.float32)
+        logReturns = drift + vol*rng.standard_normal((nDays, nEquities), dtype=np.float32)
+        self.close = (rng.lognormal(3, 1.1, nEquities).astype(np.float32)*np.exp(np.cumsum(logReturns, axis=0))).astype(np.float32)
+        self.volume = rng.lognormal(12, 2, (1, nEquities)).astype(np.float32)*rng.lognormal(0, .3, (nDays, nEquities)).astype(np.float32)
+        self.dailyVolatility = vol
+
+        # equities: monthly fundamentals, months x symbols, AR(1) around a per-name mean
+        self.months = np.unique(self.days.astype('datetime64[M]'))
+        nMonths = len(self.months)
+        self.expectedDividendGrowthRate = self.Ar1(rng, nMonths, nEquities, mean=rng.normal(.04, .05, nEquities), scale=.02)
+        self.fcfYield = self.Ar1(rng, nMonths, nEquities, mean=rng.normal(.04, .06, nEquities), scale=.02)
+        self.revenueGrowth = self.Ar1(rng, nMonths, nEquities, mean=np.where(isSaas, rng.normal(.3, .2, nEquities), rng.normal(.06, .1, nEquities)), scale=.05)
+
+        # index and futures: daily closes, days x instruments
+        self.indexTickers = list(indices)
+        self.indexClose = self.RandomWalk(rng, nDays, len(indices), start=np.full(len(indices), 1100.), vol=.011, drift=.0003)
+        self.futureTickers = list(futures)
+        self.futureClose = self.RandomWalk(rng, nDays, len(futures), start=rng.uniform(50, 2000, len(futures)), vol=.015, drift=.0001)
+
+
+    @staticmethod
+    def Ar1(rng, nMonths, n, mean, scale, phi=.9):
+        values = np.empty((nMonths, n), dtype=np.float32)
+        values[0] = mean
+        for m in range(1, nMonths):
+            values[m] = mean + phi*(values[m - 1] - mean) + scale*rng.standard_normal(n)
+        return values
+
+
+    @staticmethod
+    def RandomWalk(rng, nDays, n, start, vol, drift):
+        if n == 0:
+            return np.empty((nDays, 0), dtype=np.float32)
+        return (start*np.exp(np.cumsum(drift + vol*rng.standard_normal((nDays, n)), axis=0))).astype(np.float32)
+
+
+    # -------------------------------------------------------------------------- persistence
+
+    def Save(self, directory):
+        ''' One .npy per panel plus market.json, so processes can share the panels through Load(mmap=True). '''
+        os.makedirs(directory, exist_ok=True)
+        for name in PANELS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        meta = {'seed': self.seed, 'start': self.start.isoformat(), 'end': self.end.isoformat(), 'firstDayIndex': self.firstDayIndex,
+                'indexTickers': self.indexTickers, 'futureTickers': self.futureTickers}
+        with open(os.path.join(directory, 'market.json'), 'w') as file:
+            json.dump(meta, file)
+        return directory
+
+
+    @classmethod
+    def Load(cls, directory, mmap=True):
+        ''' The market saved in directory; with mmap the panels are read-only memory maps shared through the page cache. '''
+        with open(os.path.join(directory, 'market.json')) as file:
+            meta = json.load(file)
+        market = cls.__new__(cls)
+        for name in PANELS:
+            setattr(market, name, np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None))
+        market.seed, market.firstDayIndex = meta['seed'], meta['firstDayIndex']
+        market.start, market.end = datetime.fromisoformat(meta['start']), datetime.fromisoformat(meta['end'])
+        market.indexTickers, market.futureTickers = meta['indexTickers'], meta['futureTickers']
+        market.nEquities = len(market.listingDates)
+        market.symbols = [Symbol(f'EQ{i:05d}', SecurityType.Equity, datetime.combine(listingDate.astype(datetime), dtime()))
+                          for i, listingDate in enumerate(market.listingDates)]
+        market.columnBySymbol = {symbol: i for i, symbol in enumerate(market.symbols)}
+        market.names = [f'Company{i:05d} Inc' for i in range(market.nEquities)]
+        return market
+
+
+    # -------------------------------------------------------------------------- calendar
+
+    def DayIndex(self, day):
+        index = int(np.searchsorted(self.days, np.datetime64(day, 'D')))
+        if index >= len(self.days) or self.days[index] != np.datetime64(day, 'D'):
+            return None
+        return index
+
+
+    def TradingDays(self, start=None, end=None):
+        start = np.datetime64(start or self.start, 'D')
+        end = np.datetime64(end or self.end, 'D')
+        return [datetime.combine(day.astype(datetime), dtime()) for day in self.days[(self.days >= start) & (self.days <= end)]]
+
+
+    def MonthIndex(self, dayIndex):
+        return int(np.searchsorted(self.months, self.days[dayIndex].astype('datetime64[M]')))
+
+
+    # -------------------------------------------------------------------------- universe data
+
+    def Coarse(self, dayIndex):
+        return CoarseUniverse(self, dayIndex)
+
+
+    def Fine(self, dayIndex, symbols):
+        month = self.MonthIndex(dayIndex)
+        fine = []
+        for symbol in symbols:
+            i = self.columnBySymbol[symbol]
+            fine.append(FineFundamental(symbol,
+                                        marketCap=float(self.close[dayIndex, i]*self.sharesOutstanding[i]),
+                                        expectedDividendGrowthRate=float(self.expectedDividendGrowthRate[month, i]),
+                                        fcfYield=float(self.fcfYield[month, i]),
+                                        revenueGrowth=float(self.revenueGrowth[month, i]),
+                                        industryCode=int(self.industryCodes[i]),
+                                        companyName=self.names[i]))
+        return fine
+
+
+    # -------------------------------------------------------------------------- prices
+
+    def Instrument(self, symbol):
+        ''' (kind, column) of a symbol in the daily panels. '''
+        if symbol in self.columnBySymbol:
+            return 'equity', self.columnBySymbol[symbol]
+        ticker = symbol.ID.Symbol
+        if ticker in self.futureTickers:
+            return 'future', self.futureTickers.index(ticker)
+        if ticker in self.indexTickers:
+            return 'index', self.indexTickers.index(ticker)
+        raise KeyError(f'{symbol} is not part of the synthetic market')
+
+
+    def DailyClose(self, kind, columns, dayIndex):
+        panel = {'equity': self.close, 'future': self.futureClose, 'index': self.indexClose}[kind]
+        return panel[dayIndex, columns]
+
+
+    def MinuteCloses(self, kind, columns, dayIndex):
+        ''' minutes x len(columns) closes for one session, a Brownian bridge from the previous daily close. '''
+        columns = np.asarray(columns, dtype=np.intp)
+        close = self.DailyClose(kind, columns, dayIndex).astype(float)
+        previous = self.DailyClose(kind, columns, max(dayIndex - 1, 0)).astype(float)
+        kindCode = {'equity': 0, 'future': 1, 'index': 2}[kind]
+        # one stream per (day, instrument) so a path does not depend on which other columns are requested
+        noise = np.empty((MINUTES_PER_DAY, len(columns)))
+        for j, column in enumerate(columns.tolist()):
+            noise[:, j] = np.random.default_rng((self.seed, dayIndex, kindCode, column)).standard_normal(MINUTES_PER_DAY)
+        walk = np.cumsum(noise*(.015/np.sqrt(MINUTES_PER_DAY)), axis=0)
+        t = (np.arange(1, MINUTES_PER_DAY + 1)/MINUTES_PER_DAY)[:, None]
+        bridge = walk - t*walk[-1] + t*np.log(close/previous)
+        return previous*np.exp(bridge)
+
+
+    def MinuteEndTimes(self, day):
+        base = datetime.combine(day, SESSION_OPEN)
+        return [base + timedelta(minutes=m + 1) for m in range(MINUTES_PER_DAY)]
+
+
+
+
+
+class CoarseUniverse:
+    ''' Lazily materialized coarse list for one day: objects are only built when a model iterates it. '''
+
+    def __init__(self, market, dayIndex):
+        self.market = market
+        self.dayIndex = dayIndex
+        self.columns = np.flatnonzero(market.listingDates <= market.days[dayIndex])
+
+
+    def __len__(self):
+        return len(self.columns)
+
+
+    def __iter__(self):
+        market, dayIndex = self.market, self.dayIndex
+        prices = market.close[dayIndex, self.columns].tolist()
+        volumes = market.volume[dayIndex, self.columns].tolist()
+        hasFundamentalData = market.hasFundamentalData[self.columns].tolist()
+        for column, price, volume, fundamental in zip(self.columns.tolist(), prices, volumes, hasFundamentalData):
+            yield CoarseFundamental(market.symbols[column], price, volume, fundamental)
@@ -0,0 +1,16 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness import load_project
+
+
+PROJECTS = ('Dividend-Growth', 'EMA-Crossover-with-Futures', 'Rule-of-40-with-SaaS')
+_projects = {}
+
+
+def project(name):
+    ''' A strategy project's modules, loaded once per test session. '''
+    if name not in _projects:
+        _projects[name] = load_project(name)
+    return _projects[name]
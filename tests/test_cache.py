@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import project
+
+
+# number of input columns SelectionData.UpdateMany takes
+INPUTS = {'Dividend-Growth': 1, 'Rule-of-40-with-SaaS': 2}
+PROJECTS = tuple(INPUTS)
+NOW = datetime(2015, 6, 1)
+
+
+def store(name, **kwargs):
+    selectionDataStore = project(name).cache.SelectionDataStore(project(name).selection.SelectionData, **kwargs)
+    selectionDataStore.inputs = INPUTS[name]
+    return selectionDataStore
+
+
+def refresh(selectionDataStore, symbols, time):
+    selectionDataStore.RefreshMany(symbols, time, *[[1.]*len(symbols)]*selectionDataStore.inputs)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_rows_older_than_max_age_are_evicted(name):
+    selectionDataStore = store(name, maxAge=timedelta(90), maxSize=1000)
+    refresh(selectionDataStore, ['old'], NOW - timedelta(91))
+    refresh(selectionDataStore, ['edge'], NOW - timedelta(90))
+    refresh(selectionDataStore, ['recent'], NOW - timedelta(1))
+    selectionDataStore.Evict(NOW)
+    assert set(selectionDataStore.rowBySymbol) == {'edge', 'recent'}
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_store_is_trimmed_to_max_size_least_recently_refreshed_first(name):
+    selectionDataStore = store(name, maxAge=timedelta(365), maxSize=3)
+    for day in range(6):
+        refresh(selectionDataStore, [f's{day}'], NOW - timedelta(10 - day))
+    selectionDataStore.Evict(NOW)
+    assert set(selectionDataStore.rowBySymbol) == {'s3', 's4', 's5'}
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_rows_refreshed_in_the_current_cycle_are_never_trimmed(name):
+    selectionDataStore = store(name, maxAge=timedelta(365), maxSize=2)
+    refresh(selectionDataStore, ['old1', 'old2'], NOW - timedelta(30))
+    current = [f'c{i}' for i in range(4)]
+    refresh(selectionDataStore, current, NOW)
+    selectionDataStore.Evict(NOW)
+    assert set(selectionDataStore.rowBySymbol) == set(current)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_evicted_rows_are_reused_and_reset(name):
+    selectionDataStore = store(name, maxAge=timedelta(90), maxSize=1000, capacity=4)
+    refresh(selectionDataStore, ['a', 'b', 'c', 'd'], NOW - timedelta(100))
+    selectionDataStore.Evict(NOW)
+    assert len(selectionDataStore) == 0
+    rows = selectionDataStore.Rows(['e', 'f', 'g', 'h'])
+    assert sorted(rows) == [0, 1, 2, 3] and len(selectionDataStore.symbols) == 4
+    assert all(not column[rows].any() for column in selectionDataStore.columns.values())
+    assert list(selectionDataStore.CurrentRows(NOW)) == []
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from conftest import project
+from harness.lean import QCAlgorithm
+
+
+PROJECTS = ('EMA-Crossover-with-Futures', 'Rule-of-40-with-SaaS')
+METHODS = ('lttb', 'minmax')
+
+
+def walk(seed, n):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=float)*60, rng.normal(size=n).cumsum()
+
+
+def downsample(name, method, times, values, n):
+    algorithm = QCAlgorithm()
+    return project(name).charts.ChartBuffer(algorithm, method=method).Downsample(times, values, n)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('size, n', [(5, 4), (100, 10), (1000, 37), (10_000, 400)])
+def test_downsampling_keeps_the_endpoints_within_the_budget(name, method, size, n):
+    times, values = walk(size, size)
+    index = downsample(name, method, times, values, n)
+    assert len(index) <= n
+    assert index[0] == 0 and index[-1] == size - 1
+    assert (np.diff(index) > 0).all()
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_lttb_uses_the_whole_budget(name):
+    times, values = walk(0, 1000)
+    assert len(downsample(name, 'lttb', times, values, 50)) == 50
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+@pytest.mark.parametrize('method', METHODS)
+def test_downsampling_keeps_a_spike(name, method):
+    times, values = np.arange(1000, dtype=float), np.zeros(1000)
+    values[617] = 10
+    assert 617 in downsample(name, method, times, values, 20)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_minmax_keeps_every_bucket_extreme(name):
+    times, values = walk(1, 1000)
+    index = downsample(name, 'minmax', times, values, 20)
+    assert values.argmin() in index and values.argmax() in index
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+@pytest.mark.parametrize('method', METHODS)
+def test_a_backtest_plots_at_most_max_points_per_series(name, method):
+    algorithm = QCAlgorithm()
+    algorithm.SetStartDate(2015, 1, 1)
+    algorithm.SetEndDate(2016, 1, 1)
+    charts = project(name).charts.ChartBuffer(algorithm, maxPoints=400, method=method)
+    time = datetime(2015, 1, 1, 9, 31)
+    plotted = []
+    while time < datetime(2016, 1, 1):
+        algorithm.SetTime(time)
+        charts.Plot('Equity', 'Value', len(plotted))
+        # points are kept in UTC, like LEAN's chart points
+        plotted.append(algorithm.UtcTime.replace(tzinfo=None))
+        time += timedelta(hours=1)
+    charts.Flush()
+    points = algorithm.Charts['Equity'].Series['Value'].Values
+    assert len(points) <= 400
+    assert points[0] == (plotted[0], 0) and points[-1] == (plotted[-1], len(plotted) - 1)
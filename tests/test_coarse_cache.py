@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from conftest import project
+from harness.lean import CoarseFundamental, Symbol
+
+
+PROJECTS = ('Dividend-Growth', 'Rule-of-40-with-SaaS')
+DAY = datetime(2015, 6, 1, 9, 0)
+
+
+def coarse(seed=0, n=300):
+    rng = np.random.default_rng(seed)
+    return [CoarseFundamental(Symbol(f'C{i}', listingDate=datetime(2005, 1, 3)), float(rng.uniform(.5, 200)),
+                              float(rng.lognormal(11, 2)), bool(rng.random() < .9)) for i in range(n)]
+
+
+def stages(name, consumers, **kwargs):
+    module = project(name).coarse
+    cache = module.CoarseFilterCache()
+    return cache, [module.CoarseSelectionStage(cache=cache, **kwargs) for _ in range(consumers)]
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+@pytest.mark.parametrize('consumers', [2, 3])
+def test_a_date_is_released_once_every_consumer_has_read_it(name, consumers):
+    cache, registered = stages(name, consumers, count=50)
+    data = coarse()
+    expected = registered[0].Filter(DAY, data)
+    for i, stage in enumerate(registered):
+        assert stage.Select(DAY, data) == expected
+        assert len(cache.results) == (1 if i < consumers - 1 else 0)
+    assert (cache.misses, cache.hits) == (1, consumers - 1)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_a_single_consumer_keeps_nothing(name):
+    cache, (stage,) = stages(name, 1)
+    stage.Select(DAY, coarse())
+    assert cache.results == {} and cache.misses == 1
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_registering_a_stage_twice_counts_it_once(name):
+    cache, (stage, other) = stages(name, 2)
+    cache.Register(stage)
+    assert cache.consumers[stage.Key()] == 2
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_stages_with_other_settings_filter_on_their_own(name):
+    module = project(name).coarse
+    cache = module.CoarseFilterCache()
+    wide, narrow = module.CoarseSelectionStage(count=100, cache=cache), module.CoarseSelectionStage(count=10, cache=cache)
+    data = coarse()
+    assert len(wide.Select(DAY, data)) == 100 and len(narrow.Select(DAY, data)) == 10
+    assert (cache.misses, cache.hits) == (2, 0)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_an_unread_date_is_dropped_when_a_later_one_is_asked_for(name):
+    cache, (first, second) = stages(name, 2)
+    first.Select(DAY, coarse(0))
+    assert len(cache.results) == 1
+    nextDay = DAY + timedelta(1)
+    assert first.Select(nextDay, coarse(1)) == first.Filter(nextDay, coarse(1))
+    assert [date for date, key in cache.results] == [nextDay.date()]
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import project
+from harness import SyntheticMarket
+from harness.engine import Engine, prepare
+from harness.lean import (FundamentalUniverseSelectionModel, PortfolioTarget, QCAlgorithm, Resolution,
+                          ScheduledUniverseSelectionModel, UniverseSettings)
+
+
+START, END = datetime(2015, 1, 5), datetime(2015, 1, 30)
+
+
+class FirstTwo(FundamentalUniverseSelectionModel):
+
+    def __init__(self):
+        super().__init__(False)
+
+    def SelectCoarse(self, algorithm, coarse):
+        return [c.Symbol for c in coarse][:2]
+
+
+class Overlay(QCAlgorithm):
+    ''' A daily selection universe and a minute scheduled universe holding whatever `overlay` lists. '''
+
+    def Initialize(self):
+        self.SetStartDate(START)
+        self.SetEndDate(END)
+        self.UniverseSettings.Resolution = Resolution.Daily
+        self.AddUniverseSelection(FirstTwo())
+        minute = UniverseSettings(self.UniverseSettings)
+        minute.Resolution = Resolution.Minute
+        self.AddUniverseSelection(ScheduledUniverseSelectionModel(self.DateRules.EveryDay(), self.TimeRules.At(9, 0), lambda time: self.overlay, minute))
+        self.overlay = []
+        self.changes = []
+
+    def OnSecuritiesChanged(self, changes):
+        self.changes.append(([security.Symbol for security in changes.AddedSecurities], [security.Symbol for security in changes.RemovedSecurities]))
+
+
+class Session:
+
+    def __init__(self):
+        self.algorithm = Overlay()
+        self.engine = Engine(self.algorithm, SyntheticMarket(START, END, nEquities=20))
+        self.days = iter(self.engine.Start())
+        self.Next()
+        self.first, self.second = self.engine.universeMembers[self.algorithm.UniverseSelection[0]]
+
+    def Next(self, overlay=None):
+        if overlay is not None:
+            self.algorithm.overlay = overlay
+        self.algorithm.changes = []
+        self.engine.RunDay(next(self.days))
+        return self.algorithm.changes
+
+    def Resolution(self, symbol):
+        return self.engine.subscriptions[symbol].resolution
+
+    def Hold(self, symbol, quantity):
+        self.engine.Execute([PortfolioTarget(symbol, quantity)])
+
+
+def test_joining_a_second_universe_is_reported_as_added_again():
+    session = Session()
+    assert session.Next([session.first]) == [([session.first], [])]
+    assert session.Resolution(session.first) == Resolution.Minute
+    assert session.Resolution(session.second) == Resolution.Daily
+
+
+def test_a_held_name_leaving_the_overlay_is_removed_but_streams_until_flat():
+    session = Session()
+    symbol = session.first
+    session.Next([symbol])
+    session.Hold(symbol, 100)
+    # LEAN reports the removal for the universe it left, even though the selection universe still holds it
+    assert session.Next([]) == [([], [symbol])]
+    assert session.algorithm.Portfolio[symbol].Quantity == 100
+    assert session.Resolution(symbol) == Resolution.Minute
+    session.Hold(symbol, 0)
+    assert session.Next() == []
+    assert session.Resolution(symbol) == Resolution.Daily
+
+
+def test_a_flat_name_leaving_the_overlay_drops_to_the_other_universe_at_once():
+    session = Session()
+    session.Next([session.second])
+    assert session.Next([]) == [([], [session.second])]
+    assert session.Resolution(session.second) == Resolution.Daily
+
+
+def test_remove_security_liquidates_and_reports_the_removal():
+    session = Session()
+    symbol = session.algorithm.AddIndex('SPX', Resolution.Daily).Symbol
+    assert session.Next() == [([symbol], [])]
+    session.Hold(symbol, 10)
+    session.algorithm.RemoveSecurity(symbol)
+    assert not session.algorithm.Portfolio[symbol].Invested
+    assert session.Next() == [([], [symbol])]
+    assert symbol not in session.engine.subscriptions
+
+
+@pytest.mark.parametrize('name', ['Dividend-Growth', 'Rule-of-40-with-SaaS'])
+def test_equity_strategies_stream_at_daily_resolution(name):
+
+    def configure(algorithm):
+        algorithm.SetStartDate(START)
+        algorithm.SetEndDate(END)
+    engine = prepare(project(name), SyntheticMarket(START, END, nEquities=300), configure=configure)
+    assert engine.Run().orders
+    assert {subscription.resolution for subscription in engine.subscriptions.values()} == {Resolution.Daily}
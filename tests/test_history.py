@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from conftest import project
+from harness.lean import ObjectStore, Symbol
+
+
+def recorder_type():
+    return project('Rule-of-40-with-SaaS').history.PortfolioHistoryRecorder
+
+
+def record_days(recorder, days, seed=0):
+    rng = np.random.default_rng(seed)
+    symbols = [Symbol(f'S{i}') for i in range(12)]
+    expected = {}
+    for day in range(days):
+        time = datetime(2015, 1, 2, 16) + timedelta(day)
+        # some days hold nothing
+        held = [] if day % 7 == 3 else rng.choice(symbols, size=rng.integers(1, 6), replace=False)
+        weights = {symbol: float(np.float32(rng.uniform(.01, .2))) for symbol in held}
+        recorder.Record(time, weights)
+        expected[time] = {symbol.ID.ToString(): weight for symbol, weight in weights.items()}
+    return expected
+
+
+def dense(expected):
+    frame = pd.DataFrame.from_dict(expected, orient='index').fillna(0.).astype(float)
+    frame.index = pd.DatetimeIndex(frame.index, name='time')
+    return frame.iloc[::-1]
+
+
+def test_segments_and_manifest_load_back_as_the_recorded_weights():
+    objectStore = ObjectStore()
+    recorder = recorder_type()(objectStore, 'history', segmentRows=50, capacity=8)
+    expected = record_days(recorder, 120)
+    recorder.Close()
+    manifest = json.loads(objectStore.Read('history'))
+    assert manifest['segments'] > 1 and all(objectStore.ContainsKey(f'history/{i:05d}') for i in range(manifest['segments']))
+    assert recorder_type().IsManifest(objectStore.Read('history'))
+    loaded = recorder_type().Load(objectStore, 'history')
+    assert list(loaded.index) == sorted(expected, reverse=True)
+    # days with no holdings have no entries to build the expected frame from
+    expectedFrame = dense(expected).reindex(index=loaded.index, columns=loaded.columns, fill_value=0.)
+    pd.testing.assert_frame_equal(loaded, expectedFrame, check_freq=False, check_index_type=False)
+
+
+def test_an_empty_run_saves_a_loadable_manifest():
+    objectStore = ObjectStore()
+    recorder_type()(objectStore, 'history').Close()
+    loaded = recorder_type().Load(objectStore, 'history')
+    assert loaded.empty
+
+
+def test_legacy_json_history_is_not_a_manifest():
+    legacy = pd.DataFrame({'A': [.5]}, index=[datetime(2015, 1, 2)]).to_json(orient='split')
+    assert not recorder_type().IsManifest(legacy)
+    assert not recorder_type().IsManifest('not json')
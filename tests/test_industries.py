@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from conftest import project
+from harness.lean import ObjectStore, Symbol
+
+
+SOFTWARE, BANKS = 31110020, 10320010
+DAY = datetime(2015, 6, 1)
+
+
+def cache(objectStore=None):
+    return project('Rule-of-40-with-SaaS').industries.IndustryClassificationCache(objectStore, maxAge=timedelta(45))
+
+
+def test_codes_are_trusted_from_the_first_day_to_max_age_after_the_last():
+    industries, symbol = cache(), Symbol('BANK')
+    industries.Update(DAY, [symbol], [BANKS])
+    assert industries.Code(symbol, DAY - timedelta(1)) is None
+    assert industries.Code(symbol, DAY) == BANKS
+    assert industries.Code(symbol, DAY + timedelta(45)) == BANKS
+    assert industries.Code(symbol, DAY + timedelta(46)) is None
+    assert industries.Code(Symbol('UNSEEN'), DAY) is None
+
+
+def test_seeing_the_same_code_again_extends_its_span_both_ways():
+    industries, symbol = cache(), Symbol('BANK')
+    industries.Update(DAY, [symbol], [BANKS])
+    industries.Update(DAY + timedelta(30), [symbol], [BANKS])
+    industries.Update(DAY - timedelta(10), [symbol], [BANKS])
+    assert industries.Code(symbol, DAY - timedelta(10)) == BANKS
+    assert industries.Code(symbol, DAY + timedelta(75)) == BANKS
+    assert industries.Code(symbol, DAY + timedelta(76)) is None
+
+
+def test_a_new_code_replaces_the_entry_and_its_span():
+    industries, symbol = cache(), Symbol('MOVER')
+    industries.Update(DAY, [symbol], [BANKS])
+    industries.Update(DAY + timedelta(30), [symbol], [SOFTWARE])
+    assert industries.Code(symbol, DAY + timedelta(29)) is None
+    assert industries.Code(symbol, DAY + timedelta(30)) == SOFTWARE
+
+
+def test_only_names_known_to_be_outside_the_codes_are_dropped():
+    industries = cache()
+    bank, software, stale, unseen = (Symbol(ticker) for ticker in ('BANK', 'SOFT', 'STALE', 'UNSEEN'))
+    industries.Update(DAY, [bank, software], [BANKS, SOFTWARE])
+    industries.Update(DAY - timedelta(60), [stale], [BANKS])
+    assert industries.Plausible([bank, software, stale, unseen], DAY, [SOFTWARE]) == [software, stale, unseen]
+
+
+def test_entries_outlive_the_run_in_the_object_store():
+    objectStore, symbol = ObjectStore(), Symbol('BANK')
+    industries = cache(objectStore)
+    industries.Update(DAY, [symbol], [BANKS])
+    industries.Save()
+    assert cache(objectStore).Code(symbol, DAY) == BANKS
+    # without an object store the cache lives for the run only
+    industries = cache()
+    industries.Update(DAY, [symbol], [BANKS])
+    industries.Save()
@@ -0,0 +1,84 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from conftest import PROJECTS, project
+from harness.lean import Insight, InsightCollection, InsightDirection, Symbol, SecurityType
+
+
+START = datetime(2015, 1, 2, tzinfo=pytz.utc)
+SYMBOLS = [Symbol(f'S{i}', SecurityType.Equity) for i in range(5)]
+
+
+def make_insight(rng, utcTime):
+    insight = Insight.Price(rng.choice(SYMBOLS), timedelta(minutes=rng.choice([1, 5, 30, 60, 600])),
+                            rng.choice(list(InsightDirection)), sourceModel=rng.choice(['a', 'b']))
+    # a few insights back-dated, and equal generation times, to exercise the per-key ordering
+    insight.SetPeriodAndCloseTime(utcTime - timedelta(minutes=rng.choice([0, 0, 0, 1, 10])))
+    return insight
+
+
+def last_active(collection, utcTime):
+    ''' The old portfolio models' GroupBy path: the newest active insight per (Symbol, SourceModel). '''
+    byKey = {}
+    for insight in collection.GetActiveInsights(utcTime):
+        byKey.setdefault((insight.Symbol, insight.SourceModel), []).append(insight)
+    return {sorted(insights, key=lambda insight: insight.GeneratedTimeUtc)[-1].Id for insights in byKey.values()}
+
+
+def ids(insights):
+    return {insight.Id for insight in insights}
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_insight_collection(name, seed):
+    rng = random.Random(seed)
+    store, reference = project(name).insights.InsightStore(), InsightCollection()
+    utcTime = START
+    for _ in range(300):
+        utcTime += timedelta(minutes=rng.choice([0, 1, 2, 7]))
+        action = rng.random()
+        if action < .5:
+            insights = [make_insight(rng, utcTime) for _ in range(rng.randint(1, 4))]
+            store.AddRange(insights)
+            reference.AddRange(insights)
+        elif action < .75:
+            assert ids(store.RemoveExpiredInsights(utcTime)) == ids(reference.RemoveExpiredInsights(utcTime))
+        elif action < .8:
+            symbols = rng.sample(SYMBOLS, 2)
+            store.Clear(symbols)
+            reference.Clear(symbols)
+        assert len(store) == len(reference)
+        assert ids(store.GetLastActiveInsights(utcTime)) == last_active(reference, utcTime)
+        assert store.GetNextExpiryTime() == reference.GetNextExpiryTime()
+        for symbol in SYMBOLS:
+            assert store.HasActiveInsights(symbol, utcTime) == reference.HasActiveInsights(symbol, utcTime)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_expiry_is_strictly_after_close_time(name):
+    store = project(name).insights.InsightStore()
+    insight = Insight.Price(SYMBOLS[0], timedelta(minutes=5), InsightDirection.Up)
+    insight.SetPeriodAndCloseTime(START)
+    store.AddRange([insight])
+    closeTime = START + timedelta(minutes=5)
+    assert store.RemoveExpiredInsights(closeTime) == []
+    assert store.HasActiveInsights(SYMBOLS[0], closeTime)
+    assert store.RemoveExpiredInsights(closeTime + timedelta(seconds=1)) == [insight]
+    assert len(store) == 0 and store.GetNextExpiryTime() is None
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_clear_drops_the_symbols_insights(name):
+    store = project(name).insights.InsightStore()
+    insights = [Insight.Price(symbol, timedelta(hours=1), InsightDirection.Up) for symbol in SYMBOLS[:2]]
+    for insight in insights:
+        insight.SetPeriodAndCloseTime(START)
+    store.AddRange(insights)
+    store.Clear([SYMBOLS[0]])
+    assert not store.HasActiveInsights(SYMBOLS[0], START)
+    assert ids(store.GetLastActiveInsights(START)) == {insights[1].Id}
+    assert store.GetNextExpiryTime() == insights[1].CloseTimeUtc
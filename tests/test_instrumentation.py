@@ -0,0 +1,19 @@
+import pytest
+
+from conftest import project, PROJECTS
+
+
+class Selection:
+
+    def SelectCoarse(self, algorithm, coarse):
+        return [symbol for symbol in coarse if symbol % 2 == 0]
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_selections_count_the_symbols_they_return(name):
+    instrumentation = project(name).instrumentation.Instrumentation(algorithm=None)
+    selection = instrumentation.Instrument(Selection(), 'SelectCoarse')
+    # like LEAN's .NET IEnumerable, a generator has no len()
+    assert selection.SelectCoarse(None, (symbol for symbol in range(10))) == [0, 2, 4, 6, 8]
+    summary = instrumentation.Summary()['Selection.SelectCoarse']
+    assert summary['calls'] == 1 and summary['items'] == 5
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import project
+from harness.lean import (Insight, InsightDirection, OrderEvent, OrderStatus, QCAlgorithm, Security, SecurityChanges,
+                          Symbol, to_utc)
+
+
+PROJECTS = ('Dividend-Growth', 'Rule-of-40-with-SaaS')
+START = datetime(2015, 1, 5, 10)
+
+
+class Backtest:
+    ''' Drives a market cap portfolio model by hand: every target is filled at once at a price of 10. '''
+
+    def __init__(self, name):
+        self.algorithm = QCAlgorithm()
+        self.algorithm.SetCash(100_000_000)
+        self.model = project(name).portfolio.MarketCapWeightedPortfolioConstructionModel(maxWeight=1, minWeight=0)
+        self.time = START
+
+    def Add(self, ticker, marketCap):
+        security = Security(Symbol(ticker), fundamentals=SimpleNamespace(MarketCap=marketCap))
+        security.SetMarketPrice(self.time, 10)
+        self.algorithm.Securities[security.Symbol] = security
+        self.model.OnSecuritiesChanged(self.algorithm, SecurityChanges(added=[security]))
+        return security
+
+    def Remove(self, security):
+        self.model.OnSecuritiesChanged(self.algorithm, SecurityChanges(removed=[security]))
+
+    def Step(self, *securities):
+        self.time += timedelta(days=1)
+        self.algorithm.SetTime(self.time)
+        insights = [Insight.Price(security.Symbol, timedelta(30), InsightDirection.Up) for security in securities]
+        for insight in insights:
+            insight.SetPeriodAndCloseTime(to_utc(self.time))
+        targets = [target for target in self.model.CreateTargets(self.algorithm, insights) if target is not None]
+        for target in targets:
+            quantity = target.Quantity - self.algorithm.Portfolio[target.Symbol].Quantity
+            if quantity:
+                self.algorithm.Portfolio.Fill(target.Symbol, quantity, 10)
+                self.model.OnOrderEvent(self.algorithm, OrderEvent(target.Symbol, quantity, 10, OrderStatus.Filled, to_utc(self.time)))
+        return targets
+
+    def Invested(self):
+        portfolio = self.algorithm.Portfolio
+        return sum(holding.HoldingsValue for holding in portfolio.values())/portfolio.TotalPortfolioValue
+
+
+def start(name):
+    backtest = Backtest(name)
+    securities = [backtest.Add(f'S{i}', 1e10) for i in range(10)]
+    backtest.Step(*securities)
+    return backtest, securities
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_all_weights_are_reemitted_when_a_name_is_added(name):
+    backtest, securities = start(name)
+    investable = 1 - backtest.algorithm.Settings.FreePortfolioValuePercentage
+    assert backtest.Invested() == pytest.approx(investable, abs=1e-4)
+    # the new name moves every other weight by less than the drift band
+    added = backtest.Add('NEW', 2e9)
+    targets = backtest.Step(added)
+    assert len(targets) == len(securities) + 1
+    assert backtest.Invested() == pytest.approx(investable, abs=1e-4)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_all_weights_are_reemitted_when_a_name_is_removed(name):
+    backtest, securities = start(name)
+    added = backtest.Add('NEW', 2e9)
+    backtest.Step(added)
+    backtest.Remove(added)
+    # like the baseline model, the removal is handled with the next insight batch or wake-up
+    targets = backtest.Step(securities[0])
+    assert {target.Symbol for target in targets} == {security.Symbol for security in securities + [added]}
+    assert backtest.algorithm.Portfolio[added.Symbol].Quantity == 0
+    assert backtest.Invested() == pytest.approx(1 - backtest.algorithm.Settings.FreePortfolioValuePercentage, abs=1e-4)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_only_drifted_weights_are_emitted_while_the_names_stay_the_same(name):
+    backtest, securities = start(name)
+    backtest.algorithm.Portfolio.Fill(securities[0].Symbol, -backtest.algorithm.Portfolio[securities[0].Symbol].Quantity, 10)
+    backtest.model.OnOrderEvent(backtest.algorithm, OrderEvent(securities[0].Symbol, 0, 10, OrderStatus.Filled, to_utc(backtest.time)))
+    # a fresh insight for the same name wakes the model without changing the weighted names
+    targets = backtest.Step(securities[0])
+    assert [target.Symbol for target in targets] == [securities[0].Symbol]
@@ -0,0 +1,112 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import project, PROJECTS
+from harness.lean import (Insight, InsightDirection, OrderEvent, OrderStatus, QCAlgorithm, Security, SecurityChanges,
+                          SecurityType, Symbol)
+
+
+def three_branch_check(algorithm, insights):
+    ''' The per-insight Portfolio check PositionIndex.Disagrees replaces. '''
+    for insight in insights:
+        if insight.Direction != InsightDirection.Flat and not algorithm.Portfolio[insight.Symbol].Invested:
+            return True
+        elif insight.Direction != InsightDirection.Up and algorithm.Portfolio[insight.Symbol].IsLong:
+            return True
+        elif insight.Direction != InsightDirection.Down and algorithm.Portfolio[insight.Symbol].IsShort:
+            return True
+    return False
+
+
+class Holdings:
+
+    def __init__(self, name, tickers):
+        self.algorithm = QCAlgorithm()
+        self.index = project(name).positions.PositionIndex()
+        self.symbols = [Symbol(ticker) for ticker in tickers]
+        for symbol in self.symbols:
+            self.algorithm.Securities[symbol] = Security(symbol)
+        self.index.OnSecuritiesChanged(self.algorithm, SecurityChanges(added=self.algorithm.Securities.values()))
+
+    def Fill(self, symbol, quantity, status=OrderStatus.Filled):
+        self.algorithm.Portfolio.Fill(symbol, quantity, 10)
+        self.index.OnOrderEvent(self.algorithm, OrderEvent(symbol, quantity, 10, status, datetime(2015, 1, 5)))
+
+    def Agree(self, directions):
+        insights = [Insight.Price(symbol, timedelta(1), direction) for symbol, direction in zip(self.symbols, directions)]
+        return self.index.Disagrees(insights) == three_branch_check(self.algorithm, insights)
+
+
+DIRECTIONS = list(InsightDirection)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_flat_long_short_partial_fill_and_flip(name):
+    holdings = Holdings(name, ['A'])
+    symbol = holdings.symbols[0]
+    for step in [(0, None), (40, OrderStatus.PartiallyFilled), (60, OrderStatus.Filled), (-100, OrderStatus.Filled),
+                 (-30, OrderStatus.PartiallyFilled), (80, OrderStatus.Filled), (-150, OrderStatus.Filled)]:
+        quantity, status = step
+        if status is not None:
+            holdings.Fill(symbol, quantity, status)
+        for direction in DIRECTIONS:
+            assert holdings.Agree([direction])
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+@pytest.mark.parametrize('seed', range(20))
+def test_random_fills_agree_with_the_three_branch_check(name, seed):
+    rng = random.Random(seed)
+    holdings = Holdings(name, [f'S{i}' for i in range(5)])
+    for _ in range(50):
+        symbol = rng.choice(holdings.symbols)
+        held = holdings.algorithm.Portfolio[symbol].Quantity
+        quantity = rng.choice([rng.randint(-50, 50), -held, -2*held])
+        if quantity:
+            holdings.Fill(symbol, quantity, rng.choice([OrderStatus.Filled, OrderStatus.PartiallyFilled]))
+        for _ in range(5):
+            assert holdings.Agree([rng.choice(DIRECTIONS) for _ in holdings.symbols])
+
+
+class ContractSymbol(Symbol):
+    ''' A mapped futures contract, which the harness itself never trades. '''
+    __slots__ = ('canonical',)
+
+    def __init__(self, ticker, canonical):
+        super().__init__(ticker, SecurityType.Future, idTicker=ticker)
+        self.canonical = canonical
+
+    @property
+    def Canonical(self):
+        return self.canonical
+
+    def IsCanonical(self):
+        return False
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_contract_fills_are_kept_under_the_canonical_symbol(name):
+    algorithm = QCAlgorithm()
+    index = project(name).positions.PositionIndex()
+    canonical = Symbol('GC', SecurityType.Future)
+    front, back = ContractSymbol('GC15G', canonical), ContractSymbol('GC15J', canonical)
+    for symbol in (canonical, front, back):
+        algorithm.Securities[symbol] = Security(symbol)
+
+    def fill(symbol, quantity):
+        algorithm.Portfolio.Fill(symbol, quantity, 10)
+        index.OnOrderEvent(algorithm, OrderEvent(symbol, quantity, 10, OrderStatus.Filled, datetime(2015, 1, 5)))
+
+    up = [Insight.Price(canonical, timedelta(1), InsightDirection.Up)]
+    fill(front, 3)
+    assert not index.Disagrees(up) and front not in index
+    # a roll that opens the new contract before closing the old one
+    fill(back, 3)
+    fill(front, -3)
+    assert not index.Disagrees(up)
+    index.OnSecuritiesChanged(algorithm, SecurityChanges(added=[algorithm.Securities[canonical]]))
+    assert not index.Disagrees(up)
+    fill(back, -5)
+    assert index.Disagrees(up) and not index.Disagrees([Insight.Price(canonical, timedelta(1), InsightDirection.Down)])
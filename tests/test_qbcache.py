@@ -0,0 +1,133 @@
+import os
+from datetime import date, datetime, time
+
+import pandas as pd
+import pytest
+
+from conftest import project
+from harness import Resolution, SyntheticMarket
+from harness.research import QuantBook
+
+
+FIELD = 'ValuationRatios.FCFYield'
+
+
+class RecordingQuantBook(QuantBook):
+    ''' Research stand-in that records the ranges it was asked for. '''
+
+    def __init__(self, market):
+        super().__init__(market)
+        self.requests = []
+
+    def GetFundamental(self, symbols, field, start, end):
+        self.requests.append(('GetFundamental', len(symbols), start, end))
+        return super().GetFundamental(symbols, field, start, end)
+
+    def History(self, symbols, start, end, resolution=Resolution.Daily):
+        self.requests.append(('History', len(symbols), start, end))
+        return super().History(symbols, start, end, resolution)
+
+
+@pytest.fixture(scope='module')
+def market():
+    return SyntheticMarket(datetime(2015, 1, 1), datetime(2018, 12, 31), nEquities=5, futures=(), indices=())
+
+
+@pytest.fixture
+def qb(market):
+    return RecordingQuantBook(market)
+
+
+def cache(qb, directory, **kwargs):
+    return project('Rule-of-40-with-SaaS').qbcache.QuantBookCache(qb, str(directory), **kwargs)
+
+
+# the cache keeps times as datetime64[ns] and the stand-in returns datetime64[s], so indexes are compared by value
+
+def test_fundamentals_match_the_quantbook(qb, tmp_path):
+    symbols = qb.market.symbols
+    cached = cache(qb, tmp_path).GetFundamental(symbols, FIELD, datetime(2016, 1, 1), datetime(2017, 1, 1))
+    pd.testing.assert_frame_equal(cached, qb.GetFundamental(symbols, FIELD, datetime(2016, 1, 1), datetime(2017, 1, 1)),
+                                  check_names=False, check_freq=False, check_index_type=False)
+
+
+def test_partial_overlap_fetches_the_gaps_in_one_request(qb, tmp_path):
+    symbols, quantBookCache = qb.market.symbols, cache(qb, tmp_path)
+    quantBookCache.GetFundamental(symbols, FIELD, datetime(2016, 1, 1), datetime(2016, 6, 1))
+    quantBookCache.GetFundamental(symbols, FIELD, datetime(2016, 9, 1), datetime(2017, 1, 1))
+    qb.requests.clear()
+    cached = quantBookCache.GetFundamental(symbols, FIELD, datetime(2015, 7, 1), datetime(2017, 6, 1))
+    # the gaps before, between and after the cached ranges come in one request from the first to the last
+    assert qb.requests == [('GetFundamental', len(symbols), datetime(2015, 7, 1), datetime(2017, 6, 1))]
+    expected = QuantBook(qb.market).GetFundamental(symbols, FIELD, datetime(2015, 7, 1), datetime(2017, 6, 1))
+    pd.testing.assert_frame_equal(cached, expected, check_names=False, check_freq=False, check_index_type=False)
+    qb.requests.clear()
+    quantBookCache.GetFundamental(symbols, FIELD, datetime(2016, 2, 1), datetime(2017, 2, 1))
+    assert qb.requests == []
+
+
+def test_symbols_missing_other_ranges_are_fetched_apart(qb, tmp_path):
+    symbols, quantBookCache = qb.market.symbols, cache(qb, tmp_path)
+    quantBookCache.GetFundamental(symbols[:2], FIELD, datetime(2016, 1, 1), datetime(2017, 1, 1))
+    qb.requests.clear()
+    quantBookCache.GetFundamental(symbols, FIELD, datetime(2016, 1, 1), datetime(2017, 6, 1))
+    assert sorted(qb.requests) == [('GetFundamental', 2, datetime(2017, 1, 1), datetime(2017, 6, 1)),
+                                   ('GetFundamental', len(symbols) - 2, datetime(2016, 1, 1), datetime(2017, 6, 1))]
+
+
+def test_open_ended_ranges_stop_at_the_last_completed_bar(qb, tmp_path):
+    symbols, quantBookCache = qb.market.symbols[:2], cache(qb, tmp_path)
+    today = datetime.combine(date.today(), time())
+    quantBookCache.GetFundamental(symbols, FIELD, datetime(2018, 6, 1), datetime.now())
+    quantBookCache.History(symbols, datetime(2018, 6, 1), datetime.now(), Resolution.Daily)
+    assert [request[3] for request in qb.requests] == [today, today]
+    qb.requests.clear()
+    quantBookCache.GetFundamental(symbols, FIELD, datetime(2018, 6, 1), datetime.now())
+    quantBookCache.History(symbols, datetime(2018, 6, 1), datetime.now(), Resolution.Daily)
+    assert qb.requests == []
+
+
+def test_history_matches_the_quantbook_across_fetches(qb, tmp_path):
+    symbols, quantBookCache = qb.market.symbols[:2], cache(qb, tmp_path)
+    quantBookCache.History(symbols, datetime(2016, 3, 1), datetime(2016, 9, 1), Resolution.Daily)
+    cached = quantBookCache.History(symbols, datetime(2016, 1, 1), datetime(2017, 1, 1), Resolution.Daily)
+    expected = QuantBook(qb.market).History(symbols, datetime(2016, 1, 1), datetime(2017, 1, 1), Resolution.Daily)
+    pd.testing.assert_frame_equal(cached.sort_index(), expected.sort_index(), check_names=False, check_freq=False, check_index_type=False)
+
+
+def test_entries_persist_across_instances(qb, tmp_path):
+    symbols = qb.market.symbols
+    first = cache(qb, tmp_path).GetFundamental(symbols, FIELD, datetime(2016, 1, 1), datetime(2017, 1, 1))
+    qb.requests.clear()
+    second = cache(qb, tmp_path).GetFundamental(symbols, FIELD, datetime(2016, 1, 1), datetime(2017, 1, 1))
+    assert qb.requests == []
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_least_recently_used_entries_are_evicted_first(qb, tmp_path):
+    s0, s1, s2 = qb.market.symbols[:3]
+    start, end = datetime(2016, 1, 1), datetime(2017, 1, 1)
+    probe = cache(qb, tmp_path / 'probe')
+    probe.GetFundamental([s0], FIELD, start, end)
+    entryBytes = next(iter(probe.entries.values()))['bytes']
+
+    quantBookCache = cache(qb, tmp_path / 'lru', maxBytes=2*entryBytes)
+    key = lambda symbol: quantBookCache.EntryKey('fundamental', FIELD, symbol)
+    for symbol in (s0, s1, s2):
+        quantBookCache.GetFundamental([symbol], FIELD, start, end)
+    assert set(quantBookCache.entries) == {key(s1), key(s2)}
+    assert not os.path.exists(quantBookCache.Path(key(s0), 'times'))
+
+    quantBookCache.GetFundamental([s1], FIELD, start, end)
+    qb.requests.clear()
+    quantBookCache.GetFundamental([s0], FIELD, start, end)
+    assert [request[0] for request in qb.requests] == ['GetFundamental']
+    assert set(quantBookCache.entries) == {key(s0), key(s1)}
+    assert set(cache(qb, tmp_path / 'lru', maxBytes=2*entryBytes).entries) == {key(s0), key(s1)}
+
+
+def test_an_oversized_query_keeps_its_own_entries(qb, tmp_path):
+    symbols = qb.market.symbols
+    quantBookCache = cache(qb, tmp_path, maxBytes=1)
+    cached = quantBookCache.GetFundamental(symbols, FIELD, datetime(2016, 1, 1), datetime(2017, 1, 1))
+    assert len(quantBookCache.entries) == len(symbols) and cached.shape[1] == len(symbols)
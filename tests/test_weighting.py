@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from conftest import project
+
+
+PROJECTS = ('Dividend-Growth', 'Rule-of-40-with-SaaS')
+BOUNDS = [(0., 1.), (0., .1), (.01, .1), (.02, .05), (.005, .2)]
+
+
+def engine(name, maxWeight, minWeight):
+    # exact weights: rounding is checked separately
+    return project(name).weighting.MarketCapWeightingEngine(maxWeight, minWeight, decimals=18)
+
+
+def random_caps(seed, n=40):
+    return np.random.default_rng(seed).lognormal(22, 2, n)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+@pytest.mark.parametrize('minWeight, maxWeight', BOUNDS)
+@pytest.mark.parametrize('seed', range(10))
+def test_weights_are_fully_invested_and_bounded(name, minWeight, maxWeight, seed):
+    caps = random_caps(seed)
+    weights = engine(name, maxWeight, minWeight).Weights(caps, np.ones(len(caps)))
+    assert weights.sum() == pytest.approx(1, abs=1e-9)
+    assert weights.min() >= minWeight - 1e-12 and weights.max() <= maxWeight + 1e-12
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+@pytest.mark.parametrize('minWeight, maxWeight', BOUNDS)
+@pytest.mark.parametrize('seed', range(10))
+def test_unclipped_weights_are_proportional_to_market_cap(name, minWeight, maxWeight, seed):
+    caps = random_caps(seed)
+    weights = engine(name, maxWeight, minWeight).Weights(caps, np.ones(len(caps)))
+    free = (weights > minWeight + 1e-12) & (weights < maxWeight - 1e-12)
+    if free.any():
+        np.testing.assert_allclose(weights[free]/caps[free], (weights[free]/caps[free])[0], rtol=1e-9)
+    # clipping keeps the cap order
+    order = np.argsort(caps)
+    assert np.all(np.diff(weights[order]) >= -1e-12)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_without_binding_bounds_weights_are_cap_shares(name):
+    caps = np.array([1., 2., 3., 4.])
+    np.testing.assert_allclose(engine(name, 1, 0).Weights(caps, np.ones(4)), caps/caps.sum())
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_infeasible_bounds(name):
+    caps = np.array([1., 2., 3., 4.])
+    # maxWeight too small to invest everything: every name at maxWeight
+    np.testing.assert_allclose(engine(name, .2, 0).Weights(caps, np.ones(4)), .2)
+    # minWeight too large to fit: equal weights
+    np.testing.assert_allclose(engine(name, 1, .3).Weights(caps, np.ones(4)), .25)
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_only_long_insights_with_a_market_cap_get_weight(name):
+    caps = np.array([1., 2., 0., 4., 5.])
+    directions = np.array([1, -1, 1, 0, 1])
+    weights = engine(name, 1, 0).Weights(caps, directions)
+    assert weights[[1, 2, 3]].tolist() == [0, 0, 0]
+    np.testing.assert_allclose(weights[[0, 4]], [1/6, 5/6])
+
+
+@pytest.mark.parametrize('name', PROJECTS)
+def test_weights_are_rounded(name):
+    weights = project(name).weighting.MarketCapWeightingEngine(1, 0).Weights([1., 1., 1.], [1, 1, 1])
+    assert weights.tolist() == [.33333]*3
@@ -1,17 +1,31 @@
 from selection import DividendGrowthSelectionModel
 from portfolio import MarketCapWeightedPortfolioConstructionModel
+from instrumentation import Instrumentation
 
 class DividendGrowthRateStrategy(QCAlgorithm):
 
     def Initialize(self):
         self.SetStartDate(2010, 1, 1)  
         self.SetCash(1_000_000)  
-        self.UniverseSettings.Resolution = Resolution.Minute
-        self.AddUniverseSelection(DividendGrowthSelectionModel())
-        self.AddAlpha(ConstantAlphaModel(InsightType.Price, InsightDirection.Up, timedelta(30)))
+        self.UniverseSettings.Resolution = Resolution.Daily
+        self.instrumentation = Instrumentation(self, enabled=self.GetParameter('instrumentation', 0) == 1)
+        self.AddUniverseSelection(self.instrumentation.Instrument(DividendGrowthSelectionModel(), 'SelectCoarse', 'SelectFine'))
+        self.AddAlpha(ConstantAlphaModel(InsightType.Price, InsightDirection.Up, timedelta(self.GetParameter('insightDays', 30))))
         self.Settings.RebalancePortfolioOnInsightChanges = False
         self.Settings.RebalancePortfolioOnSecurityChanges = True
-        self.SetPortfolioConstruction(MarketCapWeightedPortfolioConstructionModel())
+        self.portfolioModel = portfolioModel = MarketCapWeightedPortfolioConstructionModel(maxWeight=self.GetParameter('maxWeight', .1),
+                                                                     minWeight=self.GetParameter('minWeight', 0.),
+                                                                     absoluteBand=self.GetParameter('absoluteBand', .005),
+                                                                     relativeBand=self.GetParameter('relativeBand', .1))
+        self.SetPortfolioConstruction(self.instrumentation.Instrument(portfolioModel, 'CreateTargets', 'OnSecuritiesChanged'))
+        
+        
+    def OnOrderEvent(self, orderEvent):
+        self.portfolioModel.OnOrderEvent(self, orderEvent)
+        
+        
+    def OnEndOfAlgorithm(self):
+        self.instrumentation.Save()
         
 
 
@@ -0,0 +1,44 @@
+class PositionIndex:
+    ''' Long (1) / short (-1) state of the held symbols, flat ones are left out, refreshed from the holdings on fills and
+        security changes. It is only right if the algorithm forwards every OnOrderEvent to the portfolio model.
+    '''
+
+    def __init__(self):
+        self.directions = {}
+        self.contracts = {}
+
+
+    def __contains__(self, symbol):
+        return symbol in self.directions
+
+
+    def Refresh(self, algorithm, symbol):
+        if symbol.SecurityType == SecurityType.Future and not symbol.IsCanonical():
+            # a continuous future fills on its mapped contract but gets its insights on the canonical symbol
+            contracts = self.contracts.setdefault(symbol.Canonical, {})
+            contracts[symbol] = algorithm.Portfolio[symbol].Quantity
+            if contracts[symbol] == 0:
+                del contracts[symbol]
+            symbol = symbol.Canonical
+        quantity = algorithm.Portfolio[symbol].Quantity + sum(self.contracts.get(symbol, {}).values())
+        if quantity == 0:
+            self.directions.pop(symbol, None)
+        else:
+            self.directions[symbol] = 1 if quantity > 0 else -1
+
+
+    def OnOrderEvent(self, algorithm, orderEvent):
+        if orderEvent.Status in (OrderStatus.Filled, OrderStatus.PartiallyFilled):
+            self.Refresh(algorithm, orderEvent.Symbol)
+
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        # added names may already be held, removed ones stay tracked until their liquidation fills
+        for security in changes.AddedSecurities:
+            self.Refresh(algorithm, security.Symbol)
+
+
+    def Disagrees(self, insights):
+        ''' True if any insight is not held the way it points: Up not long, Down not short, Flat not flat. '''
+        mismatched = {(insight.Symbol, int(insight.Direction)) for insight in insights} - self.directions.items()
+        return any(direction != 0 or symbol in self.directions for symbol, direction in mismatched)
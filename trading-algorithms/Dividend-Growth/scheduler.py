@@ -0,0 +1,24 @@
+from datetime import datetime
+import pytz
+
+
+class RebalanceScheduler:
+    ''' Next time a portfolio model has work to do without new insights: the earliest close time left
+        in the InsightStore's expiry heap or, with no insight alive, rebalanceFreq after the last
+        rebalance. It only moves when the model has run, so between wake-ups every slice costs one
+        comparison against wakeTime.
+    '''
+
+    def __init__(self, insightStore, rebalanceFreq):
+        self.insightStore = insightStore
+        self.rebalanceFreq = rebalanceFreq
+        self.wakeTime = datetime.min.replace(tzinfo=pytz.utc)
+
+
+    def Due(self, utcTime):
+        return utcTime > self.wakeTime
+
+
+    def Reschedule(self, utcTime):
+        nextExpiryTime = self.insightStore.GetNextExpiryTime()
+        self.wakeTime = nextExpiryTime if nextExpiryTime is not None else utcTime + self.rebalanceFreq
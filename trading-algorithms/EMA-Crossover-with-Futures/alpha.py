@@ -1,47 +1,180 @@
 
+import time as timer
+from ema import MultiSymbolEma
+
+
 class EmaCrossoverAlphaModel(AlphaModel):
+    ''' fastDays/slowDays EMA crossover (10/50 days, tol band of 1% by default). The EMAs run on minute trade bars, as algorithm.EMA does,
+        or on hourly/daily trade bars consolidated from the minute subscription (resolution), with periods scaled to the same number of days.
+        Signals are evaluated once a day per exchange calendar, from a scheduled event a minute after its open (default),
+        or whenever a symbol's EMAs step (evaluateOnBar). Minute EMAs still step on every slice; only the consolidated
+        resolutions leave slices without a new bar to a dictionary check. The time spent in Update is tracked per slice.
+        Signal charts go through `charts` (a ChartBuffer) when given, straight to algorithm.Plot otherwise;
+        their scheduled updates are timed by `instrumentation` when given.
+    '''
     
-    def __init__(self):
+    def __init__(self, resolution=Resolution.Minute, evaluateOnBar=False, charts=None, fastDays=10, slowDays=50, tol=.01, instrumentation=None):
         self.symbolDataDict = {}
-        self.date = None
+        self.charts = charts
+        self.instrumentation = instrumentation
+        self.fastDays = fastDays
+        self.slowDays = slowDays
+        self.tol = tol
+        self.ema = MultiSymbolEma(lanes=2)
+        self.resolution = resolution
+        self.evaluateOnBar = evaluateOnBar
+        self.consolidatedCloses = {}
+        self.symbolsByHours = {}
+        self.evaluationEvents = {}
+        self.dueSymbols = {}
+        self.sliceCount = 0
+        self.sliceSeconds = 0.
     
     def Update(self, algorithm, data):
+        started = timer.perf_counter()
+        updated = self.UpdateIndicators(data)
         insights = []
-        if self.date == algorithm.Time.date():
-            return insights
-        self.date = algorithm.Time.date()
+        if self.evaluateOnBar:
+            for symbol, symbolData in self.symbolDataDict.items():
+                if symbolData.Security.HasData and symbol in updated:
+                    insights.append(symbolData.CreateInsight())
+        elif self.dueSymbols:
+            insights = self.Evaluate(data)
+        self.sliceCount += 1
+        self.sliceSeconds += timer.perf_counter() - started
+        return insights
         
-        for symbol, symbolData in self.symbolDataDict.items():
-            if symbolData.Security.HasData and symbol in data.QuoteBars:
-                insight = symbolData.CreateInsight()
-                insights.append(insight)
+    
+    def OnMarketOpen(self, hours):
+        self.dueSymbols.update(dict.fromkeys(self.symbolsByHours.get(hours, ())))
+        
+    
+    def Evaluate(self, data):
+        # a due symbol is evaluated at the first slice with a bar for it
+        insights = []
+        for symbol in [symbol for symbol in self.dueSymbols if symbol in data.QuoteBars]:
+            del self.dueSymbols[symbol]
+            symbolData = self.symbolDataDict[symbol]
+            if symbolData.Security.HasData:
+                insights.append(symbolData.CreateInsight())
         return insights
         
+    
+    def OverheadReport(self):
+        perSlice = self.sliceSeconds/self.sliceCount if self.sliceCount else 0
+        return f'{self.__class__.__name__}: {self.sliceCount} slices, {perSlice*1e6:.1f} us per slice, {self.sliceSeconds:.2f}s in Update'
+        
+    
+    def UpdateIndicators(self, data):
+        # one vectorized step for the fast and slow EMAs of every symbol with a new bar; returns those symbols
+        if self.resolution == Resolution.Minute:
+            closes = data.Bars
+            if self.ema.symbols:
+                self.ema.Update([closes[symbol].Close if symbol in closes else None for symbol in self.ema.symbols])
+            return closes
+        if not self.consolidatedCloses:
+            return self.consolidatedCloses
+        closes, self.consolidatedCloses = self.consolidatedCloses, {}
+        self.ema.Update([closes.get(symbol) for symbol in self.ema.symbols])
+        return closes
+        
+    
+    def OnDataConsolidated(self, sender, bar):
+        self.consolidatedCloses[bar.Symbol] = bar.Close
         
     
     def OnSecuritiesChanged(self, algorithm, changes):
         for security in changes.RemovedSecurities:
-            self.symbolDataDict.pop(security.Symbol, None)
+            symbolData = self.symbolDataDict.pop(security.Symbol, None)
+            if symbolData is not None:
+                self.ema.Remove(security.Symbol)
+                self.dueSymbols.pop(security.Symbol, None)
+                if symbolData.consolidator is not None:
+                    algorithm.SubscriptionManager.RemoveConsolidator(security.Symbol, symbolData.consolidator)
+                self.UnscheduleEvaluation(algorithm, security.Symbol)
             
         for security in changes.AddedSecurities:
             if security.Symbol not in self.symbolDataDict:
-                self.symbolDataDict[security.Symbol] = SymbolData(algorithm, security.Symbol)
+                symbolData = SymbolData(algorithm, security.Symbol, self.ema, self.resolution, self.charts, self.fastDays, self.slowDays, self.tol, self.instrumentation)
+                if self.resolution != Resolution.Minute:
+                    symbolData.Consolidate(self.OnDataConsolidated)
+                self.symbolDataDict[security.Symbol] = symbolData
+                if algorithm.Settings.EnableAutomaticIndicatorWarmUp:
+                    symbolData.WarmUp()
+                if not self.evaluateOnBar:
+                    self.ScheduleEvaluation(algorithm, security.Symbol)
+        
+    
+    def ScheduleEvaluation(self, algorithm, symbol):
+        # one evaluation event per exchange calendar: symbols share LEAN's exchange hours object when they share
+        # a market hours entry, so the first symbol's open is every grouped symbol's open
+        hours = algorithm.Securities[symbol].Exchange.Hours
+        if hours not in self.symbolsByHours:
+            self.symbolsByHours[hours] = []
+            self.evaluationEvents[hours] = algorithm.Schedule.On(algorithm.DateRules.EveryDay(symbol),
+                                                                 algorithm.TimeRules.AfterMarketOpen(symbol, 1),
+                                                                 lambda: self.OnMarketOpen(hours))
+        self.symbolsByHours[hours].append(symbol)
+        
+    
+    def UnscheduleEvaluation(self, algorithm, symbol):
+        hours = algorithm.Securities[symbol].Exchange.Hours
+        symbols = self.symbolsByHours.get(hours, [])
+        if symbol in symbols:
+            symbols.remove(symbol)
+        if not symbols and hours in self.evaluationEvents:
+            algorithm.Schedule.Remove(self.evaluationEvents.pop(hours))
+            self.symbolsByHours.pop(hours, None)
         
       
 
 class SymbolData:
     
-    def __init__(self, algorithm, symbol):
+    def __init__(self, algorithm, symbol, ema, resolution=Resolution.Minute, charts=None, fastDays=10, slowDays=50, tol=.01, instrumentation=None):
         self.algorithm = algorithm
+        self.Plot = charts.Plot if charts is not None else algorithm.Plot
         self.Symbol = symbol
         self.Security = algorithm.Securities[symbol]
-        barsPerDay = self.Security.Exchange.Hours.RegularMarketDuration.seconds/Extensions.ToTimeSpan(Resolution.Minute).seconds
-        periodFast, periodSlow = [int(barsPerDay*10), int(barsPerDay*50)]
-        self.fast = algorithm.EMA(symbol, periodFast, Resolution.Minute)
-        self.slow = algorithm.EMA(symbol, periodSlow, Resolution.Minute)
-        self.tol = .01
+        self.resolution = resolution
+        self.consolidator = None
+        if resolution == Resolution.Daily:
+            barsPerDay = 1
+        else:
+            barsPerDay = self.Security.Exchange.Hours.RegularMarketDuration.total_seconds()/Extensions.ToTimeSpan(resolution).total_seconds()
+        self.periodFast, self.periodSlow = [int(barsPerDay*fastDays), int(barsPerDay*slowDays)]
+        self.ema = ema
+        self.ema.Add(symbol, self.periodFast, self.periodSlow)
+        self.tol = tol
         self.futureName = symbol.ID.ToString().split()[0]
-        self.scheduledEvent = algorithm.Schedule.On(algorithm.DateRules.EveryDay(symbol), algorithm.TimeRules.At(12,0), self.UpdateCharts )
+        updateCharts = instrumentation.Wrap('SymbolData.UpdateCharts', self.UpdateCharts) if instrumentation is not None else self.UpdateCharts
+        self.scheduledEvent = algorithm.Schedule.On(algorithm.DateRules.EveryDay(symbol), algorithm.TimeRules.At(12,0), updateCharts)
+    
+    def Consolidate(self, handler):
+        self.consolidator = TradeBarConsolidator(Extensions.ToTimeSpan(self.resolution))
+        self.consolidator.DataConsolidated += handler
+        self.algorithm.SubscriptionManager.AddConsolidator(self.Symbol, self.consolidator)
+    
+    
+    def WarmUp(self):
+        history = self.algorithm.History(self.Symbol, self.periodSlow, self.resolution)
+        if not history.empty:
+            self.ema.WarmUp(self.Symbol, history.close.to_numpy())
+    
+    
+    @property
+    def Fast(self):
+        return self.ema.Values(self.Symbol)[0]
+    
+    
+    @property
+    def Slow(self):
+        return self.ema.Values(self.Symbol)[1]
+    
+    
+    @property
+    def IsReady(self):
+        return self.ema.IsReady(self.Symbol, 1)
+    
     
     def CreateInsight(self):
         return Insight.Price(self.Symbol, timedelta(2), self.InsightDirection)
@@ -49,21 +182,22 @@ class SymbolData:
     
     @property 
     def InsightDirection(self):
-        if not self.slow.IsReady:
+        if not self.IsReady:
             return InsightDirection.Flat
-        if self.fast.Current.Value > self.slow.Current.Value*(1 + self.tol):
+        fast, slow = self.ema.Values(self.Symbol)
+        if fast > slow*(1 + self.tol):
             return InsightDirection.Up
-        elif self.fast.Current.Value < self.slow.Current.Value*(1 - self.tol):
+        elif fast < slow*(1 - self.tol):
             return InsightDirection.Down
         else:
             return InsightDirection.Flat
 
     
     def UpdateCharts(self):
-        if (self.Security.HasData and self.slow.IsReady):
-            self.algorithm.Plot('Signals ' + self.futureName, 'Price', self.Security.Close)
-            self.algorithm.Plot('Signals ' + self.futureName, 'FastEMA', self.fast.Current.Value)
-            self.algorithm.Plot('Signals ' + self.futureName, 'SlowEMA', self.slow.Current.Value)
+        if (self.Security.HasData and self.IsReady):
+            self.Plot('Signals ' + self.futureName, 'Price', self.Security.Close)
+            self.Plot('Signals ' + self.futureName, 'FastEMA', self.Fast)
+            self.Plot('Signals ' + self.futureName, 'SlowEMA', self.Slow)
             
         
         
@@ -0,0 +1,128 @@
+import math
+from datetime import datetime, timedelta
+import numpy as np
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class SeriesBuffer:
+    __slots__ = ('series', 'times', 'values', 'count')
+
+    def __init__(self, series, capacity=256):
+        self.series = series
+        self.times = np.empty(capacity)
+        self.values = np.empty(capacity)
+        self.count = 0
+
+    def Append(self, time, value):
+        if self.count == len(self.times):
+            self.times = np.concatenate((self.times, np.empty_like(self.times)))
+            self.values = np.concatenate((self.values, np.empty_like(self.values)))
+        self.times[self.count] = time
+        self.values[self.count] = value
+        self.count += 1
+
+
+
+class ChartBuffer:
+    ''' Buffers plot points and flushes them to the charts downsampled to maxPoints per backtest. '''
+
+    def __init__(self, algorithm, maxPoints=4000, flushInterval=timedelta(90), method='lttb'):
+        if method not in ('lttb', 'minmax'):
+            raise ValueError(f"unknown downsampling method {method!r}, expected 'lttb' or 'minmax'")
+        self.algorithm = algorithm
+        self.maxPoints = maxPoints
+        self.flushInterval = flushInterval
+        self.method = method
+        self.charts = {}
+        self.buffers = {}
+        self.nextFlushTime = None
+        self.pointsPerFlush = None
+
+
+    def AddSeries(self, chartName, series):
+        ''' Plot into this Series (to keep its type and unit) rather than a default line series. '''
+        self.GetChart(chartName).AddSeries(series)
+        self.buffers[(chartName, series.Name)] = SeriesBuffer(series)
+
+
+    def GetChart(self, chartName):
+        chart = self.charts.get(chartName)
+        if chart is None:
+            chart = self.charts[chartName] = Chart(chartName)
+            self.algorithm.AddChart(chart)
+        return chart
+
+
+    def Plot(self, chartName, seriesName, value):
+        buffer = self.buffers.get((chartName, seriesName))
+        if buffer is None:
+            series = Series(seriesName)
+            self.GetChart(chartName).AddSeries(series)
+            buffer = self.buffers[(chartName, seriesName)] = SeriesBuffer(series)
+        utcTime = self.algorithm.UtcTime.replace(tzinfo=None)
+        if self.nextFlushTime is None:
+            self.nextFlushTime = utcTime + self.flushInterval
+        elif utcTime >= self.nextFlushTime:
+            self.Flush()
+            self.nextFlushTime = utcTime + self.flushInterval
+        buffer.Append((utcTime - EPOCH).total_seconds(), value)
+
+
+    def Flush(self):
+        if self.pointsPerFlush is None:
+            self.pointsPerFlush = self.PointsPerFlush()
+        for buffer in self.buffers.values():
+            if buffer.count == 0:
+                continue
+            times, values = buffer.times[:buffer.count], buffer.values[:buffer.count]
+            index = self.Downsample(times, values, self.pointsPerFlush)
+            for time, value in zip(times[index].tolist(), values[index].tolist()):
+                buffer.series.AddPoint(EPOCH + timedelta(seconds=time), value)
+            buffer.count = 0
+
+
+    def PointsPerFlush(self):
+        algorithm = self.algorithm
+        end = algorithm.EndDate or algorithm.Time
+        flushes = max(1, math.ceil((end - algorithm.StartDate)/self.flushInterval))
+        return max(4, self.maxPoints//flushes)
+
+
+    def Downsample(self, times, values, n):
+        if len(values) <= n:
+            return np.arange(len(values))
+        if self.method == 'minmax':
+            return self.MinMaxIndices(values, n)
+        return self.LttbIndices(times, values, n)
+
+
+    @staticmethod
+    def MinMaxIndices(values, n):
+        ''' The first and last index and those of the minimum and maximum of (n - 2)//2 equal buckets, in time order. '''
+        edges = np.linspace(1, len(values) - 1, max(1, (n - 2)//2) + 1).astype(int)
+        indices = {0, len(values) - 1}
+        for start, end in zip(edges[:-1], edges[1:]):
+            if end > start:
+                bucket = values[start:end]
+                indices.update((start + int(bucket.argmin()), start + int(bucket.argmax())))
+        return np.array(sorted(indices))
+
+
+    @staticmethod
+    def LttbIndices(times, values, n):
+        ''' Largest-Triangle-Three-Buckets downsampling to n points. '''
+        edges = np.linspace(1, len(values) - 1, n - 1).astype(int)
+        indices = np.empty(n, dtype=np.intp)
+        indices[0], indices[-1] = 0, len(values) - 1
+        previous = 0
+        for i in range(n - 2):
+            start, end = edges[i], edges[i + 1]
+            nextStart, nextEnd = end, edges[i + 2] if i + 2 < len(edges) else len(values)
+            meanTime, meanValue = times[nextStart:nextEnd].mean(), values[nextStart:nextEnd].mean()
+            areas = np.abs((times[previous] - meanTime)*(values[start:end] - values[previous])
+                           - (times[previous] - times[start:end])*(meanValue - values[previous]))
+            previous = start + int(areas.argmax())
+            indices[i + 1] = previous
+        return indices
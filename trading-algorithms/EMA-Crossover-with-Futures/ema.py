@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class MultiSymbolEma:
+    ''' Several exponential moving averages per symbol, for all symbols at once, in NumPy arrays.
+        Follows LEAN's EMA: the first sample seeds the average, k = 2/(period + 1),
+        and an average is ready once it has seen `period` samples.
+    '''
+
+    def __init__(self, lanes=2, capacity=8):
+        self.lanes = lanes
+        self.rowBySymbol = {}
+        self.symbols = []
+        self.periods = np.zeros((capacity, lanes), dtype=np.int64)
+        self.k = np.zeros((capacity, lanes))
+        self.values = np.zeros((capacity, lanes))
+        self.samples = np.zeros((capacity, lanes), dtype=np.int64)
+        self.seeded = True
+
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+    def __contains__(self, symbol):
+        return symbol in self.rowBySymbol
+
+
+    def Add(self, symbol, *periods):
+        if symbol in self.rowBySymbol:
+            return self.rowBySymbol[symbol]
+        row = len(self.symbols)
+        if row == len(self.samples):
+            self.periods, self.k, self.values, self.samples = (np.concatenate((array, np.zeros_like(array)))
+                                                               for array in (self.periods, self.k, self.values, self.samples))
+        self.rowBySymbol[symbol] = row
+        self.symbols.append(symbol)
+        self.periods[row] = periods
+        self.k[row] = 2/(np.asarray(periods) + 1)
+        self.values[row] = 0
+        self.samples[row] = 0
+        self.seeded = False
+        return row
+
+
+    def Remove(self, symbol):
+        # move the last row into the freed one so live rows stay contiguous
+        row = self.rowBySymbol.pop(symbol, None)
+        if row is None:
+            return
+        last = len(self.symbols) - 1
+        if row != last:
+            moved = self.symbols[last]
+            self.symbols[row] = moved
+            self.rowBySymbol[moved] = row
+            for array in (self.periods, self.k, self.values, self.samples):
+                array[row] = array[last]
+        self.symbols.pop()
+        self.seeded = bool(self.samples[:len(self.symbols)].all())
+
+
+    def Update(self, closes):
+        ''' One step for every symbol; `closes` follows self.symbols, with None where a symbol has no bar. '''
+        n = len(self.symbols)
+        values, samples = self.values[:n], self.samples[:n]
+        if self.seeded and None not in closes:
+            values += self.k[:n]*(np.array(closes, dtype=float)[:, None] - values)
+            samples += 1
+            return
+        hasBar = np.array([close is not None for close in closes], dtype=bool)[:, None]
+        closes = np.array([np.nan if close is None else close for close in closes], dtype=float)[:, None]
+        values[...] = np.where(hasBar, np.where(samples > 0, values + self.k[:n]*(closes - values), closes), values)
+        samples += hasBar
+        self.seeded = bool(samples.all())
+
+
+    def WarmUp(self, symbol, closes):
+        ''' Replay a history of closes (oldest first) in one shot with the closed form of the recursion:
+            after samples x_0..x_{n-1} the average is (1-k)^(n-1) x_0 + sum_{i>0} k (1-k)^(n-1-i) x_i.
+            Like LEAN's automatic warm-up, an average that has no samples yet only sees its last `period` closes.
+        '''
+        closes = np.asarray(closes, dtype=float)
+        row = self.rowBySymbol[symbol]
+        for lane in range(self.lanes):
+            k, value = self.k[row, lane], self.values[row, lane]
+            seeded = self.samples[row, lane] > 0
+            window = closes if seeded else closes[-self.periods[row, lane]:]
+            n = len(window)
+            if n == 0:
+                continue
+            decay = (1 - k)**np.arange(n - 1, -1, -1)
+            weights = k*decay
+            if seeded:
+                value = value*(1 - k)*decay[0] + window @ weights
+            else:
+                weights[0] = decay[0]
+                value = window @ weights
+            self.values[row, lane] = value
+            self.samples[row, lane] += n
+        self.seeded = bool(self.samples[:len(self.symbols)].all())
+
+
+    def Row(self, symbol):
+        return self.rowBySymbol[symbol]
+
+
+    def Values(self, symbol):
+        return self.values[self.rowBySymbol[symbol]]
+
+
+    def IsReady(self, symbol, lane=None):
+        row = self.rowBySymbol[symbol]
+        if lane is None:
+            return bool(np.all(self.samples[row] >= self.periods[row]))
+        return bool(self.samples[row, lane] >= self.periods[row, lane])
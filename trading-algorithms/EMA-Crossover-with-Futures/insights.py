@@ -0,0 +1,110 @@
+from bisect import bisect_right
+from collections import defaultdict
+import heapq
+
+
+class InsightStore:
+    ''' Drop-in replacement for the InsightCollection calls made by the portfolio models.
+        Keeps the newest active insight per (Symbol, SourceModel) and a min-heap of close times,
+        so every call only pays for the insights that were added, expired or cleared since the last one.
+    '''
+
+    def __init__(self):
+        self.expiryHeap = []
+        self.liveEntries = {}
+        self.entriesBySymbol = defaultdict(set)
+        self.insightsByKey = {}
+        self.keysBySymbol = defaultdict(set)
+        self.lastInsightByKey = {}
+        self.sequence = 0
+
+
+    def __len__(self):
+        return len(self.liveEntries)
+
+
+    def AddRange(self, insights):
+        for insight in insights:
+            self.sequence += 1
+            heapq.heappush(self.expiryHeap, (insight.CloseTimeUtc, self.sequence))
+            self.liveEntries[self.sequence] = insight
+            self.entriesBySymbol[insight.Symbol].add(self.sequence)
+            self.AddToKey(insight)
+
+
+    def AddToKey(self, insight):
+        # per key only insights that may still become the newest active one are kept:
+        # an insight generated earlier (or at the same time but added before) and closing
+        # no later than another one can never win again
+        key = (insight.Symbol, insight.SourceModel)
+        candidates = self.insightsByKey.get(key, [])
+        if any(other.GeneratedTimeUtc > insight.GeneratedTimeUtc and other.CloseTimeUtc >= insight.CloseTimeUtc for other in candidates):
+            return
+        candidates = [other for other in candidates if not (other.GeneratedTimeUtc <= insight.GeneratedTimeUtc and other.CloseTimeUtc <= insight.CloseTimeUtc)]
+        candidates.insert(bisect_right([other.GeneratedTimeUtc for other in candidates], insight.GeneratedTimeUtc), insight)
+        self.insightsByKey[key] = candidates
+        self.keysBySymbol[insight.Symbol].add(key)
+        self.lastInsightByKey[key] = candidates[-1]
+
+
+    def RemoveFromKey(self, insight):
+        key = (insight.Symbol, insight.SourceModel)
+        candidates = self.insightsByKey.get(key)
+        if candidates is None or insight not in candidates:
+            return
+        candidates.remove(insight)
+        if candidates:
+            self.lastInsightByKey[key] = candidates[-1]
+            return
+        del self.insightsByKey[key]
+        del self.lastInsightByKey[key]
+        self.keysBySymbol[insight.Symbol].discard(key)
+        if not self.keysBySymbol[insight.Symbol]:
+            del self.keysBySymbol[insight.Symbol]
+
+
+    def RemoveExpiredInsights(self, utcTime):
+        expiredInsights = []
+        while self.expiryHeap and self.expiryHeap[0][0] < utcTime:
+            _, sequence = heapq.heappop(self.expiryHeap)
+            insight = self.liveEntries.pop(sequence, None)
+            if insight is None:
+                continue
+            self.entriesBySymbol[insight.Symbol].discard(sequence)
+            if not self.entriesBySymbol[insight.Symbol]:
+                del self.entriesBySymbol[insight.Symbol]
+            self.RemoveFromKey(insight)
+            expiredInsights.append(insight)
+        return expiredInsights
+
+
+    def Clear(self, symbols):
+        for symbol in symbols:
+            for sequence in self.entriesBySymbol.pop(symbol, ()):
+                self.liveEntries.pop(sequence, None)
+            for key in self.keysBySymbol.pop(symbol, ()):
+                self.insightsByKey.pop(key, None)
+                self.lastInsightByKey.pop(key, None)
+
+
+    def HasActiveInsights(self, symbol, utcTime):
+        # candidates are ordered by generation time, so the first one closes last
+        return any(self.insightsByKey[key][0].CloseTimeUtc >= utcTime for key in self.keysBySymbol.get(symbol, ()))
+
+
+    def GetLastActiveInsights(self, utcTime):
+        lastActiveInsights = []
+        for key, insight in self.lastInsightByKey.items():
+            if insight.CloseTimeUtc < utcTime:
+                insight = next((other for other in reversed(self.insightsByKey[key]) if other.CloseTimeUtc >= utcTime), None)
+                if insight is None:
+                    continue
+            lastActiveInsights.append(insight)
+        return lastActiveInsights
+
+
+    def GetNextExpiryTime(self):
+        # entries cleared through Clear are only dropped lazily from the heap
+        while self.expiryHeap and self.expiryHeap[0][1] not in self.liveEntries:
+            heapq.heappop(self.expiryHeap)
+        return self.expiryHeap[0][0] if self.expiryHeap else None
@@ -0,0 +1,130 @@
+import json
+import time as timer
+
+
+class LatencyHistogram:
+    ''' Log-linear histogram of nanosecond latencies, 16 sub-buckets per power of two. '''
+    __slots__ = ('counts',)
+    SUB_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BITS
+
+    def __init__(self):
+        self.counts = [0]*(64*self.SUB_BUCKETS)
+
+    def Record(self, nanoseconds):
+        if nanoseconds < self.SUB_BUCKETS:
+            self.counts[nanoseconds] += 1
+            return
+        shift = nanoseconds.bit_length() - self.SUB_BITS - 1
+        self.counts[(shift + 1)*self.SUB_BUCKETS + (nanoseconds >> shift) - self.SUB_BUCKETS] += 1
+
+    def LowerBound(self, index):
+        if index < self.SUB_BUCKETS:
+            return index
+        shift = index//self.SUB_BUCKETS - 1
+        return (index % self.SUB_BUCKETS + self.SUB_BUCKETS) << shift
+
+    def Percentile(self, q):
+        total = sum(self.counts)
+        if total == 0:
+            return 0
+        rank, seen = q*total, 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.LowerBound(index)
+        return 0
+
+
+
+class CallStats:
+    __slots__ = ('calls', 'nanoseconds', 'maxNanoseconds', 'items', 'maxItems', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.nanoseconds = 0
+        self.maxNanoseconds = 0
+        self.items = 0
+        self.maxItems = 0
+        self.histogram = LatencyHistogram()
+
+    def Record(self, nanoseconds, items=None):
+        self.calls += 1
+        self.nanoseconds += nanoseconds
+        if nanoseconds > self.maxNanoseconds:
+            self.maxNanoseconds = nanoseconds
+        self.histogram.Record(nanoseconds)
+        if items is not None:
+            self.items += items
+            if items > self.maxItems:
+                self.maxItems = items
+
+    def Summary(self):
+        percentile = lambda q: self.histogram.Percentile(q)/1e3
+        return {'calls': self.calls, 'totalMs': self.nanoseconds/1e6, 'meanUs': self.nanoseconds/max(1, self.calls)/1e3,
+                'p50Us': percentile(.5), 'p90Us': percentile(.9), 'p99Us': percentile(.99), 'maxUs': self.maxNanoseconds/1e3,
+                'items': self.items, 'maxItems': self.maxItems}
+
+
+
+def Count(items):
+    try:
+        return len(items)
+    except TypeError:
+        return None
+
+
+
+class Instrumentation:
+    ''' Opt-in latency and item counts for model methods and scheduled callbacks; a no-op when disabled. '''
+
+    # LEAN hands the selections a .NET IEnumerable without len(), so they count the symbols they return
+    ITEMS = {'SelectCoarse': lambda args, result: Count(result),
+             'SelectFine': lambda args, result: Count(result),
+             'Update': lambda args, result: Count(result),
+             'CreateTargets': lambda args, result: Count(result),
+             'OnSecuritiesChanged': lambda args, result: len(args[1].AddedSecurities) + len(args[1].RemovedSecurities)}
+
+    def __init__(self, algorithm, enabled=True):
+        self.algorithm = algorithm
+        self.enabled = enabled
+        self.stats = {}
+
+
+    def Instrument(self, model, *methods):
+        for method in methods:
+            setattr(model, method, self.Wrap(f'{type(model).__name__}.{method}', getattr(model, method), self.ITEMS.get(method)))
+        return model
+
+
+    def Wrap(self, name, function, items=None):
+        if not self.enabled:
+            return function
+        stats = self.stats.setdefault(name, CallStats())
+        clock = timer.perf_counter_ns
+
+        def Timed(*args, **kwargs):
+            started = clock()
+            result = function(*args, **kwargs)
+            stats.Record(clock() - started, items(args, result) if items is not None else None)
+            return result
+        return Timed
+
+
+    def Summary(self):
+        return {name: stats.Summary() for name, stats in self.stats.items()}
+
+
+    def Report(self):
+        lines = [f"{'':<60} {'calls':>8} {'total ms':>10} {'mean us':>9} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>10} {'items':>10} {'max items':>9}"]
+        for name, summary in sorted(self.Summary().items(), key=lambda item: -item[1]['totalMs']):
+            lines.append(f"{name:<60} {summary['calls']:>8} {summary['totalMs']:>10.1f} {summary['meanUs']:>9.1f} {summary['p50Us']:>9.1f} "
+                         f"{summary['p90Us']:>9.1f} {summary['p99Us']:>9.1f} {summary['maxUs']:>10.1f} {summary['items']:>10} {summary['maxItems']:>9}")
+        return '\n'.join(lines)
+
+
+    def Save(self, key='instrumentation'):
+        if not self.enabled:
+            return
+        self.algorithm.Log(self.Report())
+        self.algorithm.ObjectStore.Save(key, json.dumps(self.Summary()))
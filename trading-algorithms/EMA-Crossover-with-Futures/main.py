@@ -1,5 +1,7 @@
 from alpha import EmaCrossoverAlphaModel
 from portfolio import NaiveFuturesPortfolioConstructionModel
+from charts import ChartBuffer
+from instrumentation import Instrumentation
 
 
 class EmaCrossoverFutures(QCAlgorithm):
@@ -15,9 +17,27 @@ class EmaCrossoverFutures(QCAlgorithm):
                             dataMappingMode = DataMappingMode.OpenInterest,
                             contractDepthOffset = 0)
 
-        self.AddAlpha(EmaCrossoverAlphaModel())
+        self.charts = ChartBuffer(self)
+        self.instrumentation = Instrumentation(self, enabled=self.GetParameter('instrumentation', 0) == 1)
+        self.alphaModel = EmaCrossoverAlphaModel(charts=self.charts,
+                                                 fastDays=self.GetParameter('fastDays', 10),
+                                                 slowDays=self.GetParameter('slowDays', 50),
+                                                 tol=self.GetParameter('tol', .01),
+                                                 instrumentation=self.instrumentation)
+        self.AddAlpha(self.instrumentation.Instrument(self.alphaModel, 'Update', 'OnSecuritiesChanged'))
         self.Settings.FreePortfolioValuePercentage = .1
-        self.SetPortfolioConstruction(NaiveFuturesPortfolioConstructionModel())
+        self.portfolioModel = portfolioModel = NaiveFuturesPortfolioConstructionModel(maxGrossExposurePerSecurity=self.GetParameter('maxGrossExposurePerSecurity', 10.))
+        self.SetPortfolioConstruction(self.instrumentation.Instrument(portfolioModel, 'CreateTargets', 'OnSecuritiesChanged'))
+        
+        
+    def OnOrderEvent(self, orderEvent):
+        self.portfolioModel.OnOrderEvent(self, orderEvent)
+        
+        
+    def OnEndOfAlgorithm(self):
+        self.charts.Flush()
+        self.Log(self.alphaModel.OverheadReport())
+        self.instrumentation.Save()
         
         
                                             
@@ -1,33 +1,35 @@
-from collections import defaultdict
-from datetime import datetime, timedelta
-from itertools import groupby
-import pytz
+from datetime import timedelta
+from insights import InsightStore
+from positions import PositionIndex
+from scheduler import RebalanceScheduler
 
 
 
 class NaiveFuturesPortfolioConstructionModel(PortfolioConstructionModel):
     
-    def __init__(self):
-        self.insightCollection = InsightCollection()
+    def __init__(self, rebalanceFreq=timedelta(1), maxGrossExposurePerSecurity=10):
+        self.insightStore = InsightStore()
+        self.positions = PositionIndex()
         self.contracts = {}
         self.securities = {}
         self.removedSymbols = []
-        self.nextExpiryTime = datetime.min.replace(tzinfo=pytz.utc)
-        self.rebalanceFreq = timedelta(1)
-        self.maxGrossExposurePerSecurity = 10
+        self.rebalanceFreq = rebalanceFreq
+        self.scheduler = RebalanceScheduler(self.insightStore, rebalanceFreq)
+        self.maxGrossExposurePerSecurity = maxGrossExposurePerSecurity
         
     
     def CreateTargets(self, algorithm, insights):
+        utcTime = algorithm.UtcTime
+        if len(insights) == 0 and utcTime <= self.scheduler.wakeTime:
+            return []
         targets = []
-        if not self.ShouldCreateTargets(algorithm.UtcTime, insights):
-            return targets
-        self.insightCollection.AddRange(insights)
+        self.insightStore.AddRange(insights)
         targets.extend(self.CreateZeroQuantityTargetsForRemovedSecurities())
         targets.extend(self.CreateZeroQuantityTargetsForExpiredInsights(algorithm))
         lastActiveInsights = self.GetLastActiveInsights(algorithm)
         if self.ShouldUpdateTargetPercent(algorithm, lastActiveInsights):
             targets.extend(self.DeterminePortfolioTargets(algorithm, lastActiveInsights))
-        self.UpdateNextExpiryTime(algorithm)
+        self.scheduler.Reschedule(utcTime)
         return targets
         
     def DeterminePortfolioTargets(self, algorithm, lastActiveInsights):
@@ -49,62 +51,39 @@ class NaiveFuturesPortfolioConstructionModel(PortfolioConstructionModel):
         return targets
     
     
-    def ShouldCreateTargets(self, time, insights):
-        return len(insights) > 0 or (time > self.nextExpiryTime)
-    
     def CreateZeroQuantityTargetsForRemovedSecurities(self):
         if len(self.removedSymbols) == 0:
             return []
         zeroTargets = [PortfolioTarget(symbol, 0) for symbol in self.removedSymbols]
-        self.insightCollection.Clear(self.removedSymbols)
+        self.insightStore.Clear(self.removedSymbols)
         self.removedSymbols = []
         return zeroTargets
         
     
     def CreateZeroQuantityTargetsForExpiredInsights(self, algorithm):
-        zeroTargets = []
-        expiredInsights = self.insightCollection.RemoveExpiredInsights(algorithm.UtcTime)
+        expiredInsights = self.insightStore.RemoveExpiredInsights(algorithm.UtcTime)
         if len(expiredInsights) == 0:
-            return zeroTargets
-        key = lambda insight: insight.Symbol
-        for symbol, _ in groupby(sorted(expiredInsights, key=key), key):
-            if not self.insightCollection.HasActiveInsights(symbol, algorithm.UtcTime): 
-                zeroTargets.append(PortfolioTarget(symbol, 0))
-                continue
-        return zeroTargets
+            return []
+        expiredSymbols = dict.fromkeys(insight.Symbol for insight in expiredInsights)
+        return [PortfolioTarget(symbol, 0) for symbol in expiredSymbols if not self.insightStore.HasActiveInsights(symbol, algorithm.UtcTime)]
         
     
     def GetLastActiveInsights(self, algorithm):
-        activeInsights = self.insightCollection.GetActiveInsights(algorithm.UtcTime)
-        lastActiveInsights = []
-        groupedInsights = GroupBy(activeInsights, key = lambda insight: (insight.Symbol, insight.SourceModel))
-        for kvp in groupedInsights:
-            lastActiveInsights.append(sorted(kvp[1], key=lambda insight: insight.GeneratedTimeUtc)[-1])
-        return lastActiveInsights    
+        return self.insightStore.GetLastActiveInsights(algorithm.UtcTime)
 
     
     def ShouldUpdateTargetPercent(self, algorithm, lastActiveInsights):
-        if algorithm.UtcTime > self.nextExpiryTime:
+        if self.scheduler.Due(algorithm.UtcTime):
             return True
-        for insight in lastActiveInsights:
-            if insight.Direction != InsightDirection.Flat and not algorithm.Portfolio[insight.Symbol].Invested:
-                return True
-            elif insight.Direction != InsightDirection.Up and algorithm.Portfolio[insight.Symbol].IsLong:
-                return True
-            elif insight.Direction != InsightDirection.Down and algorithm.Portfolio[insight.Symbol].IsShort:
-                return True
-            else:
-                continue
-        return False
+        return self.positions.Disagrees(lastActiveInsights)
   
     
-    def UpdateNextExpiryTime(self, algorithm):
-        self.nextExpiryTime = self.insightCollection.GetNextExpiryTime()
-        if self.nextExpiryTime is None:
-            self.nextExpiryTime = algorithm.UtcTime + self.rebalanceFreq
-        
+    def OnOrderEvent(self, algorithm, orderEvent):
+        self.positions.OnOrderEvent(algorithm, orderEvent)
+    
     
     def OnSecuritiesChanged(self, algorithm, changes):
+        self.positions.OnSecuritiesChanged(algorithm, changes)
         for security in changes.RemovedSecurities:
             symbol = security.Symbol
             self.removedSymbols.append(symbol)
@@ -112,10 +91,3 @@ class NaiveFuturesPortfolioConstructionModel(PortfolioConstructionModel):
         
         for security in changes.AddedSecurities:
             self.securities[security.Symbol] = security
-
-
-def GroupBy(iterable, key=lambda x: x):
-    d = defaultdict(list)
-    for item in iterable:
-        d[key(item)].append(item)
-    return d.items()
\ No newline at end of file
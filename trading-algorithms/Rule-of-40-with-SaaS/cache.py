@@ -0,0 +1,150 @@
+from datetime import timedelta
+import numpy as np
+
+
+class Column:
+    ''' Float column of a SelectionRow, stored in the SelectionDataStore it belongs to. '''
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+
+    def __get__(self, selectionRow, owner=None):
+        if selectionRow is None:
+            return self
+        return float(selectionRow.store.columns[self.name][selectionRow.row])
+
+
+    def __set__(self, selectionRow, value):
+        selectionRow.store.columns[self.name][selectionRow.row] = value
+
+
+
+class SelectionRow:
+    ''' Thin view on one row of a SelectionDataStore. Views are only valid until the row is evicted. '''
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+
+    @classmethod
+    def Fields(cls):
+        return [name for klass in reversed(cls.__mro__) for name, attr in vars(klass).items() if isinstance(attr, Column)]
+
+
+    @property
+    def Symbol(self):
+        return self.store.symbols[self.row]
+
+
+    @property
+    def Time(self):
+        return self.store.time[self.row].item()
+
+
+    @Time.setter
+    def Time(self, time):
+        self.store.time[self.row] = np.datetime64(time, 'us')
+
+
+
+class SelectionDataStore:
+    ''' Struct-of-arrays selection state: a symbol -> row index plus one NumPy column per SelectionRow field.
+        Rows not refreshed for maxAge are evicted, and so are the least recently refreshed ones
+        once the store holds more than maxSize, except for rows refreshed in the current cycle.
+    '''
+
+    def __init__(self, rowType, maxAge=timedelta(90), maxSize=1000, capacity=64):
+        self.rowType = rowType
+        self.maxAge = np.timedelta64(maxAge)
+        self.maxSize = maxSize
+        self.rowBySymbol = {}
+        self.symbols = [None]*capacity
+        self.time = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]')
+        self.columns = {name: np.zeros(capacity) for name in rowType.Fields()}
+        self.freeRows = list(range(capacity - 1, -1, -1))
+
+
+    def __len__(self):
+        return len(self.rowBySymbol)
+
+
+    def __contains__(self, symbol):
+        return symbol in self.rowBySymbol
+
+
+    def Column(self, name):
+        return self.columns[name]
+
+
+    def Rows(self, symbols):
+        rows = np.empty(len(symbols), dtype=np.intp)
+        for i, symbol in enumerate(symbols):
+            row = self.rowBySymbol.get(symbol)
+            if row is None:
+                row = self.Allocate(symbol)
+            rows[i] = row
+        return rows
+
+
+    def Allocate(self, symbol):
+        if not self.freeRows:
+            self.Grow()
+        row = self.freeRows.pop()
+        self.rowBySymbol[symbol] = row
+        self.symbols[row] = symbol
+        self.time[row] = np.datetime64('NaT')
+        for column in self.columns.values():
+            column[row] = 0
+        return row
+
+
+    def Grow(self):
+        capacity = len(self.symbols)
+        self.symbols.extend([None]*capacity)
+        self.time = np.concatenate((self.time, np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]')))
+        self.columns = {name: np.concatenate((column, np.zeros(capacity))) for name, column in self.columns.items()}
+        self.freeRows.extend(range(2*capacity - 1, capacity - 1, -1))
+
+
+    def RefreshMany(self, symbols, time, *columns):
+        rows = self.Rows(symbols)
+        self.rowType.UpdateMany(self, rows, time, *(np.asarray(column, dtype=float) for column in columns))
+        return rows
+
+
+    def LiveRows(self):
+        return np.fromiter(self.rowBySymbol.values(), dtype=np.intp, count=len(self.rowBySymbol))
+
+
+    def CurrentRows(self, time):
+        rows = self.LiveRows()
+        return rows[self.time[rows] == np.datetime64(time, 'us')]
+
+
+    def Evict(self, time):
+        now = np.datetime64(time, 'us')
+        rows = self.LiveRows()
+        times = self.time[rows]
+        evict = (times < now - self.maxAge) | np.isnat(times)
+        excess = len(rows) - np.count_nonzero(evict) - self.maxSize
+        if excess > 0:
+            candidates = np.flatnonzero(~evict & (times < now))
+            if len(candidates) > excess:
+                candidates = candidates[np.argpartition(times[candidates], excess - 1)[:excess]]
+            evict[candidates] = True
+        for row in rows[evict]:
+            del self.rowBySymbol[self.symbols[row]]
+            self.symbols[row] = None
+            self.freeRows.append(row)
+
+
+    def Largest(self, n, name, time):
+        rows = self.CurrentRows(time)
+        values = self.columns[name][rows]
+        if len(rows) > n:
+            top = np.argpartition(-values, n - 1)[:n]
+            rows, values = rows[top], values[top]
+        return [self.symbols[row] for row in rows[np.argsort(-values, kind='stable')]]
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import timedelta
+import numpy as np
+
+
+class CoarseBatch:
+    ''' Columnar copy of the coarse fields used by the selection models, built in a single pass. '''
+
+    def __init__(self, coarse):
+        # listing dates are kept as proleptic ordinals, SecurityIdentifier dates carry no time of day
+        rows = [(c.Symbol, c.Price, c.DollarVolume, c.HasFundamentalData, c.Symbol.ID.Date.toordinal()) for c in coarse]
+        n = len(rows)
+        symbols, prices, dollarVolumes, hasFundamentalData, listingDays = zip(*rows) if n else ((),)*5
+        self.symbols = list(symbols)
+        self.price = np.fromiter(prices, dtype=float, count=n)
+        self.dollarVolume = np.fromiter(dollarVolumes, dtype=float, count=n)
+        self.hasFundamentalData = np.fromiter(hasFundamentalData, dtype=bool, count=n)
+        self.listingDay = np.fromiter(listingDays, dtype=np.int64, count=n)
+
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+
+class CoarseSelectionStage:
+    ''' HasFundamentalData, price, dollar volume and listing age filters followed by a top-K by dollar volume. '''
+
+    def __init__(self, minPrice=1, minDollarVolume=1e6, minAge=timedelta(365), count=1000, cache=None):
+        self.minPrice = minPrice
+        self.minDollarVolume = minDollarVolume
+        self.minAge = minAge
+        self.count = count
+        self.cache = None
+        if cache is not None:
+            cache.Register(self)
+
+
+    def Key(self):
+        return (self.minPrice, self.minDollarVolume, self.minAge, self.count)
+
+
+    def Select(self, time, coarse):
+        if self.cache is not None:
+            return self.cache.Select(self, time, coarse)
+        return self.Filter(time, coarse)
+
+
+    def Filter(self, time, coarse):
+        batch = coarse if isinstance(coarse, CoarseBatch) else CoarseBatch(coarse)
+        mask = self.Mask(time, batch)
+        return [batch.symbols[i] for i in self.TopByDollarVolume(batch, np.flatnonzero(mask))]
+
+
+    def Mask(self, time, batch):
+        return batch.hasFundamentalData \
+                & (batch.price > self.minPrice) \
+                & (batch.dollarVolume > self.minDollarVolume) \
+                & (self.AgeInSeconds(time, batch) > self.minAge.total_seconds())
+
+
+    @staticmethod
+    def AgeInSeconds(time, batch):
+        secondsOfDay = time.hour*3600 + time.minute*60 + time.second + time.microsecond/1e6
+        return (time.toordinal() - batch.listingDay)*86400. + secondsOfDay
+
+
+    def TopByDollarVolume(self, batch, candidates):
+        dollarVolume = batch.dollarVolume[candidates]
+        if len(candidates) > self.count:
+            top = np.argpartition(-dollarVolume, self.count - 1)[:self.count]
+            candidates, dollarVolume = candidates[top], dollarVolume[top]
+        return candidates[np.argsort(-dollarVolume, kind='stable')]
+
+
+
+class CoarseFilterCache:
+    ''' Coarse selection results by date, shared by the registered stages with the same filter settings
+        (selection models of co-hosted strategies, or several models of one algorithm). The first stage
+        asking for a date filters the coarse data; the result is kept until every other registered stage
+        with that key has taken it, and dropped anyway as soon as a later date is asked for.
+    '''
+
+    def __init__(self):
+        self.consumers = defaultdict(int)
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+
+    def Register(self, stage):
+        if stage.cache is not self:
+            stage.cache = self
+            self.consumers[stage.Key()] += 1
+
+
+    def Select(self, stage, time, coarse):
+        date, key = time.date(), stage.Key()
+        for stale in [entry for entry in self.results if entry[0] < date]:
+            del self.results[stale]
+        entry = self.results.get((date, key))
+        if entry is None:
+            self.misses += 1
+            symbols = stage.Filter(time, coarse)
+            if self.consumers[key] > 1:
+                self.results[(date, key)] = [symbols, self.consumers[key] - 1]
+            return list(symbols)
+        self.hits += 1
+        symbols, remaining = entry
+        if remaining == 1:
+            del self.results[(date, key)]
+        else:
+            entry[1] = remaining - 1
+        return list(symbols)
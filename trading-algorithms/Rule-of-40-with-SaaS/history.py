@@ -0,0 +1,109 @@
+import io
+import json
+import numpy as np
+import pandas as pd
+
+
+class PortfolioHistoryRecorder:
+    ''' Records daily portfolio weights as sparse (record, symbol id, weight) rows in growable arrays and
+        writes them to the ObjectStore in compressed segments of at most segmentRows rows while the
+        algorithm runs. `key` holds a small JSON manifest (segment count and symbol table), segments
+        are stored under key/00000, key/00001, ...; Load reads them back as the dense weights frame.
+    '''
+
+    FORMAT = 'sparse-weight-segments'
+
+    def __init__(self, objectStore, key='portfolioHistory', segmentRows=100_000, capacity=4096):
+        self.objectStore = objectStore
+        self.key = key
+        self.segmentRows = segmentRows
+        self.symbolIds = {}
+        self.segments = 0
+        self.recordTimes = []
+        self.records = np.empty(capacity, dtype=np.int32)
+        self.symbols = np.empty(capacity, dtype=np.int32)
+        self.weights = np.empty(capacity, dtype=np.float32)
+        self.count = 0
+
+
+    def Record(self, time, weights):
+        ''' weights: {symbol: weight} of the current holdings; a time with no holdings is kept as an empty record. '''
+        n = len(weights)
+        if self.count + n > len(self.weights):
+            self.Grow(self.count + n)
+        record = len(self.recordTimes)
+        self.recordTimes.append(np.datetime64(time, 's'))
+        end = self.count + n
+        self.records[self.count:end] = record
+        self.symbols[self.count:end] = [self.SymbolId(symbol) for symbol in weights]
+        self.weights[self.count:end] = list(weights.values())
+        self.count = end
+        if self.count >= self.segmentRows:
+            self.Flush()
+
+
+    def SymbolId(self, symbol):
+        name = symbol.ID.ToString()
+        symbolId = self.symbolIds.get(name)
+        if symbolId is None:
+            symbolId = self.symbolIds[name] = len(self.symbolIds)
+        return symbolId
+
+
+    def Grow(self, size):
+        capacity = max(size, 2*len(self.weights))
+        for name in ('records', 'symbols', 'weights'):
+            array = getattr(self, name)
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+
+
+    def Flush(self):
+        if not self.recordTimes:
+            return
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, times=np.array(self.recordTimes, dtype='datetime64[s]'), records=self.records[:self.count],
+                            symbols=self.symbols[:self.count], weights=self.weights[:self.count])
+        self.objectStore.SaveBytes(f'{self.key}/{self.segments:05d}', bytearray(buffer.getvalue()))
+        self.segments += 1
+        self.recordTimes = []
+        self.count = 0
+        self.SaveManifest()
+
+
+    def SaveManifest(self):
+        manifest = {'format': self.FORMAT, 'segments': self.segments, 'symbols': list(self.symbolIds)}
+        self.objectStore.Save(self.key, json.dumps(manifest))
+
+
+    def Close(self):
+        if self.recordTimes:
+            self.Flush()
+        else:
+            self.SaveManifest()
+
+
+    @classmethod
+    def Load(cls, objectStore, key='portfolioHistory'):
+        ''' Dense weights frame (latest time first, one column per symbol id string, 0 when not held). '''
+        manifest = json.loads(objectStore.Read(key))
+        symbols = manifest['symbols']
+        times, blocks = [], []
+        for i in range(manifest['segments']):
+            with np.load(io.BytesIO(bytes(objectStore.ReadBytes(f'{key}/{i:05d}')))) as segment:
+                blocks.append((len(times), segment['records'], segment['symbols'], segment['weights']))
+                times.extend(segment['times'])
+        dense = np.zeros((len(times), len(symbols)))
+        for offset, records, symbolIds, weights in blocks:
+            dense[offset + records, symbolIds] = weights
+        frame = pd.DataFrame(dense, index=pd.DatetimeIndex(np.array(times, dtype='datetime64[s]'), name='time'), columns=symbols)
+        return frame.iloc[::-1]
+
+
+    @classmethod
+    def IsManifest(cls, text):
+        try:
+            return json.loads(text).get('format') == cls.FORMAT
+        except (ValueError, AttributeError):
+            return False
@@ -0,0 +1,52 @@
+import json
+from datetime import timedelta
+
+
+class IndustryClassificationCache:
+    ''' Morningstar industry codes seen in fine data, trusted from their first day to maxAge after their last one. '''
+
+    def __init__(self, objectStore, key='industryClassifications', maxAge=timedelta(45)):
+        self.objectStore = objectStore
+        self.key = key
+        self.maxAge = maxAge.days
+        self.entries = json.loads(objectStore.Read(key)) if objectStore is not None and objectStore.ContainsKey(key) else {}
+        self.changed = False
+
+
+    def Code(self, symbol, time):
+        ''' The cached industry code of symbol at time, None if unknown or stale. '''
+        entry = self.entries.get(symbol.ID.ToString())
+        if entry is None:
+            return None
+        code, firstDay, lastDay = entry
+        return code if firstDay <= time.toordinal() <= lastDay + self.maxAge else None
+
+
+    def Plausible(self, symbols, time, codes):
+        ''' The symbols, in order, that are in one of codes or not reliably classified at time. '''
+        codes = set(codes)
+        plausible = []
+        for symbol in symbols:
+            code = self.Code(symbol, time)
+            if code is None or code in codes:
+                plausible.append(symbol)
+        return plausible
+
+
+    def Update(self, time, symbols, codes):
+        day = time.toordinal()
+        for symbol, code in zip(symbols, codes):
+            code = int(code)
+            symbolId = symbol.ID.ToString()
+            entry = self.entries.get(symbolId)
+            if entry is not None and entry[0] == code:
+                entry[1], entry[2] = min(entry[1], day), max(entry[2], day)
+            else:
+                self.entries[symbolId] = [code, day, day]
+            self.changed = True
+
+
+    def Save(self):
+        if self.changed and self.objectStore is not None:
+            self.objectStore.Save(self.key, json.dumps(self.entries))
+            self.changed = False
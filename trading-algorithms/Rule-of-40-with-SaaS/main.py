@@ -1,6 +1,8 @@
 from selection import RuleOfFortySaasSelectionModel
 from portfolio import MarketCapWeightedPortfolioConstructionModel
-from collections import deque
+from charts import ChartBuffer
+from history import PortfolioHistoryRecorder
+from instrumentation import Instrumentation
 
 
 class RuleOfFortyScoreSaasStrategy(QCAlgorithm):
@@ -8,42 +10,56 @@ class RuleOfFortyScoreSaasStrategy(QCAlgorithm):
     def Initialize(self):
         self.SetStartDate(2010, 1, 1)  
         self.SetCash(1_000_000) 
-        self.spx = self.AddIndex('SPX', Resolution.Minute).Symbol
+        self.UniverseSettings.Resolution = Resolution.Daily
+        self.spx = self.AddIndex('SPX', Resolution.Daily).Symbol
         self.SetBenchmark(self.spx)
-        self.AddUniverseSelection(RuleOfFortySaasSelectionModel(self))
-        self.AddAlpha(ConstantAlphaModel(InsightType.Price, InsightDirection.Up, timedelta(100)))
-        self.SetPortfolioConstruction(MarketCapWeightedPortfolioConstructionModel())
+        self.instrumentation = Instrumentation(self, enabled=self.GetParameter('instrumentation', 0) == 1)
+        selectionModel = RuleOfFortySaasSelectionModel(self, self.GetParameter('efficiencyScoreThreshold', .4), objectStore=self.ObjectStore)
+        self.AddUniverseSelection(self.instrumentation.Instrument(selectionModel, 'SelectCoarse', 'SelectFine'))
+        self.AddAlpha(ConstantAlphaModel(InsightType.Price, InsightDirection.Up, timedelta(self.GetParameter('insightDays', 100))))
+        self.portfolioModel = portfolioModel = MarketCapWeightedPortfolioConstructionModel(maxWeight=self.GetParameter('maxWeight', .1),
+                                                                     minWeight=self.GetParameter('minWeight', .01),
+                                                                     absoluteBand=self.GetParameter('absoluteBand', .005),
+                                                                     relativeBand=self.GetParameter('relativeBand', .1))
+        self.SetPortfolioConstruction(self.instrumentation.Instrument(portfolioModel, 'CreateTargets', 'OnSecuritiesChanged'))
         self.Settings.RebalancePortfolioOnSecurityChanges = True
         self.Settings.RebalancePortfolioOnInsightChanges = False
         self.InitCharts()
-        self.Schedule.On(self.DateRules.EveryDay(self.spx), self.TimeRules.BeforeMarketClose(self.spx, 1), self.UpdateCharts)
+        self.Schedule.On(self.DateRules.EveryDay(self.spx), self.TimeRules.BeforeMarketClose(self.spx, 1), self.instrumentation.Wrap('UpdateCharts', self.UpdateCharts))
     
     
     def InitCharts(self):
-        chart = Chart('Holdings')
-        chart.AddSeries(Series('Number of Holdings', SeriesType.Scatter, ''))
-        self.AddChart(chart)
+        self.charts = ChartBuffer(self)
+        self.charts.AddSeries('Holdings', Series('Number of Holdings', SeriesType.Scatter, ''))
         self.benchmark_init_price = None
         self.init_tpv = None
-        self.portfolioHistory = deque()
+        self.portfolioHistory = PortfolioHistoryRecorder(self.ObjectStore, 'portfolioHistory')
         
         
     def UpdateCharts(self):
         tpv = self.Portfolio.TotalPortfolioValue
-        if self.benchmark_init_price is None or self.init_tpv is None:
-            self.benchmark_init_price = self.Benchmark.Evaluate(self.Time)
+        benchmark_price = self.Benchmark.Evaluate(self.Time)
+        # daily SPX has no price before its first bar
+        if not self.benchmark_init_price or self.init_tpv is None:
+            self.benchmark_init_price = benchmark_price
             self.init_tpv = tpv
-        benchmark_adj_price = self.Benchmark.Evaluate(self.Time)/self.benchmark_init_price*self.init_tpv
-        self.Plot('Strategy Equity', 'Benchmark SPX', benchmark_adj_price)
+        if self.benchmark_init_price:
+            benchmark_adj_price = benchmark_price/self.benchmark_init_price*self.init_tpv
+            self.charts.Plot('Strategy Equity', 'Benchmark SPX', benchmark_adj_price)
         numHoldings = sum(1 for symbol, holding in self.Portfolio.items() if holding.Invested)
-        self.Plot('Holdings', 'Number of Holdings', int(numHoldings))
+        self.charts.Plot('Holdings', 'Number of Holdings', int(numHoldings))
         
         weights = {symbol : holding.HoldingsValue/tpv for symbol, holding in self.Portfolio.items() if holding.Invested}
-        weights['time'] = self.Time
-        self.portfolioHistory.appendleft(weights)
+        self.portfolioHistory.Record(self.Time, weights)
     
+    def OnOrderEvent(self, orderEvent):
+        self.portfolioModel.OnOrderEvent(self, orderEvent)
+        
+        
     def OnEndOfAlgorithm(self):
-        self.ObjectStore.Save('portfolioHistory', pd.DataFrame(self.portfolioHistory).set_index('time').to_json(orient='split', default_handler=str))
+        self.charts.Flush()
+        self.portfolioHistory.Close()
+        self.instrumentation.Save()
         
         
 
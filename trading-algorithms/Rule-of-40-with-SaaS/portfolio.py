@@ -1,105 +1,116 @@
-from datetime import datetime, timedelta
-import pytz
-from collections import defaultdict
-from itertools import groupby
+from datetime import timedelta
+import numpy as np
+from insights import InsightStore
+from positions import PositionIndex
+from scheduler import RebalanceScheduler
+from weighting import MarketCapWeightingEngine
 
 
 class MarketCapWeightedPortfolioConstructionModel(PortfolioConstructionModel):
+    ''' Market cap weighted targets, all re-emitted when the insights expire (every rebalanceFreq without insights) or the set
+        of weighted names changes. In between, when a name is not held as its insight says, only the weights that moved from
+        the last emitted one by more than max(absoluteBand, relativeBand*|last weight|), or whose name is not invested yet, are emitted.
+    '''
     
-    def __init__(self):
+    def __init__(self, rebalanceFreq=timedelta(30), maxWeight=.1, minWeight=.01, absoluteBand=.005, relativeBand=.1):
         self.marketCapDict = {}
         self.removedSymbols = []
-        self.insightCollection = InsightCollection()
-        self.nextExpiryTime = datetime.min.replace(tzinfo=pytz.utc)
-        self.rebalanceFreq = timedelta(30)
+        self.insightStore = InsightStore()
+        self.positions = PositionIndex()
+        self.rebalanceFreq = rebalanceFreq
+        self.scheduler = RebalanceScheduler(self.insightStore, rebalanceFreq)
         self.securities = {}
-        self.maxWeight = .1
-        self.minWeight = .01
+        self.maxWeight = maxWeight
+        self.minWeight = minWeight
+        self.weightingEngine = MarketCapWeightingEngine(self.maxWeight, self.minWeight)
+        self.absoluteBand = absoluteBand
+        self.relativeBand = relativeBand
+        self.lastWeights = {}
+        self.weightedSymbols = set()
     
     
     def CreateTargets(self, algorithm, insights):
+        utcTime = algorithm.UtcTime
+        if len(insights) == 0 and utcTime <= self.scheduler.wakeTime:
+            return []
         targets = []
-        if not self.ShouldCreateTargets(algorithm.UtcTime, insights):
-            return targets
-        self.insightCollection.AddRange(insights)
+        self.insightStore.AddRange(insights)
         targets.extend(self.CreateZeroQuantityTargetsForRemovedSecurities())
         targets.extend(self.CreateZeroQuantityTargetsForExpiredInsights(algorithm))
         lastActiveInsights = self.GetLastActiveInsights(algorithm)
-        if self.ShouldUpdateTargetPercent(algorithm, lastActiveInsights):
+        fullRebalance = self.scheduler.Due(utcTime)
+        # an added or removed name moves every weight: skipping the small moves would leave the targets off 100%
+        weightedSymbols = {insight.Symbol for insight in lastActiveInsights if insight.Symbol in self.securities}
+        weightedSymbolsChanged = weightedSymbols != self.weightedSymbols
+        if weightedSymbolsChanged or self.ShouldUpdateTargetPercent(algorithm, lastActiveInsights):
             weights = self.DetermineTargetPercent(algorithm, lastActiveInsights)
+            if not fullRebalance and not weightedSymbolsChanged:
+                weights = self.DriftedWeights(algorithm, weights)
+            self.weightedSymbols = weightedSymbols
+            self.lastWeights.update(weights)
             targets.extend([PortfolioTarget.Percent(algorithm, symbol, weight) for symbol, weight in weights.items()])
-        self.UpdateNextExpiryTime(algorithm)
+        self.scheduler.Reschedule(utcTime)
         return targets
         
     
-    def ShouldCreateTargets(self, time, insights):
-        return len(insights) > 0 or (time > self.nextExpiryTime)
-    
     def CreateZeroQuantityTargetsForRemovedSecurities(self):
         if len(self.removedSymbols) == 0:
             return []
         zeroTargets = [PortfolioTarget(symbol, 0) for symbol in self.removedSymbols]
-        self.insightCollection.Clear(self.removedSymbols)
+        self.insightStore.Clear(self.removedSymbols)
+        for symbol in self.removedSymbols:
+            self.lastWeights.pop(symbol, None)
         self.removedSymbols = []
         return zeroTargets
         
     
     def CreateZeroQuantityTargetsForExpiredInsights(self, algorithm):
-        zeroTargets = []
-        expiredInsights = self.insightCollection.RemoveExpiredInsights(algorithm.UtcTime)
+        expiredInsights = self.insightStore.RemoveExpiredInsights(algorithm.UtcTime)
         if len(expiredInsights) == 0:
-            return zeroTargets
-        key = lambda insight: insight.Symbol
-        for symbol, _ in groupby(sorted(expiredInsights, key=key), key):
-            if not self.insightCollection.HasActiveInsights(symbol, algorithm.UtcTime): 
-                zeroTargets.append(PortfolioTarget(symbol, 0))
-                continue
-        return zeroTargets
+            return []
+        expiredSymbols = [symbol for symbol in dict.fromkeys(insight.Symbol for insight in expiredInsights) if not self.insightStore.HasActiveInsights(symbol, algorithm.UtcTime)]
+        for symbol in expiredSymbols:
+            self.lastWeights.pop(symbol, None)
+        return [PortfolioTarget(symbol, 0) for symbol in expiredSymbols]
         
     
     def GetLastActiveInsights(self, algorithm):
-        activeInsights = self.insightCollection.GetActiveInsights(algorithm.UtcTime)
-        lastActiveInsights = []
-        groupedInsights = GroupBy(activeInsights, key = lambda insight: (insight.Symbol, insight.SourceModel))
-        for kvp in groupedInsights:
-            lastActiveInsights.append(sorted(kvp[1], key=lambda insight: insight.GeneratedTimeUtc)[-1])
-        return lastActiveInsights    
+        return self.insightStore.GetLastActiveInsights(algorithm.UtcTime)
 
     
     def ShouldUpdateTargetPercent(self, algorithm, lastActiveInsights):
-        if algorithm.UtcTime > self.nextExpiryTime:
+        if self.scheduler.Due(algorithm.UtcTime):
             return True
-        for insight in lastActiveInsights:
-            if insight.Direction != InsightDirection.Flat and not algorithm.Portfolio[insight.Symbol].Invested:
-                return True
-            elif insight.Direction != InsightDirection.Up and algorithm.Portfolio[insight.Symbol].IsLong:
-                return True
-            elif insight.Direction != InsightDirection.Down and algorithm.Portfolio[insight.Symbol].IsShort:
-                return True
-            else:
-                continue
-        return False
+        return self.positions.Disagrees(lastActiveInsights)
   
     
-    def UpdateNextExpiryTime(self, algorithm):
-        self.nextExpiryTime = self.insightCollection.GetNextExpiryTime()
-        if self.nextExpiryTime is None:
-            self.nextExpiryTime = algorithm.UtcTime + self.rebalanceFreq
+    def DriftedWeights(self, algorithm, weights):
+        drifted = {}
+        for symbol, weight in weights.items():
+            last = self.lastWeights.get(symbol)
+            if last is None or abs(weight - last) > max(self.absoluteBand, self.relativeBand*abs(last)) \
+                    or (weight != 0 and symbol not in self.positions):
+                drifted[symbol] = weight
+        return drifted
     
     
     def DetermineTargetPercent(self, algorithm, lastActiveInsights):
-        weights = {}
-        if not lastActiveInsights:
-            return weights
-        marketCapBySymbol = {insight.Symbol : algorithm.Securities[insight.Symbol].Fundamentals.MarketCap if insight.Direction == InsightDirection.Up else 0 for insight in lastActiveInsights if insight.Symbol in self.securities}
-        aggregatedMarketCap = sum(marketCapBySymbol.values())
-        weights = {symbol : min(self.maxWeight, round(mktCap/aggregatedMarketCap, 5)) for symbol, mktCap in marketCapBySymbol.items()}
-        weights.update({symbol : max(self.minWeight, weight) for symbol, weight in weights.items() if weight > 0})
-        return weights
+        insights = [insight for insight in lastActiveInsights if insight.Symbol in self.securities]
+        if not insights:
+            return {}
+        caps = np.fromiter((self.securities[insight.Symbol].Fundamentals.MarketCap if insight.Direction == InsightDirection.Up else 0 for insight in insights), dtype=float, count=len(insights))
+        directions = np.fromiter((insight.Direction for insight in insights), dtype=float, count=len(insights))
+        weights = self.weightingEngine.Weights(caps, directions)
+        return dict(zip([insight.Symbol for insight in insights], weights))
         
     
     
+    def OnOrderEvent(self, algorithm, orderEvent):
+        self.positions.OnOrderEvent(algorithm, orderEvent)
+    
+    
     def OnSecuritiesChanged(self, algorithm, changes):
+        self.positions.OnSecuritiesChanged(algorithm, changes)
 
         for security in changes.RemovedSecurities:
             symbol = security.Symbol
@@ -109,11 +120,3 @@ class MarketCapWeightedPortfolioConstructionModel(PortfolioConstructionModel):
         for security in changes.AddedSecurities:
             if security.Fundamentals is not None and security.Fundamentals.MarketCap > 0:
                 self.securities[security.Symbol] = security
-        
-        
-def GroupBy(iterable, key=lambda x: x):
-    d = defaultdict(list)
-    for item in iterable:
-        d[key(item)].append(item)
-    return d.items()
-    
\ No newline at end of file
@@ -0,0 +1,229 @@
+from AlgorithmImports import *
+import hashlib
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+
+class QuantBookCache:
+    ''' On-disk cache in front of a QuantBook for GetFundamental and History.
+        Every (query kind, field or resolution, symbol) is one entry: a times .npy and a values .npy,
+        read back memory-mapped, plus the date ranges already fetched. A request fetches what no entry covers
+        yet in one batch per set of symbols missing the same ranges, never past the last completed bar, and the
+        least recently used entries are deleted once the cache grows past maxBytes. Anything else is passed
+        through to the wrapped QuantBook.
+    '''
+
+    def __init__(self, qb, directory='quantbook_cache', maxBytes=2*1024**3):
+        self.qb = qb
+        self.directory = directory
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+        self.indexPath = os.path.join(directory, 'index.json')
+        self.entries = {}
+        if os.path.exists(self.indexPath):
+            with open(self.indexPath) as file:
+                self.entries = json.load(file)
+
+
+    def __getattr__(self, name):
+        return getattr(self.qb, name)
+
+
+    # -------------------------------------------------------------------------- queries
+
+    def GetFundamental(self, symbols, field, start, end):
+        symbols = symbols if isinstance(symbols, list) else [symbols]
+        data = self.Query(symbols, 'fundamental', field, timedelta(1), start, end, lambda group, a, b: self.FetchFundamental(group, field, a, b))
+        return pd.DataFrame({self.SymbolId(symbol): pd.Series(values[:, 0], index=pd.DatetimeIndex(times))
+                             for symbol, (times, values, columns) in data.items()})
+
+
+    def History(self, symbols, start, end, resolution):
+        symbols = symbols if isinstance(symbols, list) else [symbols]
+        data = self.Query(symbols, 'history', str(resolution), Extensions.ToTimeSpan(resolution), start, end,
+                          lambda group, a, b: self.FetchHistory(group, a, b, resolution))
+        groups = defaultdict(list)
+        for symbol, (times, values, columns) in data.items():
+            if len(times):
+                groups[tuple(columns)].append((symbol, times, values))
+        frames = [self.HistoryFrame(columns, group) for columns, group in groups.items()]
+        return frames[0] if len(frames) == 1 else pd.concat(frames) if frames else pd.DataFrame()
+
+
+    @staticmethod
+    def HistoryFrame(columns, group):
+        # one (symbol, time) index built from codes: a MultiIndex per symbol and a concat cost more than the reads
+        symbols, times, values = zip(*group)
+        levelTimes, timeCodes = np.unique(np.concatenate(times), return_inverse=True)
+        symbolCodes = np.repeat(np.arange(len(symbols)), [len(symbolTimes) for symbolTimes in times])
+        index = pd.MultiIndex(levels=[pd.Index(symbols, dtype=object), pd.DatetimeIndex(levelTimes)],
+                              codes=[symbolCodes, timeCodes], names=['symbol', 'time'])
+        return pd.DataFrame(np.concatenate(values), index=index, columns=list(columns))
+
+
+    def FetchFundamental(self, symbols, field, start, end):
+        frame = self.qb.GetFundamental(symbols, field, start, end)
+        fetched = {}
+        for symbol in symbols:
+            symbolId = self.SymbolId(symbol)
+            if symbolId in frame.columns:
+                column = frame[symbolId]
+                values = column.to_numpy(dtype=float if pd.api.types.is_numeric_dtype(column) else str)
+                fetched[symbolId] = (frame.index.to_numpy(dtype='datetime64[ns]'), values[:, None], ['value'])
+        return fetched
+
+
+    def FetchHistory(self, symbols, start, end, resolution):
+        frame = self.qb.History(symbols, start, end, resolution)
+        fetched = {}
+        if frame.empty:
+            return fetched
+        for symbol, history in frame.groupby(level=0):
+            history = history.droplevel(0).select_dtypes('number')
+            fetched[self.SymbolId(symbol)] = (history.index.to_numpy(dtype='datetime64[ns]'), history.to_numpy(dtype=float), list(history.columns))
+        return fetched
+
+
+    # -------------------------------------------------------------------------- entries
+
+    def Query(self, symbols, kind, parameter, barPeriod, start, end, fetch):
+        start, end = pd.Timestamp(start).to_pydatetime(), pd.Timestamp(end).to_pydatetime()
+        end = min(end, self.LastCompletedBarEnd(barPeriod))
+        keys = {symbol: self.EntryKey(kind, parameter, symbol) for symbol in symbols}
+        symbolsByGaps = defaultdict(list)
+        for symbol, key in keys.items():
+            gaps = self.Missing(key, start, end)
+            if gaps:
+                # one request from the first gap to the last: refetching a covered stretch costs less than a round trip per gap
+                symbolsByGaps[(gaps[0][0], gaps[-1][1])].append(symbol)
+        for (fetchStart, fetchEnd), group in symbolsByGaps.items():
+            fetched = fetch(group, fetchStart, fetchEnd)
+            for symbol in group:
+                self.Merge(keys[symbol], fetched.get(self.SymbolId(symbol)), fetchStart, fetchEnd)
+        now = datetime.now().isoformat()
+        for key in keys.values():
+            self.entries[key]['lastUsed'] = now
+        self.Evict(keep=set(keys.values()))
+        self.SaveIndex()
+        return {symbol: self.Read(key, start, end) for symbol, key in keys.items()}
+
+
+    @staticmethod
+    def LastCompletedBarEnd(barPeriod):
+        ''' Ranges are cut here: a bar still in progress would leave a gap to fetch again on every call. '''
+        now = datetime.now()
+        if not barPeriod:
+            return now
+        return datetime.min + (now - datetime.min)//barPeriod*barPeriod
+
+
+    def Missing(self, key, start, end):
+        entry = self.entries.get(key)
+        covered = [] if entry is None else [(datetime.fromisoformat(a), datetime.fromisoformat(b)) for a, b in entry['covered']]
+        gaps, cursor = [], start
+        for a, b in covered:
+            if b < cursor or a > end:
+                continue
+            if a > cursor:
+                gaps.append((cursor, a))
+            cursor = max(cursor, b)
+        if cursor < end or (not covered and cursor == end):
+            gaps.append((cursor, end))
+        return gaps
+
+
+    def Merge(self, key, fetched, start, end):
+        entry = self.entries.get(key) or {'covered': [], 'columns': None, 'bytes': 0}
+        covered = [(datetime.fromisoformat(a), datetime.fromisoformat(b)) for a, b in entry['covered']]
+        # a fetch spanning everything the entry covers replaces its data
+        replaced = fetched is not None and all(start <= a and b <= end for a, b in covered)
+        times, values = (None, None) if replaced else self.Load(key)
+        if fetched is not None:
+            newTimes, newValues, columns = fetched
+            if times is None:
+                times, values = newTimes, newValues
+            else:
+                if values.dtype.kind != newValues.dtype.kind:
+                    values = values.astype(newValues.dtype)
+                times, values = np.concatenate((times, newTimes)), np.concatenate((values, newValues))
+            # later fetches win on duplicate timestamps
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+            last = np.append(times[1:] != times[:-1], True)
+            times, values = times[last], values[last]
+            entry['columns'] = columns
+            np.save(self.Path(key, 'times'), times)
+            np.save(self.Path(key, 'values'), values)
+            entry['bytes'] = times.nbytes + values.nbytes
+        merged = []
+        for a, b in sorted(covered + [(start, end)]):
+            if merged and a <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+            else:
+                merged.append((a, b))
+        entry['covered'] = [(a.isoformat(), b.isoformat()) for a, b in merged]
+        self.entries[key] = entry
+
+
+    def Load(self, key, mmap=False):
+        if not os.path.exists(self.Path(key, 'times')):
+            return None, None
+        mode = 'r' if mmap else None
+        return np.load(self.Path(key, 'times'), mmap_mode=mode), np.load(self.Path(key, 'values'), mmap_mode=mode)
+
+
+    def Read(self, key, start, end):
+        columns = self.entries[key]['columns'] or ['value']
+        times, values = self.Load(key, mmap=True)
+        if times is None:
+            return np.empty(0, dtype='datetime64[ns]'), np.empty((0, len(columns))), columns
+        first, last = np.searchsorted(times, np.datetime64(start, 'ns'), 'left'), np.searchsorted(times, np.datetime64(end, 'ns'), 'right')
+        return times[first:last], values[first:last], columns
+
+
+    def Evict(self, keep=()):
+        total = sum(entry['bytes'] for entry in self.entries.values())
+        for key in sorted(self.entries, key=lambda key: self.entries[key].get('lastUsed', '')):
+            if total <= self.maxBytes:
+                break
+            if key in keep:
+                continue
+            total -= self.entries.pop(key)['bytes']
+            for part in ('times', 'values'):
+                if os.path.exists(self.Path(key, part)):
+                    os.remove(self.Path(key, part))
+
+
+    def Clear(self):
+        for key in list(self.entries):
+            self.entries.pop(key)
+            for part in ('times', 'values'):
+                if os.path.exists(self.Path(key, part)):
+                    os.remove(self.Path(key, part))
+        self.SaveIndex()
+
+
+    def SaveIndex(self):
+        temporary = self.indexPath + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(self.entries, file)
+        os.replace(temporary, self.indexPath)
+
+
+    # -------------------------------------------------------------------------- keys
+
+    @staticmethod
+    def SymbolId(symbol):
+        return symbol.ID.ToString() if hasattr(symbol, 'ID') else str(symbol)
+
+
+    def EntryKey(self, kind, parameter, symbol):
+        return hashlib.sha1(f'{kind}|{parameter}|{self.SymbolId(symbol)}'.encode()).hexdigest()
+
+
+    def Path(self, key, part):
+        return os.path.join(self.directory, f'{key}.{part}.npy')
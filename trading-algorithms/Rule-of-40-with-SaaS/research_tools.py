@@ -1,10 +1,17 @@
 from AlgorithmImports import *
+import html
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
+from history import PortfolioHistoryRecorder
+from qbcache import QuantBookCache
 import warnings
 warnings.filterwarnings('ignore')
 mpl.style.use('dark_background')
@@ -13,22 +20,63 @@ mpl.rcParams['axes.linewidth'] = .2
 
 
 class BacktestAnalyzer:
+    ''' Datasets are loaded on first use and kept for the session; company names are fetched once per symbol.
+        History and fundamentals go through an on-disk QuantBookCache in cacheDirectory (None to query QuantBook directly).
+    '''
 
-    def __init__(self, backtest):
+    def __init__(self, backtest, cacheDirectory='quantbook_cache'):
         self.backtest = backtest
-        self.qb = QuantBook()
+        self.cacheDirectory = cacheDirectory
         self.start = backtest.TotalPerformance.TradeStatistics.StartDateTime.date()
         self.end = backtest.TotalPerformance.TradeStatistics.EndDateTime.date()
-        # prep data
-        self.closedTrades = pd.DataFrame([(trade.Symbol, trade.ProfitLoss) for trade in  self.backtest.TotalPerformance.ClosedTrades], columns=['Ticker', 'PnL'])
-        self.symbols = self.closedTrades.Ticker.unique().tolist()
-        self.closedTrades.loc[:,'Name'] = self.closedTrades.Ticker.map(self.GetCompanyName(self.symbols))
-        self.efficiencyScore = self.GetEfficiencyScoreHistory()
         self.efficiencyScoreTreshold = .4
-        self.portfolioHistory = self.GetPortfolioHistory()
+        self.companyNames = {}
+
+
+    @cached_property
+    def qb(self):
+        qb = QuantBook()
+        return qb if self.cacheDirectory is None else QuantBookCache(qb, self.cacheDirectory)
+
+    @cached_property
+    def trades(self):
+        return pd.DataFrame([(trade.Symbol, trade.ProfitLoss) for trade in  self.backtest.TotalPerformance.ClosedTrades], columns=['Ticker', 'PnL'])
+
+    @cached_property
+    def symbols(self):
+        return self.trades.Ticker.unique().tolist()
+
+    @cached_property
+    def closedTrades(self):
+        closedTrades = self.trades.copy()
+        closedTrades.loc[:,'Name'] = closedTrades.Ticker.map(self.GetCompanyName(self.symbols))
+        return closedTrades
+
+    @cached_property
+    def efficiencyScore(self):
+        return self.GetEfficiencyScoreHistory()
+
+    @cached_property
+    def portfolioHistory(self):
+        return self.GetPortfolioHistory()
+
+    @cached_property
+    def pnlBySymbol(self):
+        return self.trades.groupby('Ticker').PnL.sum()
 
 
     def GetCompanyName(self, symbols):
+        symbols = symbols if isinstance(symbols, list) else [symbols]
+        missing = [symbol for symbol in symbols if symbol not in self.companyNames]
+        if missing:
+            fetched = self.FetchCompanyNames(missing)
+            self.companyNames.update({symbol: fetched.get(symbol) for symbol in missing})
+        return {symbol: self.companyNames[symbol] for symbol in symbols if self.companyNames[symbol] is not None}
+
+    def CompanyName(self, symbol):
+        return self.GetCompanyName(symbol).get(symbol, symbol.Value)
+
+    def FetchCompanyNames(self, symbols):
         return self.qb.GetFundamental(symbols, 'CompanyReference.StandardName', datetime.now()-timedelta(1), datetime.now()).iloc[-1] \
                                 .rename(SymbolCache.GetSymbol, axis=0) \
                                 .str.split().apply(lambda x: x[0]).to_dict()
@@ -72,24 +120,41 @@ class BacktestAnalyzer:
 
     def GetPortfolioHistory(self):
         if self.qb.ObjectStore.ContainsKey('portfolioHistory'):
-            portfolioHistory = pd.read_json(self.qb.ObjectStore.Read('portfolioHistory'), orient='split').fillna(0)
+            stored = self.qb.ObjectStore.Read('portfolioHistory')
+            if PortfolioHistoryRecorder.IsManifest(stored):
+                return PortfolioHistoryRecorder.Load(self.qb.ObjectStore, 'portfolioHistory')
+            # backtests from before the segmented recorder stored one JSON frame
+            portfolioHistory = pd.read_json(io.StringIO(stored), orient='split').fillna(0)
             return portfolioHistory
 
+    def GetEfficiencyScoreVsFwd12MonthsReturns(self):
+        ''' One row per (year end, symbol): the efficiency score and the return over the following year. '''
+        symbols = [symbol for symbol in self.symbols if symbol.ID.ToString() in self.efficiencyScore.columns]
+        closes = self.qb.History(symbols, self.start, self.end, Resolution.Daily).close.unstack(level=0)
+        closes.columns = [symbol.ID.ToString() for symbol in closes.columns]
+        fwdReturns = self.YearlyForwardReturns(closes)
+        efficiencyScore = self.efficiencyScore.asfreq(pd.offsets.YearEnd(), method='bfill').pipe(replace_by_iloc, -1, 0)
+        fwdReturns, efficiencyScore = fwdReturns.align(efficiencyScore, join='inner')
+        valid = fwdReturns.notna().to_numpy() & efficiencyScore.notna().to_numpy()
+        return pd.DataFrame({'Fwd12MonthsReturns': fwdReturns.to_numpy()[valid], 'EfficiencyScore': efficiencyScore.to_numpy()[valid]})
+
+    @staticmethod
+    def YearlyForwardReturns(closes):
+        ''' Year-end x symbol forward 12 months returns from a date x symbol close panel. Each symbol is sampled
+            at the year ends within its own trading history (first close on or after the year end); its first
+            year starts from a 0 return and its last year has a 0 forward return.
+        '''
+        index = closes.index
+        yearEnds = pd.date_range(index[0], index[-1], freq=pd.offsets.YearEnd())
+        rows = np.searchsorted(index.to_numpy(), yearEnds.to_numpy())
+        first, last = closes.apply(pd.Series.first_valid_index), closes.apply(pd.Series.last_valid_index)
+        listed = (yearEnds.to_numpy()[:, None] >= first.to_numpy()[None, :]) & (yearEnds.to_numpy()[:, None] <= last.to_numpy()[None, :])
+        yearly = closes.bfill().iloc[rows].set_axis(yearEnds).where(listed)
+        returns = (yearly/yearly.shift(1) - 1).mask(listed & yearly.shift(1).isna(), 0)
+        return returns.shift(-1).fillna(0).where(listed)
+
     def PlotEfficiencyScoreVsFwd12MonthsReturns(self):
-        dfList = []
-        for symbol in self.symbols:
-            if symbol.ID.ToString() not in self.efficiencyScore.columns:
-                continue
-            history = self.qb.History([symbol], self.start, self.end, Resolution.Daily).close.unstack().transpose()
-            history.asfreq('Y', method='bfill').pct_change().fillna(0, limit=1).shift(-1).fillna(0, limit=1)
-            ef_score = self.efficiencyScore.loc[:,symbol]
-            df = pd.concat([history.asfreq('Y', method='bfill').pct_change().fillna(0, limit=1).shift(-1).fillna(0, limit=1), \
-                        ef_score.asfreq('Y', method='bfill').pipe(replace_by_iloc, -1, 0)], \
-                        axis=1) 
-            df.columns = ['Fwd12MonthsReturns', 'EfficiencyScore']
-            dfList.append(df)
-    
-        df = pd.concat(dfList, ignore_index=True).dropna() #.clip(lower=-1, upper=1)
+        df = self.GetEfficiencyScoreVsFwd12MonthsReturns()
         X = df.EfficiencyScore.clip(lower=-1, upper=2).to_numpy().reshape(-1,1)
         y = df.Fwd12MonthsReturns.clip(lower=-1, upper=1).to_numpy().reshape(-1,1)
         lm = LinearRegression()
@@ -117,55 +182,109 @@ class BacktestAnalyzer:
         plt.show()
     
     def PlotSummaryBySymbol(self, symbol):
-        start, end = self.portfolioHistory.iloc[np.where(self.portfolioHistory.loc[:,symbol.ID.ToString()] != 0)[0][[-1,0]]].index.date
-        start -= timedelta(30)
-        start = max(self.start, start)
-        end += timedelta(30)
-        end = min(end, self.end)
-        priceHistory = self.qb.History([symbol], start, end, Resolution.Daily).close.unstack().transpose().pct_change().fillna(0, limit=1).add(1).cumprod().sub(1)
-        
-        fig, (ax1, ax2) = plt.subplots(nrows=2, figsize=(20,12), gridspec_kw={'height_ratios':[3,1]}, sharex=True)
-        priceHistory.plot(color='white', linewidth=3, ax=ax1)
-        
-        yellow = tuple(x/255 for x in (254, 221, 0))
-        self.portfolioHistory.loc[:,symbol].plot(color=yellow, alpha=.1, linewidth=3, secondary_y=True, label='Weight', ax=ax1)
-        ax1.right_ax.set_ylabel('Portfolio Weight', fontsize=10)
-        self.efficiencyScore.loc[start:end,symbol].plot(ax=ax2, color='purple', alpha=.5)
-        ax2.axhline(self.efficiencyScoreTreshold, color='white', linewidth=5, alpha=.1)
-        
-        ax1.set_title('Price History, Portfolio Weighting and Efficiency Score', fontsize=16, fontweight='bold', pad=25)
-        ax1.set_ylabel('Returns', fontsize=10)
-        lines = ax1.get_lines() + ax1.right_ax.get_lines()
-        x,y = lines[1].get_xydata()[:,0], lines[1].get_xydata()[:,1]
-        ax1.right_ax.fill_between(x,y, color='yellow', alpha=.1)
-        ax1.yaxis.labelpad = 20
-        ax1.right_ax.yaxis.labelpad = 20
-        ax1.legend(lines, [[*self.GetCompanyName(symbol).values()][0], 'Portfolio Weight'], loc='upper left', frameon=True).legendHandles[1].set_alpha(.3)
-        ax1.spines['top'].set_visible(False)
-        ax1.spines['bottom'].set_linewidth(.5)
-        ax1.spines['left'].set_linewidth(.5)
-        ax1.spines['right'].set_linewidth(.5)
-        ax1.grid(which='both', alpha=.2)
-        ax1.right_ax.grid(which='both', alpha=.2)
-        lines = ax2.get_lines()
-        x, y = lines[0].get_xydata()[:,0], lines[0].get_xydata()[:,1]
-        ax2.fill_between(x, self.efficiencyScoreTreshold, y, color='pink', alpha=.2, where=(y >= self.efficiencyScoreTreshold))
-        ax2.fill_between(x, self.efficiencyScoreTreshold, y,  color='red', alpha=.2, where=(y < self.efficiencyScoreTreshold))
-        # ax2.set_ylim([min(0, ax2.get_ylim()[0]), ax2.get_ylim()[1]])
-        ax2.legend(['Efficiency Score']).legendHandles[0].set_alpha(1)
-        ax2.spines['left'].set_linewidth(.5)
-        ax2.spines['bottom'].set_linewidth(.5)
-        ax2.spines['right'].set_visible(False)
-        ax2.spines['top'].set_visible(False)
-        ax2.grid(which='both', alpha=.2)
+        summaries = self.GetSymbolSummaries([symbol])
+        if not summaries:
+            raise ValueError(f'{symbol.Value} was never held in the backtest')
+        plot_summary(summaries[0], self.efficiencyScoreTreshold)
         plt.show()
+
+    def GetSymbolSummaries(self, symbols):
+        ''' Plot inputs per symbol that was held: returns over the holding period (+/- 30 days), portfolio weight and
+            efficiency score. Prices come from one History request for all symbols; the summaries only hold
+            strings and pandas objects, so they can be sent to worker processes.
+        '''
+        windows = {}
+        for symbol in symbols:
+            if symbol.ID.ToString() not in self.portfolioHistory.columns:
+                continue
+            held = np.where(self.portfolioHistory.loc[:,symbol.ID.ToString()] != 0)[0]
+            if len(held):
+                start, end = self.portfolioHistory.index[held[[-1,0]]].date
+                windows[symbol] = (max(self.start, start - timedelta(30)), min(end + timedelta(30), self.end))
+        if not windows:
+            return []
+        closes = self.qb.History(list(windows), min(start for start, _ in windows.values()), max(end for _, end in windows.values()), Resolution.Daily).close.unstack(level=0)
+        closes.columns = [symbol.ID.ToString() for symbol in closes.columns]
+        names = self.GetCompanyName(list(windows))
+        summaries = []
+        for symbol, (start, end) in windows.items():
+            symbolId = symbol.ID.ToString()
+            start, end = pd.Timestamp(start), pd.Timestamp(end)
+            summaries.append({'symbol': symbol.Value,
+                              'name': names.get(symbol, symbol.Value),
+                              'pnl': float(self.pnlBySymbol.get(symbol, 0)),
+                              'priceHistory': closes[symbolId].loc[start:end].dropna().pct_change().fillna(0, limit=1).add(1).cumprod().sub(1),
+                              'weights': self.portfolioHistory.loc[:,symbolId],
+                              'efficiencyScore': self.efficiencyScore.loc[start:end,symbolId]})
+        return summaries
+
+    def SaveSummaryReports(self, symbols=None, directory='reports', processes=None):
+        ''' Writes the summary chart of every held symbol (by default all traded symbols, biggest winner first) as a PNG,
+            rendered in a process pool with the Agg backend, plus an index.html with the PnL table. Returns the index path.
+        '''
+        symbols = symbols if symbols is not None else self.pnlBySymbol.sort_values(ascending=False).index.tolist()
+        summaries = self.GetSymbolSummaries(symbols)
+        os.makedirs(directory, exist_ok=True)
+        files = [f"{summary['symbol']}.png" for summary in summaries]
+        with ProcessPoolExecutor(processes, initializer=mpl.use, initargs=('Agg',)) as pool:
+            list(pool.map(render_summary, summaries, [os.path.join(directory, file) for file in files], [self.efficiencyScoreTreshold]*len(files)))
+        rows = ''.join(f"<tr><td>{html.escape(summary['name'])}</td><td>{html.escape(summary['symbol'])}</td><td>{summary['pnl']:,.2f}</td>"
+                       f"<td><img src=\"{html.escape(file)}\" width=\"800\"></td></tr>\n" for summary, file in zip(summaries, files))
+        path = os.path.join(directory, 'index.html')
+        with open(path, 'w') as index:
+            index.write(f'<html><body><h2>Backtest {self.start} - {self.end}</h2>\n<table>\n'
+                        f'<tr><th>Name</th><th>Ticker</th><th>PnL</th><th>Summary</th></tr>\n{rows}</table></body></html>\n')
+        return path
         
         
     def GetBiggestWinner(self):
-        return self.closedTrades.groupby('Ticker').PnL.sum().nlargest(1).index[0]
+        return self.pnlBySymbol.nlargest(1).index[0]
 
     def GetBiggestLoser(self):
-        return self.closedTrades.groupby('Ticker').PnL.sum().nsmallest(1).index[0]
+        return self.pnlBySymbol.nsmallest(1).index[0]
+
+
+def plot_summary(summary, efficiencyScoreTreshold):
+    fig, (ax1, ax2) = plt.subplots(nrows=2, figsize=(20,12), gridspec_kw={'height_ratios':[3,1]}, sharex=True)
+    summary['priceHistory'].plot(color='white', linewidth=3, ax=ax1)
+    
+    yellow = tuple(x/255 for x in (254, 221, 0))
+    summary['weights'].plot(color=yellow, alpha=.1, linewidth=3, secondary_y=True, label='Weight', ax=ax1)
+    ax1.right_ax.set_ylabel('Portfolio Weight', fontsize=10)
+    summary['efficiencyScore'].plot(ax=ax2, color='purple', alpha=.5)
+    ax2.axhline(efficiencyScoreTreshold, color='white', linewidth=5, alpha=.1)
+    
+    ax1.set_title('Price History, Portfolio Weighting and Efficiency Score', fontsize=16, fontweight='bold', pad=25)
+    ax1.set_ylabel('Returns', fontsize=10)
+    lines = ax1.get_lines() + ax1.right_ax.get_lines()
+    x,y = lines[1].get_xydata()[:,0], lines[1].get_xydata()[:,1]
+    ax1.right_ax.fill_between(x,y, color='yellow', alpha=.1)
+    ax1.yaxis.labelpad = 20
+    ax1.right_ax.yaxis.labelpad = 20
+    ax1.legend(lines, [summary['name'], 'Portfolio Weight'], loc='upper left', frameon=True).legendHandles[1].set_alpha(.3)
+    ax1.spines['top'].set_visible(False)
+    ax1.spines['bottom'].set_linewidth(.5)
+    ax1.spines['left'].set_linewidth(.5)
+    ax1.spines['right'].set_linewidth(.5)
+    ax1.grid(which='both', alpha=.2)
+    ax1.right_ax.grid(which='both', alpha=.2)
+    lines = ax2.get_lines()
+    x, y = lines[0].get_xydata()[:,0], lines[0].get_xydata()[:,1]
+    ax2.fill_between(x, efficiencyScoreTreshold, y, color='pink', alpha=.2, where=(y >= efficiencyScoreTreshold))
+    ax2.fill_between(x, efficiencyScoreTreshold, y,  color='red', alpha=.2, where=(y < efficiencyScoreTreshold))
+    # ax2.set_ylim([min(0, ax2.get_ylim()[0]), ax2.get_ylim()[1]])
+    ax2.legend(['Efficiency Score']).legendHandles[0].set_alpha(1)
+    ax2.spines['left'].set_linewidth(.5)
+    ax2.spines['bottom'].set_linewidth(.5)
+    ax2.spines['right'].set_visible(False)
+    ax2.spines['top'].set_visible(False)
+    ax2.grid(which='both', alpha=.2)
+    return fig
+
+def render_summary(summary, path, efficiencyScoreTreshold):
+    fig = plot_summary(summary, efficiencyScoreTreshold)
+    fig.savefig(path, bbox_inches='tight')
+    plt.close(fig)
 
 def replace_by_iloc(s, idx, value):
     s.iloc[idx] = value
@@ -1,66 +1,68 @@
 from Selection.FundamentalUniverseSelectionModel import FundamentalUniverseSelectionModel
-from datetime import datetime, timedelta
+from datetime import datetime
+import numpy as np
+from coarse import CoarseSelectionStage
+from cache import SelectionDataStore, SelectionRow, Column
+from industries import IndustryClassificationCache
 
 
 
 
 class RuleOfFortySaasSelectionModel(FundamentalUniverseSelectionModel):
-    def __init__(self, algorithm):
+    ''' IndustryCodeMapping: 
+        31110010 --> 'InformationTechnologyServices',
+        31110020 --> 'SoftwareApplication',
+        31110030 --> 'SoftwareInfrastructure'
+        30830010 --> 'InternetContentAndInformation'
+    '''
+    industryCodes = (31110010, 31110020, 31110030, 30830010)
+    
+    def __init__(self, algorithm, efficiencyScoreThreshold=.4, coarseCache=None, objectStore=None):
         self.algorithm = algorithm
-        self.selectionDataDict = {}
+        self.efficiencyScoreThreshold = efficiencyScoreThreshold
+        self.selectionDataStore = SelectionDataStore(SelectionData)
         self.nextSelectionTime = datetime.min
+        self.coarseSelection = CoarseSelectionStage(cache=coarseCache)
+        self.industries = IndustryClassificationCache(objectStore)
         super().__init__(True, None)
         
     
     def SelectCoarse(self, algorithm, coarse):
         if algorithm.Time < self.nextSelectionTime:
             return Universe.Unchanged
-        coarseFiltered = [c for c in coarse if (c.HasFundamentalData and c.Price > 1 and c.DollarVolume > 1e6 and (algorithm.Time - c.Symbol.ID.Date) > timedelta(365))]
-        sortedByDollarVolume = sorted(coarseFiltered, key=lambda c: c.DollarVolume, reverse=True)
-        return [c.Symbol for c in sortedByDollarVolume[:1000]]
+        return self.industries.Plausible(self.coarseSelection.Select(algorithm.Time, coarse), algorithm.Time, self.industryCodes)
     
     def SelectFine(self, algorithm, fine):
-        filteredByIndustry = [f for f in fine if f.MarketCap > 1e9 and f.AssetClassification.MorningstarIndustryCode in {31110010, 31110020, 31110030, 30830010}] 
-        ''' IndustryCodeMapping: 
-            31110010 --> 'InformationTechnologyServices',
-            31110020 --> 'SoftwareApplication',
-            31110030 --> 'SoftwareInfrastructure'
-            30830010 --> 'InternetContentAndInformation'
-        '''
-        selection = []
-        for f in filteredByIndustry:
-            if f.Symbol not in self.selectionDataDict:
-                self.selectionDataDict[f.Symbol] = SelectionData(algorithm, f.Symbol)
-            self.selectionDataDict[f.Symbol].Update(algorithm.Time, f.ValuationRatios.FCFYield, f.OperationRatios.RevenueGrowth.Value)
-            if self.selectionDataDict[f.Symbol].SatisfiesRuleOfForty:
-                selection.append(f.Symbol)
+        fine = list(fine)
+        industryCodes = [f.AssetClassification.MorningstarIndustryCode for f in fine]
+        self.industries.Update(algorithm.Time, [f.Symbol for f in fine], industryCodes)
+        self.industries.Save()
+        filteredByIndustry = [f for f, industryCode in zip(fine, industryCodes) if industryCode in self.industryCodes and f.MarketCap > 1e9]
+        symbols = [f.Symbol for f in filteredByIndustry]
+        rows = self.selectionDataStore.RefreshMany(symbols, algorithm.Time, [f.ValuationRatios.FCFYield for f in filteredByIndustry], [f.OperationRatios.RevenueGrowth.Value for f in filteredByIndustry])
+        selection = [symbols[i] for i in np.flatnonzero(SelectionData.SatisfiesRuleOfFortyMask(self.selectionDataStore, rows, self.efficiencyScoreThreshold))]
+        self.selectionDataStore.Evict(algorithm.Time)
         self.nextSelectionTime = Expiry.EndOfMonth(algorithm.Time)
         return selection
 
 
 
 
-class SelectionData:
-    
-    def __init__(self, algorithm, symbol):
-        self.Symbol = symbol
-        self.Time = datetime.min
-        self.fcfYield = 0 
-        self.revenueGrowth = 0 
-        self.efficiencyScore = 0
+class SelectionData(SelectionRow):
+    __slots__ = ()
+    fcfYield = Column()
+    revenueGrowth = Column()
+    efficiencyScore = Column()
     
     
-    def Update(self, time, fcfYield, revenueGrowth):
-        self.Time = time
-        self.fcfYield = fcfYield
-        self.revenueGrowth = revenueGrowth
-        self.efficiencyScore = fcfYield + revenueGrowth
+    @staticmethod
+    def UpdateMany(store, rows, time, fcfYield, revenueGrowth):
+        store.time[rows] = np.datetime64(time, 'us')
+        store.Column('fcfYield')[rows] = fcfYield
+        store.Column('revenueGrowth')[rows] = revenueGrowth
+        store.Column('efficiencyScore')[rows] = fcfYield + revenueGrowth
     
     
-    @property
-    def SatisfiesRuleOfForty(self):
-        return self.efficiencyScore > .4
-        
-        
-        
-        
\ No newline at end of file
+    @staticmethod
+    def SatisfiesRuleOfFortyMask(store, rows, threshold):
+        return store.Column('efficiencyScore')[rows] > threshold
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class MarketCapWeightingEngine:
+    ''' Market cap weights for long insights, bounded by [minWeight, maxWeight].
+        Weight clipped at a bound is redistributed over the remaining names (water-filling),
+        so the portfolio stays fully invested whenever the bounds allow it.
+    '''
+
+    def __init__(self, maxWeight=1, minWeight=0, decimals=5):
+        self.maxWeight = maxWeight
+        self.minWeight = minWeight
+        self.decimals = decimals
+
+
+    def Weights(self, caps, directions):
+        caps = np.asarray(caps, dtype=float)
+        directions = np.asarray(directions, dtype=float)
+        weights = np.zeros(len(caps))
+        eligible = (directions > 0) & (caps > 0)
+        n = np.count_nonzero(eligible)
+        if n == 0:
+            return weights
+        lower, upper = self.minWeight, self.maxWeight
+        if n*upper <= 1:
+            weights[eligible] = upper
+        elif n*lower >= 1:
+            weights[eligible] = 1/n
+        else:
+            level = self.WaterLevel(np.sort(caps[eligible]), lower, upper)
+            weights[eligible] = np.clip(level*caps[eligible], lower, upper)
+        return np.round(weights, self.decimals)
+
+
+    @staticmethod
+    def WaterLevel(sortedCaps, lower, upper):
+        # find the scale so that sum(clip(scale*cap, lower, upper)) == 1.
+        # The sum is piecewise linear in the scale with kinks at lower/cap and upper/cap,
+        # so it is evaluated at every kink at once and solved exactly on the crossing segment.
+        n = len(sortedCaps)
+        cumCaps = np.concatenate(([0.], np.cumsum(sortedCaps)))
+
+        def Partition(scales):
+            nLower = np.searchsorted(sortedCaps, lower/scales, side='left')
+            nBelowUpper = np.searchsorted(sortedCaps, upper/scales, side='right')
+            return nLower, nBelowUpper
+
+        kinks = np.unique(np.concatenate((lower/sortedCaps, upper/sortedCaps)))
+        kinks = kinks[kinks > 0]
+        nLower, nBelowUpper = Partition(kinks)
+        totals = lower*nLower + upper*(n - nBelowUpper) + kinks*(cumCaps[nBelowUpper] - cumCaps[nLower])
+        idx = np.searchsorted(totals, 1.)
+        left = kinks[idx-1] if idx > 0 else 0.
+        right = kinks[idx] if idx < len(kinks) else 2*kinks[-1]
+        nLower, nBelowUpper = Partition(np.array([(left + right)/2]))
+        nLower, nBelowUpper = nLower[0], nBelowUpper[0]
+        freeCaps = cumCaps[nBelowUpper] - cumCaps[nLower]
+        if freeCaps <= 0:
+            return (left + right)/2
+        return (1 - lower*nLower - upper*(n - nBelowUpper))/freeCaps